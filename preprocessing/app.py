@@ -1,29 +1,77 @@
-from flask import Flask, jsonify, request
-from package.circuit.circuit import Circuit
-from package.simulation.simulation import Simulation
-from package.simulation.graph import Graph
+"""
+HTTP service featurizing circuits, see `package/service.py`.
+
+POST /api/circuit      one circuit specification {"name", "gate_dict", "voltage_dict", "eos_dict", "inverting"}
+                       -> {"name", "netlist", "feature_matrix", "adjacency_list", "delay", "critical_path"}
+POST /api/circuits     a list of specifications -> the list of their responses (errors included, status 200)
+GET  /api/health       liveness and configuration
+Invalid specifications get status 400 and {"error": message}. Concurrent requests are micro-batched and
+processed on a pool of SERVICE_WORKERS processes (every core by default); SERVICE_MAX_BATCH_SIZE and
+SERVICE_MAX_DELAY (seconds) tune the batching. The Flask development server is fine for trying it out,
+serve it with a threaded WSGI server to handle thousands of requests per second:
+python app.py
+gunicorn --workers 1 --threads 64 app:app
+python benchmarks/load_test.py --url http://127.0.0.1:5000
+"""
+
+import json
+import os
+from concurrent.futures import TimeoutError
+
+from flask import Flask, Response, request
+
+from package.service import CircuitService
+
+REQUEST_TIMEOUT = float(os.environ.get("SERVICE_TIMEOUT", 30))
 
 app = Flask(__name__)
+service = CircuitService(workers=int(os.environ["SERVICE_WORKERS"]) if "SERVICE_WORKERS" in os.environ else None,
+                         max_batch_size=int(os.environ.get("SERVICE_MAX_BATCH_SIZE", 64)),
+                         max_delay=float(os.environ.get("SERVICE_MAX_DELAY", 0.002)))
+
+
+def json_response(body:str, status:int = 200):
+    return Response(body, status=status, mimetype="application/json")
+
+
+def read_json():
+    """
+    Returns the JSON body of the request, or None when it is missing or malformed.
+    """
+    return request.get_json(silent=True)
+
+
+@app.route("/api/circuit", methods=["POST"])
+def post_circuit():
+    spec = read_json()
+    if spec is None:
+        return json_response(json.dumps({"error": "The request body must be JSON"}), 400)
+    try:
+        status, body = service.submit(spec).result(REQUEST_TIMEOUT)
+    except TimeoutError:
+        return json_response(json.dumps({"error": "Timed out"}), 503)
+    return json_response(body, status)
+
+
+@app.route("/api/circuits", methods=["POST"])
+def post_circuits():
+    specs = read_json()
+    if not isinstance(specs, list):
+        return json_response(json.dumps({"error": "The request body must be a JSON list of circuits"}), 400)
+    try:
+        responses = service.process(specs, REQUEST_TIMEOUT)
+    except TimeoutError:
+        return json_response(json.dumps({"error": "Timed out"}), 503)
+    # the bodies are JSON already
+    return json_response("[" + ",".join(body for _, body in responses) + "]")
+
+
+@app.route("/api/health", methods=["GET"])
+def health():
+    return json_response(json.dumps({"status": "ok", "workers": service.workers,
+                                     "max_batch_size": service.batcher.max_batch_size,
+                                     "max_delay": service.batcher.max_delay}))
 
-# Create instances of your classes
-my_class1 = Circuit()
-my_class2 = Simulation()
-my_class3 = Graph()
-
-# Define your API routes
-@app.route('/api/myclass1', methods=['POST'])
-def post_myclass1():
-    # Get data from the request and pass it to a method in MyClass1
-    data = request.get_json()
-    response = my_class1.some_method(data)
-    return jsonify(response), my_class3
-
-@app.route('/api/myclass2', methods=['POST'])
-def post_myclass2():
-    # Get data from the request and pass it to a method in MyClass2
-    data = request.get_json()
-    response = my_class2.another_method(data)
-    return jsonify(response)
 
 if __name__ == '__main__':
-    app.run()
\ No newline at end of file
+    app.run(threaded=True)
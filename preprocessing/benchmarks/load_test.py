@@ -0,0 +1,129 @@
+"""
+Load test of the circuit service (`app.py`, `package/service.py`).
+
+Generates random `Graph` circuits, sends them as single circuit requests from `--concurrency` client
+threads (one keep-alive connection each) and reports the throughput and latency percentiles. Without
+`--url` the requests go straight to an in-process `CircuitService`, which measures the batching and the
+worker pool without HTTP.
+python benchmarks/load_test.py --url http://127.0.0.1:5000 --requests 20000 --concurrency 64
+python benchmarks/load_test.py --workers 8 --max-batch-size 128
+python benchmarks/load_test.py --url http://127.0.0.1:5000 --min-throughput 2000    # exits 1 below 2000 requests/s
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from package.circuit.compact import CompactCircuit
+from package.service import CircuitService
+from package.simulation.graph import Graph
+
+
+def make_specs(count:int, max_num_of_gates:int, seed:int = 0):
+    """
+    Returns `count` circuit specifications drawn from `Graph`, cycling over up to 1000 distinct ones.
+    """
+    np.random.seed(seed)
+    pool = []
+    for i in range(min(count, 1000)):
+        compact = CompactCircuit.from_circuit(Graph(f"circuit{i}", max_num_of_gates=max_num_of_gates).circuit)
+        gate_dict, voltage_dict, eos_dict = compact.to_dicts()
+        pool.append({"name": f"circuit{i}", "gate_dict": gate_dict, "voltage_dict": voltage_dict,
+                     "eos_dict": eos_dict, "inverting": compact.inverting})
+    return [pool[i % len(pool)] for i in range(count)]
+
+
+class HttpClient:
+    """
+    Posts specifications to the service, one keep-alive connection per thread.
+    """
+
+    def __init__(self, url:str):
+        parsed = urllib.parse.urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.path = parsed.path.rstrip("/") + "/api/circuit"
+        self.local = threading.local()
+
+    def __call__(self, body:bytes):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            return 0
+
+
+def run(send, bodies:list, concurrency:int):
+    """
+    Sends all bodies from `concurrency` threads and returns the wall time, the latencies and the statuses.
+    """
+    latencies = np.empty(len(bodies))
+    statuses = np.empty(len(bodies), dtype=np.int64)
+
+    def request(i):
+        start = time.perf_counter()
+        statuses[i] = send(bodies[i])
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(request, range(len(bodies))))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running service, in-process service by default")
+    parser.add_argument("--requests", type=int, default=10000, help="number of requests")
+    parser.add_argument("--concurrency", type=int, default=64, help="number of client threads")
+    parser.add_argument("--gates", type=int, default=20, help="max_num_of_gates of the generated circuits")
+    parser.add_argument("--workers", type=int, help="worker processes of the in-process service, every core by default")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="batch size of the in-process service")
+    parser.add_argument("--max-delay", type=float, default=0.002, help="batching delay of the in-process service")
+    parser.add_argument("--min-throughput", type=float, help="exit with 1 below this many requests per second")
+    args = parser.parse_args(arguments)
+
+    specs = make_specs(args.requests, args.gates)
+    if args.url:
+        service = None
+        send = HttpClient(args.url)
+        bodies = [json.dumps(spec).encode() for spec in specs]
+        # warm-up connections and server
+        run(send, bodies[:args.concurrency], args.concurrency)
+    else:
+        service = CircuitService(args.workers, args.max_batch_size, args.max_delay)
+        send = lambda spec: service.submit(spec).result()[0]
+        bodies = specs
+        run(send, bodies[:args.concurrency], args.concurrency)
+
+    seconds, latencies, statuses = run(send, bodies, args.concurrency)
+    if service is not None:
+        service.close()
+    throughput = len(bodies) / seconds
+    p50, p95, p99 = 1e3 * np.percentile(latencies, [50, 95, 99])
+    print(f"{len(bodies)} requests in {seconds:.2f} s: {throughput:.0f} requests/s")
+    print(f"latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {1e3 * latencies.max():.2f}")
+    print(f"failed: {int(np.sum(statuses != 200))}")
+    if np.any(statuses != 200) or (args.min_throughput is not None and throughput < args.min_throughput):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
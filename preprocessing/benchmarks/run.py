@@ -0,0 +1,288 @@
+"""
+Benchmark suite of the preprocessing package.
+
+Measures the throughput, peak memory and scaling of
+    graph               `Graph` construction
+    graph_lazy          `Graph(lazy=True)` construction and its edge index and feature matrix
+    features            `Circuit.make_feature_matrix` for 10 to 10k gates
+    adjacency_list      `Circuit.make_adjacency_list` for 10 to 10k gates
+    adjacency_matrix    `Circuit.make_adjacency_matrix` for 10 to 10k gates
+    circuit             `Circuit` construction for 10 to 10k gates
+    simulation          `Simulation` deck emission for 10 to 100k circuits
+    parse               `parse_deck` of a `Simulation` deck of 10 to 10k circuits
+    dataset_save        `DatasetWriter` against one `np.savez` per graph
+    dataset_load        `DatasetReader` against one `np.load` per graph
+    loader              `GraphLoader` batches (64 graphs, self loops) of a packed dataset
+Every case is timed (best of `--repeat` runs) without tracing, then run once more under `tracemalloc`
+for its peak memory. The scaling exponent of every benchmark is the slope of log(time) over log(size).
+Results are written as JSON, so that two versions can be compared:
+python benchmarks/run.py --save baseline.json
+python benchmarks/run.py --compare baseline.json          # flags cases slower by more than --threshold
+python benchmarks/run.py --only features simulation --quick
+python benchmarks/run.py --only graph --instrument        # per stage breakdown, see package/instrumentation.py
+"""
+
+import argparse
+import atexit
+import functools
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from package import instrumentation
+from package.circuit.circuit import Circuit
+from package.circuit.compact import CompactCircuit
+from package.circuit.parser import parse_deck
+from package.simulation.graph import Graph
+from package.simulation.simulation import Simulation
+from package.simulation.dataset import DatasetWriter, DatasetReader
+from package.simulation.loader import GraphLoader
+
+GATE_SIZES = [10, 100, 1000, 10000]
+CIRCUIT_COUNTS = [10, 100, 1000, 10000, 100000]
+GRAPH_COUNTS = [100, 1000]
+DATASET_COUNTS = [100, 1000, 10000]
+QUICK = {"gates": [10, 100, 1000], "circuits": [10, 100, 1000], "graphs": [100], "dataset": [100, 1000]}
+
+
+def chain_dicts(num_gates:int, rng):
+    """
+    Returns the dictionaries of a random chain like the ones `Graph` builds, of any length
+    (`Graph` itself overflows its idealized weights for thousands of gates).
+    """
+    gate_list = rng.choice(Circuit.GATE_CHOICES, num_gates)
+    gate_dict = {f"gate{i+1}": {"type": str(gate_type), "k": int(rng.randint(1, 50)),
+                                "input_components": [f"gate{i}" if i else f"v{j+1}" for j in range(int(gate_type[0]))]}
+                 for i, gate_type in enumerate(gate_list)}
+    voltage_dict = {f"v{j+1}": {"ideal": False, "k": int(rng.randint(1, 50))} for j in range(int(gate_list[0][0]))}
+    eos_dict = {"k": int(rng.randint(1, 50)), "input_gate": f"gate{num_gates}", "capacitance": 10}
+    return gate_dict, voltage_dict, eos_dict
+
+
+def chain_circuit(num_gates:int, seed:int = 0):
+    return Circuit(f"circuit{num_gates}", *chain_dicts(num_gates, np.random.RandomState(seed)))
+
+
+def compact_pool(count:int, pool_size:int = 1000, seed:int = 0):
+    """
+    Returns `count` distinct circuits for emission, cycling over the topologies of `pool_size` graphs.
+    """
+    np.random.seed(seed)
+    pool = [CompactCircuit.from_circuit(Graph("pool").circuit) for _ in range(min(count, pool_size))]
+    circuits = []
+    for i in range(count):
+        c = pool[i % len(pool)]
+        circuits.append(CompactCircuit(f"circuit{i+1}", c.types, c.k, c.fanin_ptr, c.fanin_idx, c.source_ideal,
+                                       c.source_k, c.eos_k, c.eos_gate, c.eos_capacitance, c.inverting))
+    return circuits
+
+
+def cases(sizes:dict):
+    """
+    Yields (benchmark, size, items, setup, run) for every case: `setup()` returns the state `run(state)`
+    is timed on, and `items` is the number of items (gates, graphs, circuits) one run processes.
+    """
+    for n in sizes["graphs"]:
+        yield "graph", n, n, lambda n=n: np.random.seed(0), lambda _, n=n: [Graph(f"circuit{i}") for i in range(n)]
+        yield "graph_lazy", n, n, lambda n=n: np.random.seed(0), \
+            lambda _, n=n: [Graph(f"circuit{i}", lazy=True).make_edge_index_and_feature_matrix() for i in range(n)]
+
+    for n in sizes["gates"]:
+        yield "circuit", n, n, lambda n=n: chain_dicts(n, np.random.RandomState(0)), \
+            lambda dicts, n=n: Circuit(f"circuit{n}", *json.loads(json.dumps(dicts)))
+        yield "features", n, n, lambda n=n: chain_circuit(n), lambda circuit: circuit.make_feature_matrix()
+        yield "adjacency_list", n, n, lambda n=n: chain_circuit(n), lambda circuit: circuit.make_adjacency_list()
+        yield "adjacency_matrix", n, n, lambda n=n: chain_circuit(n), lambda circuit: circuit.make_adjacency_matrix()
+
+    for n in sizes["circuits"]:
+        def emit(circuits):
+            with tempfile.TemporaryDirectory() as directory:
+                Simulation("benchmark", circuits).save(os.path.join(directory, "deck.sp"))
+        yield "simulation", n, n, lambda n=n: compact_pool(n), emit
+
+        if n <= 10000:
+            @functools.lru_cache(maxsize=None)
+            def write_deck(n=n):
+                directory = tempfile.mkdtemp()
+                atexit.register(shutil.rmtree, directory, ignore_errors=True)
+                Simulation("benchmark", compact_pool(n)).save(os.path.join(directory, "deck.sp"))
+                return os.path.join(directory, "deck.sp")
+
+            yield "parse", n, n, write_deck, lambda path: sum(1 for _ in parse_deck(path))
+
+    for n in sizes["dataset"]:
+        # reading and writing datasets caches nothing, so their inputs are built once per size
+        @functools.lru_cache(maxsize=None)
+        def make_graphs(n=n):
+            np.random.seed(0)
+            return [Graph(f"circuit{i}") for i in range(min(n, 1000))], n
+
+        def save_packed(state):
+            graphs, n = state
+            with tempfile.TemporaryDirectory() as directory:
+                with DatasetWriter(os.path.join(directory, "dataset")) as writer:
+                    for i in range(n):
+                        writer.add_graph(graphs[i % len(graphs)], float(i))
+
+        def save_npz(state):
+            graphs, n = state
+            with tempfile.TemporaryDirectory() as directory:
+                for i in range(n):
+                    graphs[i % len(graphs)].save_adjacency_list_and_feature_matrix(os.path.join(directory, f"{i}.npz"))
+
+        yield "dataset_save", n, n, make_graphs, save_packed
+        yield "dataset_save_npz", n, n, make_graphs, save_npz
+
+        @functools.lru_cache(maxsize=None)
+        def write_both(n=n):
+            graphs, n = make_graphs(n)
+            directory = tempfile.mkdtemp()
+            atexit.register(shutil.rmtree, directory, ignore_errors=True)
+            with DatasetWriter(os.path.join(directory, "dataset")) as writer:
+                for i in range(n):
+                    writer.add_graph(graphs[i % len(graphs)], float(i))
+                    graphs[i % len(graphs)].save_adjacency_list_and_feature_matrix(os.path.join(directory, f"{i}.npz"))
+            return directory, n
+
+        def load_packed(state):
+            directory, _ = state
+            dataset = DatasetReader(os.path.join(directory, "dataset"))
+            for i in range(len(dataset)):
+                edge_index, features, label = dataset[i]
+                features.sum()
+
+        def load_npz(state):
+            directory, n = state
+            for i in range(n):
+                with np.load(os.path.join(directory, f"{i}.npz")) as data:
+                    data["feature_matrix"].sum()
+
+        yield "dataset_load", n, n, write_both, load_packed
+        yield "dataset_load_npz", n, n, write_both, load_npz
+        yield "loader", n, n, write_both, lambda state: sum(batch.num_graphs for batch in GraphLoader(
+            DatasetReader(os.path.join(state[0], "dataset")), batch_size=64, self_loops=True))
+
+
+def measure(setup, run, repeat:int):
+    """
+    Returns the best time of `repeat` runs and the peak traced memory of one more run, in bytes.
+    Every run gets a fresh `setup()`, so that nothing cached by a previous run (e.g. the feature matrix
+    of a `Circuit`) is measured, and an untimed first run warms up imports and allocators.
+    """
+    run(setup())
+    best = np.inf
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    state = setup()
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def scaling(results:list):
+    """
+    Returns the log-log slope of time over size of every benchmark with at least two sizes.
+    """
+    exponents = {}
+    for name in dict.fromkeys(result["benchmark"] for result in results):
+        points = [(result["size"], result["seconds"]) for result in results if result["benchmark"] == name and result["seconds"] > 0]
+        if len(points) >= 2:
+            sizes, seconds = np.log(np.array(points)).T
+            exponents[name] = float(np.polyfit(sizes, seconds, 1)[0])
+    return exponents
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "processor": platform.processor(), "commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(results:list, baseline:dict, threshold:float):
+    """
+    Prints the time ratio of every case against a baseline and returns the number of regressions.
+    """
+    previous = {(result["benchmark"], result["size"]): result for result in baseline["results"]}
+    regressions = 0
+    print(f"\n{'benchmark':<20}{'size':>8}{'baseline s':>14}{'now s':>12}{'ratio':>8}")
+    for result in results:
+        old = previous.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        ratio = result["seconds"] / old["seconds"] if old["seconds"] else np.inf
+        flag = "  SLOWER" if ratio > 1 + threshold else "  faster" if ratio < 1 - threshold else ""
+        regressions += ratio > 1 + threshold
+        print(f"{result['benchmark']:<20}{result['size']:>8}{old['seconds']:>14.4g}{result['seconds']:>12.4g}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="benchmarks to run, all by default")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast check")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best one is kept")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against a JSON file written by --save")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as a regression")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record the per stage timings of the package and print them (slows the runs down)")
+    args = parser.parse_args(arguments)
+
+    sizes = QUICK if args.quick else {"gates": GATE_SIZES, "circuits": CIRCUIT_COUNTS, "graphs": GRAPH_COUNTS,
+                                      "dataset": DATASET_COUNTS}
+    if args.instrument:
+        instrumentation.enable()
+    results = []
+    print(f"{'benchmark':<20}{'size':>8}{'seconds':>12}{'items/s':>14}{'peak MiB':>10}")
+    for name, size, items, setup, run in cases(sizes):
+        if args.only and name not in args.only:
+            continue
+        seconds, peak = measure(setup, run, args.repeat)
+        results.append({"benchmark": name, "size": size, "seconds": seconds,
+                        "throughput": items / seconds if seconds else None, "peak_memory_bytes": peak})
+        print(f"{name:<20}{size:>8}{seconds:>12.4g}{items / seconds:>14.4g}{peak / 2**20:>10.2f}", flush=True)
+
+    exponents = scaling(results)
+    print("\nscaling exponents (time ~ size^x)")
+    for name, exponent in exponents.items():
+        print(f"  {name:<20}{exponent:.2f}")
+    if args.instrument:
+        print("\n" + instrumentation.report())
+
+    report = {"environment": environment(), "results": results, "scaling": exponents}
+    if args.instrument:
+        report["stages"] = instrumentation.summary()
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Sparse adjacency helpers shared by `Circuit` and `CompactCircuit`.
+
+Edges are kept as a (2, E) COO edge index of (input gate number, gate number) pairs, so memory
+scales with the number of edges instead of the square of the number of gates.
+The signed variants follow `Circuit.make_adjacency_matrix`: +1 from the input gate to the gate,
+-1 from the gate back to its input gate.
+"""
+
+import numpy as np
+
+
+def unique_edge_index(source, destination):
+    """
+    Returns the unique edges as a sorted (2, E) int64 edge index.
+
+    Args:
+        source (array_like): The input gate number of every edge.
+        destination (array_like): The gate number of every edge.
+
+    Returns:
+        numpy.ndarray: The (2, E) edge index, sorted by source then destination.
+    """
+    source = np.asarray(source, dtype=np.int64)
+    destination = np.asarray(destination, dtype=np.int64)
+    if len(source) == 0:
+        return np.zeros((2, 0), dtype=np.int64)
+    return np.unique(np.stack([source, destination], axis=1), axis=0).T
+
+
+def signed_edge_index(edge_index):
+    """
+    Returns the signed directed adjacency of an edge index in COO form.
+
+    Args:
+        edge_index (numpy.ndarray): The (2, E) edge index.
+
+    Returns:
+        tuple: The (2, 2E) edge index holding every edge in both directions, sorted by row,
+               and the (2E,) values, +1 for the original direction and -1 for the reverse one.
+    """
+    both = np.concatenate([edge_index, edge_index[::-1]], axis=1)
+    values = np.concatenate([np.ones(edge_index.shape[1]), -np.ones(edge_index.shape[1])])
+    order = np.lexsort((both[1], both[0]))
+    return both[:, order], values[order]
+
+
+def edge_index_to_csr(edge_index, num_nodes:int, values = None):
+    """
+    Converts a COO edge index to compressed sparse rows.
+
+    Args:
+        edge_index (numpy.ndarray): The (2, E) edge index, rows are edge_index[0].
+        num_nodes (int): The number of nodes.
+        values (numpy.ndarray, optional): The value of every edge. Defaults to ones.
+
+    Returns:
+        tuple: indptr (num_nodes + 1,), indices (E,) and data (E,) arrays, the layout used by `scipy.sparse.csr_matrix`.
+    """
+    order = np.lexsort((edge_index[1], edge_index[0]))
+    indices = edge_index[1][order]
+    data = np.ones(len(indices)) if values is None else np.asarray(values, dtype=np.float64)[order]
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edge_index[0], minlength=num_nodes), out=indptr[1:])
+    return indptr, indices, data
@@ -1,7 +1,9 @@
 """
 The circuit class gets a name, a dictionary of gate names and their corresponding gate objects,
 a dictionary of voltage source names , and an end of sequence capacitance and sizing.
-The user will provide a topologically sorted dictionary of gate names and their corresponding gate objects.
+The gates may be given in any order as long as they form a DAG: they are topologically sorted
+(see `topology.topological_sort`), numbered 0..n-1 in that order, and cycles or unknown inputs raise
+a ValueError. Gates can drive any number of other gates.
 structure of the gates dictionary:
 {
     "gate_name": {"type": str, "k": int, "input_components": [input_gate_names or input voltage_source_names : str]}
@@ -19,7 +21,13 @@ Structure of the eos_dict dictionary:
 inverting: bool
 
 
+Specifications from outside (e.g. JSON uploads) can be checked in bulk with `validation.validate_specs`,
+which reports every problem of every circuit at once; circuits that passed it (or are generated valid by
+construction) can be built with `trusted=True`, which skips the per component `_validate_config` checks.
+
 The circuit class will generate a netlist for the circuit and write it to a file.
+Existing circuits can be edited in place with `set_k`, `set_type` and `set_eos_k`: an edit only
+invalidates the netlist fragment and feature matrix entries of the edited component.
 The circuit class will also generate a spice simulation for the circuit and write it to a file.
 example:
 circuit1 = Circuit("circuit1", 
@@ -44,8 +52,59 @@ circuit1 = Circuit("circuit1",
 import numpy as np
 
 from .voltagesource import VoltageSource
-from .gate import Gate
+from .gate import Gate, render_subckt_library
 from .eos import EndOfSequence
+from .adjacency import unique_edge_index, signed_edge_index, edge_index_to_csr
+from .topology import topological_sort
+from .transient import DEFAULT_WINDOW
+from ..instrumentation import timed
+
+NETLIST_HEADER = "/////////////////////3 STAGE NAND/////////////////////////////\n"+\
+                ".inc \"/home/lalithsai20/EMDproject/7nm_TT_160803.pm\"\n\n"
+SUPPLY_AND_OPTIONS = "\nVdd vdd 0 0.7\n" + "\n.option post\n"
+TRANSIENT_ANALYSIS = DEFAULT_WINDOW.analysis
+SIMULATION_SETTINGS = SUPPLY_AND_OPTIONS + TRANSIENT_ANALYSIS + "\n"
+# sizings are stored as int32 by CompactCircuit
+MAX_SIZING = 2 ** 31 - 1
+
+
+def _is_sizing(value):
+    """
+    Whether a value is a valid sizing: a positive integer, not a boolean, that fits an int32.
+    """
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool) and 0 < value <= MAX_SIZING
+
+
+def render_simulation_settings(window = None):
+    """
+    Renders the supply, options and transient analysis of a deck.
+
+    Args:
+        window (TransientWindow, optional): The transient analysis. Defaults to `DEFAULT_WINDOW`.
+
+    Returns:
+        str: The simulation settings.
+    """
+    if window is None or window == DEFAULT_WINDOW:
+        return SIMULATION_SETTINGS
+    return SUPPLY_AND_OPTIONS + window.analysis + "\n"
+
+
+def render_measure_statement(name:str, trigger_node:str, target_node:str, inverting:bool):
+    """
+    Renders the `.MEASURE` statement for the delay of a circuit.
+
+    Args:
+        name (str): The name of the circuit, the measurement is called `tdlay{name}`.
+        trigger_node (str): The node the measurement is triggered on (output of the first voltage source).
+        target_node (str): The node the measurement targets (input gate of the end of sequence).
+        inverting (bool): Whether the circuit is inverting, the target then falls instead of rising.
+
+    Returns:
+        str: The `.MEASURE` statement.
+    """
+    return f".MEASURE TRAN tdlay{name} TRIG V({trigger_node})"+\
+        f" VAL = 0.35 TD = 0n RISE = 1 TARG V({target_node}) VAL = 0.35  {'FALL' if inverting else 'RISE'} = 1\n"
 
 
 class Circuit:
@@ -54,19 +113,34 @@ class Circuit:
 
     Args:
         name (str): The name of the circuit.
-        gate_dict (dict): A dictionary containing gate configurations.
+        gate_dict (dict): A dictionary containing gate configurations, in any topological or non topological order.
         voltage_dict (dict): A dictionary containing voltage source configurations.
         eos_dict (dict): A dictionary containing end-of-sequence configuration.
         inverting (bool, optional): Specifies whether the circuit is inverting or not. Defaults to False.
+        trusted (bool, optional): Whether the dictionaries are known to be valid (see `validation.validate_specs`),
+            which skips the validation of every gate, voltage source and the end of sequence. Defaults to False.
+
+    Raises:
+        ValueError: If the gates form a cycle, or a gate or the end of sequence has an unknown input.
     """
     GATE_CHOICES = ["2NAND", "1NOT", "2NOR", "2AND", "2OR"]
+    TYPE_CODES = {gate_type: code for code, gate_type in enumerate(GATE_CHOICES)}
+    INVERTING_TYPES = {"1NOT", "2NAND", "2NOR"}
 
-    def __init__(self, name:str, gate_dict:dict, voltage_dict:dict, eos_dict:dict, inverting = False):
+    @timed("circuit.init")
+    def __init__(self, name:str, gate_dict:dict, voltage_dict:dict, eos_dict:dict, inverting = False, trusted:bool = False):
         self.name = name
+        self._validate = not trusted
         self.gates = {}
         self._voltage_sources = {}
         self._eos = None
-        self.netlist = ""
+        # per component netlists and feature columns, rendered or built once and patched by the edits
+        self._fragments = {}
+        self._gate_numbers = None
+        self._type_codes = None
+        self._sizes = None
+        self._feature_matrix = None
+        self._measured_path = None
         self.voltage_dict = {key + name: value for key, value in voltage_dict.copy().items()}
         self.gate_dict = {key + name: value for key, value in gate_dict.copy().items()}
         self._inverting = inverting
@@ -77,32 +151,35 @@ class Circuit:
         self.eos_dict = eos_dict.copy()
         
         self.eos_dict["input_gate"] = eos_dict["input_gate"] + name
-        
+        if self.eos_dict["input_gate"] not in self.gate_dict:
+            raise ValueError(f"Unknown input gate {eos_dict['input_gate']} of the end of sequence")
+
+        order = topological_sort({gate: params['input_components'] for gate, params in self.gate_dict.items()},
+                                 self.voltage_dict)
+        self.gate_dict = {gate: self.gate_dict[gate] for gate in order}
+        # dense gate numbers in topological order, no name parsing
+        self.gate_ids = {gate: i for i, gate in enumerate(order)}
+
         self.__generate_voltage_sources(self.voltage_dict)
         self.__generate_gates(self.gate_dict)
         self.__generate_eos(self.eos_dict)
-        self.__generate_netlist()
 
     def _get_gate_number(self, gate_name:str):
         """
-        Returns the gate number of the given gate name.
+        Returns the gate number of the given gate name: its position in topological order.
+        For the `gate1`, `gate2`, ... chains `Graph` generates this is the number in the name minus one.
 
         Args:
             gate_name (str): The name of the gate.
 
         Returns:
-            int: The gate number of the given gate name.
+            int: The gate number of the given gate name, -1 for a component of the circuit that is not a gate.
         """
-        if gate_name.endswith(self.name):
-            gate_name_minus_circuit_name = gate_name[:len(gate_name)-len(self.name)]
-        else:
+        if not gate_name.endswith(self.name):
             raise ValueError("The given gate name does not belong to this circuit.")
-        
-        if gate_name_minus_circuit_name.startswith("gate"):
-            return int(gate_name_minus_circuit_name[4:])-1
-        else:
-            return -1
-        
+        return self.gate_ids.get(gate_name, -1)
+
+    @timed("circuit.features")
     def make_feature_matrix(self):
         """
         Returns the feature matrix of the circuit.
@@ -117,53 +194,105 @@ class Circuit:
         Returns:
             numpy.ndarray: The feature matrix of the circuit.
         """
-        number_of_gates = len(self.gates)
-        number_of_features = 5
-        feature_matrix = np.zeros((number_of_gates, number_of_features))
-        for gate in self.gates.values():
-            gate_number = self._get_gate_number(gate.name)
-            type_of_gate = self.GATE_CHOICES.index(gate.type)
-            overall_input_cap = self.gates[list(self.gates.keys())[0]].k
-            overall_output_cap = self._eos.k
-            sizing_of_gate = self.gates[gate.name].k
-            feature_matrix[gate_number] = [gate_number, type_of_gate, overall_input_cap, overall_output_cap, sizing_of_gate]
-        return feature_matrix
-    
-    def make_adjacency_list(self):
+        if self._feature_matrix is None:
+            gate_numbers, type_codes, sizes, eos_k = self.feature_columns()
+            feature_matrix = np.zeros((len(gate_numbers), 5))
+            if len(gate_numbers):
+                feature_matrix[gate_numbers] = np.column_stack(
+                    [gate_numbers, type_codes, np.full(len(sizes), sizes[0]), np.full(len(sizes), eos_k), sizes])
+            self._feature_matrix = feature_matrix
+        return self._feature_matrix.copy()
+
+    def feature_columns(self):
         """
-        Returns the adjacency list of the circuit.
+        Returns the per gate columns the feature matrix is built from, in the order of `self.gates`.
 
         Returns:
-            list: The adjacency list of the circuit.
+            tuple: gate numbers, type codes (indices into `GATE_CHOICES`) and sizings as numpy arrays,
+                   and the sizing of the end of sequence.
+        """
+        if self._type_codes is None:
+            self._type_codes = np.array([self.TYPE_CODES[gate.type] for gate in self.gates.values()], dtype=np.int64)
+            self._sizes = np.array([gate.k for gate in self.gates.values()], dtype=np.int64)
+        return self.__gate_numbers(), self._type_codes.copy(), self._sizes.copy(), self._eos.k
+
+    def __gate_numbers(self):
+        """
+        Returns the gate numbers of the gates in the order of `self.gates`, computed once and cached.
+        """
+        if self._gate_numbers is None:
+            self._gate_numbers = np.array([self.gate_ids[name] for name in self.gates], dtype=np.int64)
+        return self._gate_numbers
+
+    @timed("circuit.edge_index")
+    def make_edge_index(self):
         """
-        adjacency_list = set()
-        for gate in self.gates.values():
-            gate_number = self._get_gate_number(gate.name)
+        Returns the edges between gates as a COO edge index.
+
+        Returns:
+            numpy.ndarray: The (2, E) int64 array of unique (input gate number, gate number) pairs, sorted.
+        """
+        gate_numbers = self.__gate_numbers().tolist()
+        number_of = dict(zip(self.gates, gate_numbers))
+        source, destination = [], []
+        for gate, gate_number in zip(self.gates.values(), gate_numbers):
             for input_gate in gate.input_gates:
-                input_gate_number = self._get_gate_number(input_gate.name)
+                input_gate_number = number_of.get(input_gate.name, -1)
                 if input_gate_number != -1 and gate_number != -1:
-                    adjacency_list.add((input_gate_number, gate_number))
-        adjacency_list = list(adjacency_list)
-        adjacency_list = sorted(adjacency_list, key=lambda x: x[0])
+                    source.append(input_gate_number)
+                    destination.append(gate_number)
+        return unique_edge_index(source, destination)
 
-        return adjacency_list
+    def make_adjacency_csr(self):
+        """
+        Returns the directed adjacency of the circuit in compressed sparse rows, rows being the input gates.
+
+        Returns:
+            tuple: indptr, indices and data arrays (see `adjacency.edge_index_to_csr`).
+        """
+        return edge_index_to_csr(self.make_edge_index(), len(self.gates))
+
+    def make_signed_adjacency_coo(self):
+        """
+        Returns the sparse equivalent of `make_adjacency_matrix`: 1 from input gate to gate and -1 back.
+
+        Returns:
+            tuple: The (2, 2E) edge index and the (2E,) +1/-1 values.
+        """
+        return signed_edge_index(self.make_edge_index())
+
+    def make_signed_adjacency_csr(self):
+        """
+        Returns the sparse equivalent of `make_adjacency_matrix` in compressed sparse rows.
+
+        Returns:
+            tuple: indptr, indices and data arrays, data holding the +1/-1 values.
+        """
+        edge_index, values = self.make_signed_adjacency_coo()
+        return edge_index_to_csr(edge_index, len(self.gates), values)
+
+    def make_adjacency_list(self):
+        """
+        Returns the adjacency list of the circuit.
 
+        Returns:
+            list: The adjacency list of the circuit.
+        """
+        return [tuple(edge) for edge in self.make_edge_index().T.tolist()]
+
+    @timed("circuit.adjacency_matrix")
     def make_adjacency_matrix(self):
         """
         Returns the adjacency matrix of the circuit.
+        This is dense, prefer `make_signed_adjacency_csr` for large circuits.
 
         Returns:
             numpy.ndarray: The adjacency matrix of the circuit.
         """
         num_gates = len(self.gates)
         adjacency_matrix = np.zeros((num_gates, num_gates))
-        for gate in self.gates.values():
-            gate_number = self._get_gate_number(gate.name)  # 0 indexed gate numbering
-            for input_gate in gate.input_gates:
-                input_gate_number = self._get_gate_number(input_gate.name) # 0 indexed gate numbering
-                if input_gate_number != -1 and gate_number != -1 and adjacency_matrix[gate_number][input_gate_number] == 0:
-                    adjacency_matrix[input_gate_number][gate_number] = 1
-                    adjacency_matrix[gate_number][input_gate_number] = -1
+        edge_index, values = self.make_signed_adjacency_coo()
+        adjacency_matrix[edge_index[0], edge_index[1]] = values
 
         return adjacency_matrix
     
@@ -176,7 +305,7 @@ class Circuit:
         """
         for name, params in voltage_dict.items():
             params['name'] = name
-            self._voltage_sources[name] = VoltageSource(params)
+            self._voltage_sources[name] = VoltageSource(params, self._validate)
     
     def __generate_gates(self, gate_dict):
         """
@@ -193,7 +322,7 @@ class Circuit:
                 elif input_name in self._voltage_sources:
                     input_components.append(self._voltage_sources[input_name])
             gate_config = {"name":name, "type":params['type'], "k":params['k'], "input_components":input_components}
-            self.gates[name] = Gate(gate_config)
+            self.gates[name] = Gate(gate_config, self._validate)
     
     def __generate_eos(self, eos_dict):
         """
@@ -204,61 +333,223 @@ class Circuit:
         """
         eos_dict["name"] = self.name
         eos_dict["input_gate"] = self.gates[eos_dict["input_gate"]]
-        self._eos = EndOfSequence(eos_dict)
+        self._eos = EndOfSequence(eos_dict, self._validate)
 
-    def return_netlist(self):
+    def __gate(self, gate_name:str):
         """
-        Returns the netlist of the circuit.
+        Returns the gate of the given name, with or without the circuit name suffix.
+        """
+        gate = self.gates.get(gate_name + self.name, self.gates.get(gate_name))
+        if gate is None:
+            raise ValueError(f"Unknown gate {gate_name} of circuit {self.name}")
+        return gate
+
+    def measured_path(self):
+        """
+        Returns the names of the gates the delay is measured through: back from the gate driving the end of sequence
+        through the first input of every gate, as `Graph` builds them. Computed once, the topology never changes.
 
         Returns:
-            tuple: A tuple containing the netlist and the simulation statement.
+            set: The gate names, with the circuit name suffix.
         """
-        netlist = ""
-        for voltage_source in self._voltage_sources.values():
-            netlist += voltage_source.netlist
-        for gate in self.gates.values():
-            netlist += gate.netlist
-        netlist += str(self._eos)
+        if self._measured_path is None:
+            path = set()
+            gate = self._eos.input_gate
+            while isinstance(gate, Gate) and gate.name not in path:
+                path.add(gate.name)
+                gate = gate.input_gates[0]
+            self._measured_path = path
+        return self._measured_path
+
+    def set_k(self, gate_name:str, k:int):
+        """
+        Resizes one gate in place, only its netlist and feature row are updated.
 
-        if self._inverting:
-            simulation_statement = f".MEASURE TRAN tdlay{self.name} TRIG V({self._voltage_sources[list(self._voltage_sources.keys())[0]].output_node_name})"+\
-        f" VAL = 0.35 TD = 0n RISE = 1 TARG V({self._eos.input_gate.output_node_name}) VAL = 0.35  FALL = 1\n"
-        else:
-            simulation_statement = f".MEASURE TRAN tdlay{self.name} TRIG V({self._voltage_sources[list(self._voltage_sources.keys())[0]].output_node_name})"+\
-        f" VAL = 0.35 TD = 0n RISE = 1 TARG V({self._eos.input_gate.output_node_name}) VAL = 0.35  RISE = 1\n"
+        Args:
+            gate_name (str): The name of the gate, with or without the circuit name suffix.
+            k (int): The new sizing.
 
-        
-        return netlist, simulation_statement
+        Raises:
+            ValueError: If the gate is unknown or the sizing is not a positive integer of at most `MAX_SIZING`.
+        """
+        gate = self.__gate(gate_name)
+        if not _is_sizing(k):
+            raise ValueError(f"Sizing of the gate must be a positive integer of at most {MAX_SIZING}")
+        gate.k = int(k)
+        self.gate_dict[gate.name] = {**self.gate_dict[gate.name], "k": gate.k}
+        self._fragments.pop(gate.name, None)
+        i = self.gate_ids[gate.name]
+        if self._sizes is not None:
+            self._sizes[i] = gate.k
+        if self._feature_matrix is not None:
+            self._feature_matrix[i, 4] = gate.k
+            if i == 0:
+                # the overall input cap column is the sizing of the first gate
+                self._feature_matrix[:, 2] = gate.k
+
+    def set_type(self, gate_name:str, gate_type:str):
+        """
+        Swaps the type of one gate in place for a type with as many inputs. When the gate is on the measured
+        path (see `measured_path`) and the swap changes whether it inverts, the circuit inversion flips.
 
+        Args:
+            gate_name (str): The name of the gate, with or without the circuit name suffix.
+            gate_type (str): The new type, one of `GATE_CHOICES`.
+
+        Raises:
+            ValueError: If the gate is unknown, the type is invalid or it has another number of inputs.
+        """
+        gate = self.__gate(gate_name)
+        if gate_type not in self.TYPE_CODES:
+            raise ValueError(f"Invalid gate type: {gate_type}. Valid types are: {', '.join(self.GATE_CHOICES)}")
+        if gate_type[0] != gate.type[0]:
+            raise ValueError(f"Number of input components does not match gate type. {gate_type}, {len(gate.input_gates)}")
+        if gate.name in self.measured_path() and (gate_type in self.INVERTING_TYPES) != (gate.type in self.INVERTING_TYPES):
+            self._inverting = not self._inverting
+        gate.type = gate_type
+        self.gate_dict[gate.name] = {**self.gate_dict[gate.name], "type": gate_type}
+        self._fragments.pop(gate.name, None)
+        i = self.gate_ids[gate.name]
+        if self._type_codes is not None:
+            self._type_codes[i] = self.TYPE_CODES[gate_type]
+        if self._feature_matrix is not None:
+            self._feature_matrix[i, 1] = self.TYPE_CODES[gate_type]
+
+    def set_eos_k(self, k:int):
+        """
+        Resizes the end of sequence in place.
 
-    def __generate_netlist(self):
+        Args:
+            k (int): The new sizing.
+
+        Raises:
+            ValueError: If the sizing is not a positive integer of at most `MAX_SIZING`.
+        """
+        if not _is_sizing(k):
+            raise ValueError(f"Sizing of the end of sequence must be a positive integer of at most {MAX_SIZING}")
+        self._eos.k = self._eos.eos.k = self.eos_dict["k"] = int(k)
+        self._fragments.pop(self._eos.name, None)
+        if self._feature_matrix is not None:
+            self._feature_matrix[:, 3] = self._eos.k
+
+    def canonical_hash(self):
         """
-        Generates the netlist of the circuit.
+        Returns a structural hash of the circuit that does not depend on its name or on the node names,
+        see `CompactCircuit.canonical_hash`.
 
         Returns:
-            str: The generated netlist.
+            str: The hexadecimal SHA-256 digest.
         """
-        self.netlist = f"/////////////////////3 STAGE NAND/////////////////////////////\n"+\
-                ".inc \"/home/lalithsai20/EMDproject/7nm_TT_160803.pm\"\n\n"
-        self.netlist += self.return_netlist()[0]
-        self.netlist += "\nVdd vdd 0 0.7\n"
-        self.netlist += f"\n.option post\n"+\
-                        ".tran 1p 2u\n"
-        self.netlist += self.return_netlist()[1]
-        self.netlist += ".end\n"
-        return self.netlist
+        from .compact import CompactCircuit
+        return CompactCircuit.from_circuit(self).canonical_hash()
+
+    def iter_components(self, hierarchical:bool = False, window = None):
+        """
+        Yields the netlist of every voltage source, gate and of the end of sequence, each rendered once.
+
+        Args:
+            hierarchical (bool, optional): Whether to render the gates, drivers and end of sequence as instances
+                of the `.SUBCKT`s of `render_subckt_library`. Defaults to False.
+            window (TransientWindow, optional): The stimulus timing of the voltage sources. Defaults to `DEFAULT_WINDOW`.
+
+        Yields:
+            str: The netlist of one component.
+        """
+        custom_window = window is not None and window != DEFAULT_WINDOW
+        if hierarchical:
+            for voltage_source in self._voltage_sources.values():
+                yield voltage_source.render(hierarchical, window)
+            for gate in self.gates.values():
+                yield gate.render(hierarchical)
+            yield self._eos.render(hierarchical)
+            return
+
+        fragments = self._fragments
+        if custom_window:
+            # the cached fragments hold the default stimulus
+            for voltage_source in self._voltage_sources.values():
+                yield voltage_source.render(window=window)
+        components = self.gates.values() if custom_window else (*self._voltage_sources.values(), *self.gates.values())
+        for component in (*components, self._eos):
+            fragment = fragments.get(component.name)
+            if fragment is None:
+                fragment = fragments[component.name] = component.netlist
+            yield fragment
+
+    def measure_statement(self):
+        """
+        Returns the `.MEASURE` statement of the delay of the circuit.
+
+        Returns:
+            str: The simulation statement.
+        """
+        return render_measure_statement(self.name, next(iter(self._voltage_sources.values())).output_node_name,
+                                        self._eos.input_gate.output_node_name, self._inverting)
+
+    def return_netlist(self, hierarchical:bool = False, window = None):
+        """
+        Returns the netlist of the circuit.
+
+        Args:
+            hierarchical (bool, optional): Whether to render `.SUBCKT` instances, see `iter_components`. Defaults to False.
+            window (TransientWindow, optional): The stimulus timing, see `iter_components`. Defaults to `DEFAULT_WINDOW`.
+
+        Returns:
+            tuple: A tuple containing the netlist and the simulation statement.
+        """
+        return "".join(self.iter_components(hierarchical, window)), self.measure_statement()
+
+    def iter_netlist(self, hierarchical:bool = False, window = None):
+        """
+        Yields the simulation deck of the circuit chunk by chunk, without building it in memory.
+
+        Args:
+            hierarchical (bool, optional): Whether to define the gate types once as `.SUBCKT`s and render
+                instances of them, see `iter_components`. Defaults to False.
+            window (TransientWindow, optional): The stimulus and transient analysis. Defaults to `DEFAULT_WINDOW`.
+
+        Yields:
+            str: The next chunk of the netlist.
+        """
+        yield NETLIST_HEADER
+        if hierarchical:
+            yield render_subckt_library()
+        yield from self.iter_components(hierarchical, window)
+        yield render_simulation_settings(window)
+        yield self.measure_statement()
+        yield ".end\n"
+
+    @property
+    def netlist(self):
+        """
+        The simulation deck of the circuit. The component netlists are rendered on first access and cached,
+        edits only re-render the edited component.
+        """
+        return "".join(self.iter_netlist())
     
     def __repr__(self):
-        return self.__generate_netlist()
+        return "".join(self.iter_netlist())
 
-    def save_circuit_to_file(self, file_path:str):
+    @timed("circuit.write")
+    def write(self, file, hierarchical:bool = False, window = None):
+        """
+        Writes the circuit netlist incrementally to an open text file.
+
+        Args:
+            file: The file handle to write to.
+            hierarchical (bool, optional): Whether to write a `.SUBCKT` based netlist. Defaults to False.
+            window (TransientWindow, optional): The stimulus and transient analysis. Defaults to `DEFAULT_WINDOW`.
+        """
+        file.writelines(self.iter_netlist(hierarchical, window))
+
+    def save_circuit_to_file(self, file_path:str, hierarchical:bool = False, window = None):
         """
         Saves the circuit netlist to a file.
 
         Args:
             file_path (str): The path of the file to save the netlist.
+            hierarchical (bool, optional): Whether to save a `.SUBCKT` based netlist. Defaults to False.
+            window (TransientWindow, optional): The stimulus and transient analysis. Defaults to `DEFAULT_WINDOW`.
         """
         with open(file_path, "w") as file:
-            file.write(self.netlist)
-
-
+            self.write(file, hierarchical, window)
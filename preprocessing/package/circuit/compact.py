@@ -0,0 +1,438 @@
+"""
+Columnar, array backed representation of a circuit.
+
+A `Circuit` holds one `Gate` object per node, each with its own config dict, list of inputs and
+rendered netlist. `CompactCircuit` stores the same information in a handful of NumPy arrays:
+    types       gate type codes, indices into `Circuit.GATE_CHOICES`
+    k           sizing of every gate
+    fanin_ptr   CSR row pointers, the inputs of gate i are fanin_idx[fanin_ptr[i]:fanin_ptr[i+1]]
+    fanin_idx   index of the gate driving each input, or -(j+1) for voltage source j
+Gates are numbered by their position, which for the `gate1`, `gate2`, ... names used by `Graph`
+is the same numbering `Circuit` derives from the gate names.
+example:
+compact = CompactCircuit.from_dicts("circuit1",
+                    {
+                        "gate1": {"type":"2NOR", "k":2, "input_components":["v1", "v2"]},
+                        "gate2": {"type":"1NOT", "k":10, "input_components":["gate1"]}
+                    },
+                    {
+                        "v1": { "ideal": False, "k": 1},
+                        "v2": { "ideal": False, "k": 1}
+                    },
+                    {
+                        "k": 1,
+                        "input_gate": "gate2",
+                        "capacitance": 9
+                    },
+                    inverting=False
+                    )
+compact.make_feature_matrix()
+circuit = compact.to_circuit()
+"""
+
+import hashlib
+
+import numpy as np
+
+from .circuit import Circuit, NETLIST_HEADER, render_simulation_settings, render_measure_statement
+from .gate import render_gate_netlist, render_gate_instance, render_subckt_library
+from .voltagesource import render_voltage_source_netlist
+from .eos import render_eos_netlist
+from .adjacency import unique_edge_index, signed_edge_index, edge_index_to_csr
+from .topology import topological_sort
+
+
+class CompactCircuit:
+    """
+    Represents a circuit as flat NumPy arrays instead of per-gate objects.
+
+    Args:
+        name (str): The name of the circuit, appended to every node name in the netlist like `Circuit` does.
+        types (array_like): Gate type codes, indices into `GATE_CHOICES`.
+        k (array_like): Sizing of every gate.
+        fanin_ptr (array_like): CSR row pointers into `fanin_idx`, of length `len(types) + 1`.
+        fanin_idx (array_like): Index of the gate driving each input, or `-(j + 1)` for voltage source `j`.
+        source_ideal (array_like): Whether every voltage source is ideal.
+        source_k (array_like): Sizing of the driver of every voltage source (ignored for ideal sources).
+        eos_k (int): Sizing of the end of sequence.
+        eos_gate (int): Index of the gate driving the end of sequence.
+        eos_capacitance (float, optional): The end of sequence capacitance. Defaults to 10.
+        inverting (bool, optional): Specifies whether the circuit is inverting or not. Defaults to False.
+        gate_names (list, optional): Names of the gates. Defaults to `gate1`, `gate2`, ...
+        source_names (list, optional): Names of the voltage sources. Defaults to `v1`, `v2`, ...
+    """
+    GATE_CHOICES = Circuit.GATE_CHOICES
+    ARITY = np.array([int(gate_type[0]) for gate_type in GATE_CHOICES], dtype=np.int32)
+
+    def __init__(self, name:str, types, k, fanin_ptr, fanin_idx, source_ideal, source_k, eos_k:int, eos_gate:int,
+                 eos_capacitance = 10, inverting = False, gate_names:list = None, source_names:list = None):
+        self.name = name
+        self.types = np.asarray(types, dtype=np.uint8)
+        self.k = np.asarray(k, dtype=np.int32)
+        self.fanin_ptr = np.asarray(fanin_ptr, dtype=np.int32)
+        self.fanin_idx = np.asarray(fanin_idx, dtype=np.int32)
+        self.source_ideal = np.asarray(source_ideal, dtype=bool)
+        self.source_k = np.asarray(source_k, dtype=np.int32)
+        self.eos_k = int(eos_k)
+        self.eos_gate = int(eos_gate)
+        self.eos_capacitance = eos_capacitance
+        self.inverting = inverting
+        self.gate_names = gate_names
+        self.source_names = source_names
+
+        if len(self.fanin_ptr) != len(self.types) + 1:
+            raise ValueError("fanin_ptr must have one entry more than there are gates")
+        if not np.array_equal(np.diff(self.fanin_ptr), self.ARITY[self.types]):
+            raise ValueError("Number of input components does not match gate type")
+
+    @classmethod
+    def from_dicts(cls, name:str, gate_dict:dict, voltage_dict:dict, eos_dict:dict, inverting = False):
+        """
+        Builds a compact circuit straight from the dictionaries documented in `circuit.py`,
+        without creating any `Gate` objects. The dictionaries are not modified.
+
+        Args:
+            name (str): The name of the circuit.
+            gate_dict (dict): A dictionary containing gate configurations, sorted topologically like `Circuit` does.
+            voltage_dict (dict): A dictionary containing voltage source configurations.
+            eos_dict (dict): A dictionary containing end-of-sequence configuration.
+            inverting (bool, optional): Specifies whether the circuit is inverting or not. Defaults to False.
+
+        Raises:
+            ValueError: If a gate type is invalid, a gate or the end of sequence has an unknown input or the gates
+                form a cycle.
+
+        Returns:
+            CompactCircuit: The compact circuit.
+        """
+        type_codes = Circuit.TYPE_CODES
+        if eos_dict['input_gate'] not in gate_dict:
+            raise ValueError(f"Unknown input gate {eos_dict['input_gate']} of the end of sequence")
+        source_names = list(voltage_dict.keys())
+        index = {source: -(j + 1) for j, source in enumerate(source_names)}
+        gate_names = topological_sort({gate: params['input_components'] for gate, params in gate_dict.items()}, index)
+        types, k, fanin_ptr, fanin_idx = [], [], [0], []
+        for i, gate_name in enumerate(gate_names):
+            params = gate_dict[gate_name]
+            if params['type'] not in type_codes:
+                raise ValueError(f"Invalid gate type: {params['type']}. Valid types are: {', '.join(cls.GATE_CHOICES)}")
+            for input_name in params['input_components']:
+                if input_name not in index:
+                    raise ValueError(f"Unknown input component {input_name} of gate {gate_name}")
+                fanin_idx.append(index[input_name])
+            index[gate_name] = i
+            types.append(type_codes[params['type']])
+            k.append(params['k'])
+            fanin_ptr.append(len(fanin_idx))
+
+        return cls(name, types, k, fanin_ptr, fanin_idx,
+                   [voltage_dict[source]['ideal'] for source in source_names],
+                   [voltage_dict[source].get('k', 0) for source in source_names],
+                   eos_dict['k'], index[eos_dict['input_gate']], eos_dict['capacitance'], inverting,
+                   cls.__compress_names(gate_names, "gate"), cls.__compress_names(source_names, "v"))
+
+    @classmethod
+    def from_circuit(cls, circuit:Circuit):
+        """
+        Builds a compact circuit from an existing `Circuit`.
+
+        Args:
+            circuit (Circuit): The circuit to convert.
+
+        Returns:
+            CompactCircuit: The compact circuit, with the circuit name suffix stripped from the node names.
+        """
+        suffix = len(circuit.name)
+        gate_names = [name[:len(name) - suffix] for name in circuit.gates]
+        source_names = [name[:len(name) - suffix] for name in circuit._voltage_sources]
+        index = {name: -(j + 1) for j, name in enumerate(circuit._voltage_sources)}
+        index.update({name: i for i, name in enumerate(circuit.gates)})
+        type_codes = Circuit.TYPE_CODES
+        fanin_ptr, fanin_idx = [0], []
+        for gate in circuit.gates.values():
+            fanin_idx.extend(index[input_gate.name] for input_gate in gate.input_gates)
+            fanin_ptr.append(len(fanin_idx))
+
+        sources = circuit._voltage_sources.values()
+        return cls(circuit.name,
+                   [type_codes[gate.type] for gate in circuit.gates.values()],
+                   [gate.k for gate in circuit.gates.values()],
+                   fanin_ptr, fanin_idx,
+                   [source.input_config['ideal'] for source in sources],
+                   [source.input_config.get('k', 0) for source in sources],
+                   circuit._eos.k, index[circuit._eos.input_gate.name], circuit._eos.capacitance, circuit._inverting,
+                   cls.__compress_names(gate_names, "gate"), cls.__compress_names(source_names, "v"))
+
+    @staticmethod
+    def __compress_names(names:list, prefix:str):
+        """
+        Returns `None` when the names are the default `{prefix}1`, `{prefix}2`, ... so they need not be stored.
+        """
+        return None if names == [f"{prefix}{i+1}" for i in range(len(names))] else names
+
+    def gate_name(self, i:int):
+        """
+        Returns the name of gate `i`, without the circuit name suffix.
+        """
+        return f"gate{i+1}" if self.gate_names is None else self.gate_names[i]
+
+    def source_name(self, j:int):
+        """
+        Returns the name of voltage source `j`, without the circuit name suffix.
+        """
+        return f"v{j+1}" if self.source_names is None else self.source_names[j]
+
+    def __len__(self):
+        return len(self.types)
+
+    def canonical_hash(self):
+        """
+        Returns a hash of everything that determines the simulated delay of the circuit: gate types, sizings,
+        connectivity, voltage sources, end of sequence and inversion. The circuit name and the gate and
+        voltage source names are left out, so identical circuits hash equally however they are named.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256(b"CompactCircuit/1")
+        source_k = np.where(self.source_ideal, 0, self.source_k)
+        digest.update(np.array([len(self.types), len(self.fanin_idx), len(self.source_ideal)], dtype=np.int64).tobytes())
+        for array in (self.types, self.k, self.fanin_ptr, self.fanin_idx, self.source_ideal, source_k):
+            digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+        digest.update(repr((self.eos_k, self.eos_gate, float(self.eos_capacitance), bool(self.inverting))).encode())
+        return digest.hexdigest()
+
+    def to_dicts(self):
+        """
+        Returns the dictionaries documented in `circuit.py` describing this circuit.
+
+        Returns:
+            tuple: gate_dict, voltage_dict and eos_dict.
+        """
+        def component_name(idx):
+            return self.gate_name(idx) if idx >= 0 else self.source_name(-idx - 1)
+
+        gate_dict = {}
+        for i in range(len(self.types)):
+            inputs = self.fanin_idx[self.fanin_ptr[i]:self.fanin_ptr[i+1]]
+            gate_dict[self.gate_name(i)] = {"type": self.GATE_CHOICES[self.types[i]], "k": int(self.k[i]),
+                                            "input_components": [component_name(int(idx)) for idx in inputs]}
+        voltage_dict = {}
+        for j in range(len(self.source_ideal)):
+            ideal = bool(self.source_ideal[j])
+            voltage_dict[self.source_name(j)] = {"ideal": True} if ideal else {"ideal": False, "k": int(self.source_k[j])}
+        eos_dict = {"k": self.eos_k, "input_gate": self.gate_name(self.eos_gate), "capacitance": self.eos_capacitance}
+        return gate_dict, voltage_dict, eos_dict
+
+    def to_circuit(self):
+        """
+        Builds the equivalent `Circuit`.
+
+        Returns:
+            Circuit: The circuit.
+        """
+        gate_dict, voltage_dict, eos_dict = self.to_dicts()
+        return Circuit(self.name, gate_dict, voltage_dict, eos_dict, self.inverting)
+
+    def make_feature_matrix(self):
+        """
+        Returns the feature matrix of the circuit, identical to `Circuit.make_feature_matrix`:
+        [gate_number, type_of_gate, overall_input_cap, overall_output_cap, sizing_of_gate] per gate.
+
+        Returns:
+            numpy.ndarray: The feature matrix of the circuit.
+        """
+        number_of_gates = len(self.types)
+        feature_matrix = np.empty((number_of_gates, 5))
+        feature_matrix[:, 0] = np.arange(number_of_gates)
+        feature_matrix[:, 1] = self.types
+        feature_matrix[:, 2] = self.k[0] if number_of_gates else 0
+        feature_matrix[:, 3] = self.eos_k
+        feature_matrix[:, 4] = self.k
+        return feature_matrix
+
+    def feature_columns(self):
+        """
+        Returns the per gate columns the feature matrix is built from, see `Circuit.feature_columns`.
+
+        Returns:
+            tuple: gate numbers, type codes and sizings as numpy arrays, and the sizing of the end of sequence.
+        """
+        return np.arange(len(self.types)), self.types, self.k, self.eos_k
+
+    def make_edge_index(self):
+        """
+        Returns the edges between gates as a COO edge index, see `Circuit.make_edge_index`.
+
+        Returns:
+            numpy.ndarray: The (2, E) int64 array of unique (input gate number, gate number) pairs, sorted.
+        """
+        destination = np.repeat(np.arange(len(self.types)), np.diff(self.fanin_ptr))
+        mask = self.fanin_idx >= 0
+        return unique_edge_index(self.fanin_idx[mask], destination[mask])
+
+    def make_adjacency_csr(self):
+        """
+        Returns the directed adjacency of the circuit in compressed sparse rows, rows being the input gates.
+
+        Returns:
+            tuple: indptr, indices and data arrays (see `adjacency.edge_index_to_csr`).
+        """
+        return edge_index_to_csr(self.make_edge_index(), len(self.types))
+
+    def make_signed_adjacency_coo(self):
+        """
+        Returns the sparse equivalent of `make_adjacency_matrix`: 1 from input gate to gate and -1 back.
+
+        Returns:
+            tuple: The (2, 2E) edge index and the (2E,) +1/-1 values.
+        """
+        return signed_edge_index(self.make_edge_index())
+
+    def make_signed_adjacency_csr(self):
+        """
+        Returns the sparse equivalent of `make_adjacency_matrix` in compressed sparse rows.
+
+        Returns:
+            tuple: indptr, indices and data arrays, data holding the +1/-1 values.
+        """
+        edge_index, values = self.make_signed_adjacency_coo()
+        return edge_index_to_csr(edge_index, len(self.types), values)
+
+    def make_adjacency_list(self):
+        """
+        Returns the adjacency list of the circuit.
+
+        Returns:
+            list: The (input gate number, gate number) pairs, sorted.
+        """
+        return [tuple(edge) for edge in self.make_edge_index().T.tolist()]
+
+    def make_adjacency_matrix(self):
+        """
+        Returns the adjacency matrix of the circuit, 1 from input gate to gate and -1 back.
+        This is dense, prefer `make_signed_adjacency_csr` for large circuits.
+
+        Returns:
+            numpy.ndarray: The adjacency matrix of the circuit.
+        """
+        num_gates = len(self.types)
+        adjacency_matrix = np.zeros((num_gates, num_gates))
+        edge_index, values = self.make_signed_adjacency_coo()
+        adjacency_matrix[edge_index[0], edge_index[1]] = values
+        return adjacency_matrix
+
+    def _source_node(self, j:int):
+        """
+        Returns the node voltage source `j` drives: its driver output, or the source itself when ideal.
+        """
+        source = self.source_name(j) + self.name
+        return source if self.source_ideal[j] else f"out_{source}driver"
+
+    def _gate_node(self, i:int):
+        """
+        Returns the output node of gate `i`.
+        """
+        return f"out_{self.gate_name(i)}{self.name}"
+
+    def iter_components(self, k_params:list = None, hierarchical:bool = False, window = None):
+        """
+        Yields the netlist of every voltage source, gate and of the end of sequence, identical to `Circuit.iter_components`.
+
+        Args:
+            k_params (list, optional): Names of `.PARAM`s holding the sizing of every gate, rendered as
+                `nfin = 'param*multiplier'` expressions instead of the sizings in `k`. Defaults to None.
+            hierarchical (bool, optional): Whether to render `.SUBCKT` instances, see `Circuit.iter_components`.
+                Defaults to False.
+            window (TransientWindow, optional): The stimulus timing of the voltage sources. Defaults to `DEFAULT_WINDOW`.
+
+        Yields:
+            str: The netlist of one component.
+        """
+        name = self.name
+        render = render_gate_instance if hierarchical else render_gate_netlist
+        for j in range(len(self.source_ideal)):
+            source = self.source_name(j) + name
+            if self.source_ideal[j]:
+                yield render_voltage_source_netlist(source, window=window)
+            else:
+                yield render_voltage_source_netlist(source, render(source + "driver", "1NOT", int(self.source_k[j]), [source]),
+                                                    window)
+
+        source_nodes = [self._source_node(j) for j in range(len(self.source_ideal))]
+        gate_nodes = [self._gate_node(i) for i in range(len(self.types))]
+        fanin_idx = self.fanin_idx.tolist()
+        fanin_ptr = self.fanin_ptr.tolist()
+        sizings = self.k.tolist() if k_params is None else k_params
+        for i, (gate_type, k) in enumerate(zip(self.types.tolist(), sizings)):
+            inputs = [gate_nodes[idx] if idx >= 0 else source_nodes[-idx - 1] for idx in fanin_idx[fanin_ptr[i]:fanin_ptr[i+1]]]
+            yield render(self.gate_name(i) + name, self.GATE_CHOICES[gate_type], k, inputs)
+
+        eos_netlist = render(f"{name}EOS", "1NOT", self.eos_k, [gate_nodes[self.eos_gate]])
+        yield render_eos_netlist(name, eos_netlist, self.eos_capacitance)
+
+    def measure_statement(self):
+        """
+        Returns the `.MEASURE` statement of the delay of the circuit.
+
+        Returns:
+            str: The simulation statement.
+        """
+        return render_measure_statement(self.name, self._source_node(0), self._gate_node(self.eos_gate), self.inverting)
+
+    def return_netlist(self, hierarchical:bool = False, window = None):
+        """
+        Returns the netlist of the circuit, identical to `Circuit.return_netlist`.
+
+        Returns:
+            tuple: A tuple containing the netlist and the simulation statement.
+        """
+        return "".join(self.iter_components(hierarchical=hierarchical, window=window)), self.measure_statement()
+
+    def iter_netlist(self, hierarchical:bool = False, window = None):
+        """
+        Yields the simulation deck of the circuit chunk by chunk, see `Circuit.iter_netlist`.
+
+        Yields:
+            str: The next chunk of the netlist.
+        """
+        yield NETLIST_HEADER
+        if hierarchical:
+            yield render_subckt_library()
+        yield from self.iter_components(hierarchical=hierarchical, window=window)
+        yield render_simulation_settings(window)
+        yield self.measure_statement()
+        yield ".end\n"
+
+    @property
+    def netlist(self):
+        """
+        The full simulation deck of the circuit, identical to `Circuit.netlist`.
+        """
+        return "".join(self.iter_netlist())
+
+    def write(self, file, hierarchical:bool = False, window = None):
+        """
+        Writes the circuit netlist incrementally to an open text file.
+
+        Args:
+            file: The file handle to write to.
+            hierarchical (bool, optional): Whether to write a `.SUBCKT` based netlist. Defaults to False.
+            window (TransientWindow, optional): The stimulus and transient analysis. Defaults to `DEFAULT_WINDOW`.
+        """
+        file.writelines(self.iter_netlist(hierarchical, window))
+
+    def save_circuit_to_file(self, file_path:str, hierarchical:bool = False, window = None):
+        """
+        Saves the circuit netlist to a file.
+
+        Args:
+            file_path (str): The path of the file to save the netlist.
+            hierarchical (bool, optional): Whether to save a `.SUBCKT` based netlist. Defaults to False.
+            window (TransientWindow, optional): The stimulus and transient analysis. Defaults to `DEFAULT_WINDOW`.
+        """
+        with open(file_path, "w") as file:
+            self.write(file, hierarchical, window)
+
+    def __repr__(self):
+        return self.netlist
@@ -1,8 +1,24 @@
 from .gate import Gate
+from ..instrumentation import timed
+
+
+def render_eos_netlist(name:str, eos_netlist:str, capacitance):
+    """
+    Renders the end of sequence: its inverter followed by the load capacitance.
+
+    Args:
+        name (str): The name of the circuit the end of sequence belongs to.
+        eos_netlist (str): The netlist of the end of sequence inverter, named `{name}EOS`.
+        capacitance (float or int): The load capacitance in fF.
+
+    Returns:
+        str: The netlist of the end of sequence.
+    """
+    return eos_netlist + f"C{name}eos out_{name}EOS 0 {capacitance}f\n"
 
 
 class EndOfSequence:
-    def __init__(self, config:dict = {}):
+    def __init__(self, config:dict = {}, validate:bool = True):
         """
         Initializes an EndOfSequence object with the given configuration.
 
@@ -13,19 +29,39 @@ class EndOfSequence:
                 - 'name' (str): The name of the EndOfSequence object.
                 - 'input_gate' (Gate): The input gate object.
                 - 'capacitance' (float or int): The capacitance value.
+            validate (bool, optional): Whether to validate the configuration. Defaults to True.
         
         Raises:
             ValueError: If any of the required keys are missing or if the values have incorrect types.
         """
-        self._validate_config(config)
+        if validate:
+            self._validate_config(config)
         self.k = config['k']
         self.name = config['name']
         self.input_gate = config['input_gate']
         self.capacitance = config['capacitance']
         gate_config = {"name":f"{self.name}EOS", "type":"1NOT", "k":config['k'], "input_components":[config['input_gate']]}
-        self.eos = Gate(gate_config)
-        self.netlist = self.__generate_netlist()
+        self.eos = Gate(gate_config, validate)
+
+    @property
+    def netlist(self):
+        """
+        The netlist of the end of sequence, rendered whenever it is accessed.
+        """
+        return self.__generate_netlist()
     
+    def render(self, hierarchical:bool = False):
+        """
+        Renders the end of sequence, with its inverter as transistors or as one `.SUBCKT` instance.
+
+        Args:
+            hierarchical (bool, optional): Whether to render the inverter as a `.SUBCKT` instance. Defaults to False.
+
+        Returns:
+            str: The netlist of the end of sequence.
+        """
+        return render_eos_netlist(self.name, self.eos.render(hierarchical), self.capacitance)
+
     def __generate_netlist(self):
         """
         Generates the netlist for the EndOfSequence object.
@@ -33,7 +69,7 @@ class EndOfSequence:
         Returns:
             str: The generated netlist string.
         """
-        return self.eos.netlist + f"C{self.name}eos {self.eos.output_node_name} 0 {self.capacitance}f\n"
+        return render_eos_netlist(self.name, self.eos.netlist, self.capacitance)
     
     def __repr__(self):
         """
@@ -44,6 +80,7 @@ class EndOfSequence:
         """
         return self.__generate_netlist()
     
+    @timed("eos.validate")
     def _validate_config(self, config):
         """
         Validates the configuration parameters for the EndOfSequence object.
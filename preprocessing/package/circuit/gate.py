@@ -1,3 +1,131 @@
+"""
+Transistor level description of the gates.
+
+`TRANSISTOR_TEMPLATES` lists, per gate type, the transistors of one instance as
+(drain, gate, source, bulk, model, fin multiplier) tuples. The terminals are symbolic:
+"out" is the output node of the gate, "in0"/"in1" are its inputs, "mid" the internal
+series node, "int" the internal node of the non-inverting gates and "vdd"/"0" the rails.
+Every transistor gets `nfin = int(k * multiplier)`, or the expression `nfin = 'k*multiplier'` when k is
+the name of a `.PARAM` (see `simulation/sweep.py`).
+Hierarchical netlists define every type once as a `.SUBCKT` with ports (in0 [in1] out vdd) and a
+parameter k (`render_subckt_library`), and emit one `X` instance line per gate (`render_gate_instance`).
+"""
+
+from ..instrumentation import timed
+
+TRANSISTOR_TEMPLATES = {
+    "2NAND": (
+        ("out", "in0", "vdd", "vdd", "pmos_lvt", 3),
+        ("out", "in1", "vdd", "vdd", "pmos_lvt", 3),
+        ("out", "in0", "mid", "0", "nmos_lvt", 4),
+        ("mid", "in1", "0", "0", "nmos_lvt", 4),
+    ),
+    "1NOT": (
+        ("out", "in0", "vdd", "vdd", "pmos_lvt", 3),
+        ("out", "in0", "0", "0", "nmos_lvt", 2),
+    ),
+    "2NOR": (
+        ("out", "in0", "mid", "vdd", "pmos_lvt", 6),
+        ("mid", "in1", "vdd", "vdd", "pmos_lvt", 6),
+        ("out", "in0", "0", "0", "nmos_lvt", 2),
+        ("out", "in1", "0", "0", "nmos_lvt", 2),
+    ),
+    "2AND": (
+        ("int", "in0", "vdd", "vdd", "pmos_lvt", 3),
+        ("int", "in1", "vdd", "vdd", "pmos_lvt", 3),
+        ("int", "in0", "mid", "0", "nmos_lvt", 4),
+        ("mid", "in1", "0", "0", "nmos_lvt", 4),
+        ("out", "int", "0", "0", "nmos_lvt", 2),
+        ("out", "int", "vdd", "vdd", "pmos_lvt", 3),
+    ),
+    "2OR": (
+        ("int", "in0", "mid", "vdd", "pmos_lvt", 6),
+        ("mid", "in1", "vdd", "vdd", "pmos_lvt", 6),
+        ("int", "in0", "0", "0", "nmos_lvt", 2),
+        ("int", "in1", "0", "0", "nmos_lvt", 2),
+        ("out", "int", "0", "0", "nmos_lvt", 2),
+        ("out", "int", "vdd", "vdd", "pmos_lvt", 3),
+    ),
+}
+
+
+SUBCKT_NAMES = {"2NAND": "nand2", "1NOT": "inv", "2NOR": "nor2", "2AND": "and2", "2OR": "or2"}
+
+
+@timed("netlist.gate")
+def render_gate_netlist(name:str, gate_type:str, k:int, input_nodes:list):
+    """
+    Renders the transistors of one gate instance.
+
+    Args:
+        name (str): The name of the gate.
+        gate_type (str): The type of the gate, a key of `TRANSISTOR_TEMPLATES`.
+        k (int or str): The sizing of the gate, or the name of the parameter holding it.
+        input_nodes (list): The names of the nodes driving the inputs of the gate.
+
+    Returns:
+        str: The netlist of the gate.
+    """
+    output_node_name = f"out_{name}"
+    nodes = {"out": output_node_name, "mid": f"{name}mid", "int": f"{output_node_name}intermediate", "vdd": "vdd", "0": "0"}
+    for i, input_node in enumerate(input_nodes):
+        nodes[f"in{i}"] = input_node
+    if isinstance(k, str):
+        return "".join(
+            f"M{name}m{i} {nodes[drain]} {nodes[gate]} {nodes[source]} {nodes[bulk]} {model} nfin = '{k}*{multiplier}'\n"
+            for i, (drain, gate, source, bulk, model, multiplier) in enumerate(TRANSISTOR_TEMPLATES[gate_type])
+        ) + "\n"
+    return "".join(
+        f"M{name}m{i} {nodes[drain]} {nodes[gate]} {nodes[source]} {nodes[bulk]} {model} nfin = {int(k * multiplier)}\n"
+        for i, (drain, gate, source, bulk, model, multiplier) in enumerate(TRANSISTOR_TEMPLATES[gate_type])
+    ) + "\n"
+
+
+def render_gate_subckt(gate_type:str):
+    """
+    Renders the `.SUBCKT` definition of a gate type, sized by its parameter k.
+
+    Args:
+        gate_type (str): The type of the gate, a key of `TRANSISTOR_TEMPLATES`.
+
+    Returns:
+        str: The subcircuit definition.
+    """
+    ports = [f"in{i}" for i in range(int(gate_type[0]))] + ["out", "vdd"]
+    body = "".join(
+        f"M{i} {drain} {gate} {source} {bulk} {model} nfin = 'k*{multiplier}'\n"
+        for i, (drain, gate, source, bulk, model, multiplier) in enumerate(TRANSISTOR_TEMPLATES[gate_type])
+    )
+    return f".SUBCKT {SUBCKT_NAMES[gate_type]} {' '.join(ports)} k=1\n" + body + f".ENDS {SUBCKT_NAMES[gate_type]}\n\n"
+
+
+def render_subckt_library():
+    """
+    Renders the `.SUBCKT` definitions of all gate types, emitted once at the top of hierarchical netlists.
+
+    Returns:
+        str: The subcircuit definitions.
+    """
+    return "".join(render_gate_subckt(gate_type) for gate_type in TRANSISTOR_TEMPLATES)
+
+
+def render_gate_instance(name:str, gate_type:str, k:int, input_nodes:list):
+    """
+    Renders one gate as an instance of its `.SUBCKT`, the hierarchical counterpart of `render_gate_netlist`.
+
+    Args:
+        name (str): The name of the gate.
+        gate_type (str): The type of the gate, a key of `SUBCKT_NAMES`.
+        k (int or str): The sizing of the gate, or the name of the parameter holding it.
+        input_nodes (list): The names of the nodes driving the inputs of the gate.
+
+    Returns:
+        str: The instance line of the gate.
+    """
+    k = f"'{k}'" if isinstance(k, str) else int(k)
+    return f"X{name} {' '.join(input_nodes)} out_{name} vdd {SUBCKT_NAMES[gate_type]} k={k}\n"
+
+
 class Gate:
     """
     Represents a gate in a circuit.
@@ -13,7 +141,7 @@ class Gate:
         netlist (str): The generated netlist for the gate.
 
     Methods:
-        __init__(self, config: dict = {}): Initializes a Gate object with the given configuration.
+        __init__(self, config: dict = {}, validate: bool = True): Initializes a Gate object with the given configuration.
         __generate_netlist(self): Generates the netlist for the gate based on its type.
         __repr__(self): Returns the generated netlist for the gate.
         _validate_config(self, config: dict): Validates the configuration of the gate.
@@ -22,28 +150,53 @@ class Gate:
 
     VALID_TYPES = {"2AND", "2OR", "1NOT", "2NAND", "2NOR"}
 
-    def __init__(self, config: dict = {}):
+    def __init__(self, config: dict = {}, validate:bool = True):
         """
         Initializes a Gate object with the given configuration.
 
         Args:
             config (dict): The configuration of the gate.
+            validate (bool, optional): Whether to validate the configuration, False for configurations that
+                passed `validation.validate_specs`. Defaults to True.
 
         Raises:
             ValueError: If the gate type, input components, name, or sizing is not provided or is invalid.
         """
-        self._validate_config(config)
-        if config['type'] not in self.VALID_TYPES:
-            raise ValueError(f"Invalid gate type: {config['type']}. Valid types are: {', '.join(self.VALID_TYPES)}")
-        if int(config['type'][0]) != len(config['input_components']):
-            raise ValueError(f"Number of input components does not match gate type. {config['type']}, {len(config['input_components'])}")
+        if validate:
+            self._validate_config(config)
+            if config['type'] not in self.VALID_TYPES:
+                raise ValueError(f"Invalid gate type: {config['type']}. Valid types are: {', '.join(self.VALID_TYPES)}")
+            if int(config['type'][0]) != len(config['input_components']):
+                raise ValueError(f"Number of input components does not match gate type. {config['type']}, {len(config['input_components'])}")
         self.type = config['type']
         self.name = config['name']
         self.output_node_name = f"out_{config['name']}"
         self.k = config['k']
         self.input_gates = config['input_components']
+        # captured now: a non-ideal VoltageSource renames its output node after creating its driver
+        self.input_node_names = [component.output_node_name for component in self.input_gates]
         self.output_nodes = []
-        self.netlist = self.__generate_netlist()
+
+    @property
+    def netlist(self):
+        """
+        The netlist of the gate, rendered from the current type, sizing and inputs whenever it is accessed.
+        """
+        return self.__generate_netlist()
+
+    def render(self, hierarchical:bool = False):
+        """
+        Renders the gate, as transistors or as one `.SUBCKT` instance.
+
+        Args:
+            hierarchical (bool, optional): Whether to render a `.SUBCKT` instance. Defaults to False.
+
+        Returns:
+            str: The netlist of the gate.
+        """
+        if hierarchical:
+            return render_gate_instance(self.name, self.type, self.k, self.input_node_names)
+        return self.__generate_netlist()
 
     def __generate_netlist(self):
         """
@@ -52,39 +205,7 @@ class Gate:
         Returns:
             str: The generated netlist for the gate.
         """
-        if self.type == "2NAND":
-            return f"M{self.name}m0 {self.output_node_name} {self.input_gates[0].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k * 3)}\n"+\
-            f"M{self.name}m1 {self.output_node_name} {self.input_gates[1].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k * 3)}\n"+\
-            f"M{self.name}m2 {self.output_node_name} {self.input_gates[0].output_node_name} {self.name}mid 0 nmos_lvt nfin = {int(self.k*4)}\n"+\
-            f"M{self.name}m3 {self.name}mid {self.input_gates[1].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*4)}\n\n"
-            
-        elif self.type == "1NOT":
-            return f"M{self.name}m0 {self.output_node_name} {self.input_gates[0].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k * 3)}\n"+\
-            f"M{self.name}m1 {self.output_node_name} {self.input_gates[0].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*2)}\n\n"
-        
-        elif self.type == "2NOR":
-            return f"M{self.name}m0 {self.output_node_name} {self.input_gates[0].output_node_name} {self.name}mid vdd pmos_lvt nfin = {int(self.k*6)}\n"+\
-                f"M{self.name}m1 {self.name}mid {self.input_gates[1].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k*6)}\n"+\
-                f"M{self.name}m2 {self.output_node_name} {self.input_gates[0].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*2)}\n"+\
-                f"M{self.name}m3 {self.output_node_name} {self.input_gates[1].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*2)}\n\n"
-        
-        elif self.type == "2AND":
-            return f"M{self.name}m0 {self.output_node_name}intermediate {self.input_gates[0].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k * 3)}\n"+\
-                f"M{self.name}m1 {self.output_node_name}intermediate {self.input_gates[1].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k * 3)}\n"+\
-                f"M{self.name}m2 {self.output_node_name}intermediate {self.input_gates[0].output_node_name} {self.name}mid 0 nmos_lvt nfin = {int(self.k*4)}\n"+\
-                f"M{self.name}m3 {self.name}mid {self.input_gates[1].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*4)}\n"+\
-                f"M{self.name}m4 {self.output_node_name} {self.output_node_name}intermediate 0 0 nmos_lvt nfin = {int(self.k*2)}\n"+\
-                f"M{self.name}m5 {self.output_node_name} {self.output_node_name}intermediate vdd vdd pmos_lvt nfin = {int(self.k*3)}\n\n"
-        
-        elif self.type == "2OR":
-            return f"M{self.name}m0 {self.output_node_name}intermediate {self.input_gates[0].output_node_name} {self.name}mid vdd pmos_lvt nfin = {int(self.k*6)}\n"+\
-                f"M{self.name}m1 {self.name}mid {self.input_gates[1].output_node_name} vdd vdd pmos_lvt nfin = {int(self.k*6)}\n"+\
-                f"M{self.name}m2 {self.output_node_name}intermediate {self.input_gates[0].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*2)}\n"+\
-                f"M{self.name}m3 {self.output_node_name}intermediate {self.input_gates[1].output_node_name} 0 0 nmos_lvt nfin = {int(self.k*2)}\n"+\
-                f"M{self.name}m4 {self.output_node_name} {self.output_node_name}intermediate 0 0 nmos_lvt nfin = {int(self.k*2)}\n"+\
-                f"M{self.name}m5 {self.output_node_name} {self.output_node_name}intermediate vdd vdd pmos_lvt nfin = {int(self.k*3)}\n\n"
-            
-        
+        return render_gate_netlist(self.name, self.type, self.k, self.input_node_names)
 
     def __repr__(self):
         """
@@ -95,6 +216,7 @@ class Gate:
         """
         return self.__generate_netlist()
 
+    @timed("gate.validate")
     def _validate_config(self, config: dict):
         """
         Validates the configuration of the gate.
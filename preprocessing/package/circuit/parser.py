@@ -0,0 +1,300 @@
+"""
+Streaming parser turning SPICE decks written by this package back into circuits.
+
+Recognizes the components `Circuit`, `CompactCircuit`, `Simulation` and `SweepDeck` emit, flat or hierarchical:
+    V{NAME} {name} 0 pwl(...)                  a voltage source, ideal unless a driver instance follows
+    M{instance}m{i} d g s b model nfin = N     the transistors of one gate instance, matched against
+                                               `TRANSISTOR_TEMPLATES` by transistor count and pull up topology
+    X{instance} inputs out vdd cell k=K        one gate instance of a `.SUBCKT` (the library is skipped)
+    C{circuit}eos out_{circuit}EOS 0 {C}f      the end of sequence load, which closes the circuit
+The instance `{source}driver` is the driver of a voltage source and `{circuit}EOS` the end of sequence
+inverter; every other instance is a gate, named without the circuit suffix. Sizings written as `.PARAM`
+expressions (`nfin = 'kgate1c1*3'`, `k='kgate1c1'`) are resolved from the `.PARAM` statements seen so far.
+The `.MEASURE` statements come after all circuits of a deck, so `inverting` is derived like `Graph` does:
+from the parity of the inverting gates on the measured path (first inputs back from the end of sequence).
+A circuit is yielded as soon as its end of sequence is read, so memory stays bounded by the largest circuit
+no matter the size of the deck. Gates are expected in topological order, as written by the package,
+other orders are sorted at a small extra cost. Decks ending in ".gz" are decompressed on the fly.
+example:
+for compact in parse_deck("simulation.sp"):                    # CompactCircuit objects, in deck order
+    compact.make_feature_matrix()
+circuits = list(parse_deck("simulation.sp", output="circuit"))  # Circuit objects
+compact, = parse_netlist(circuit.netlist)
+"""
+
+import gzip
+import io
+
+from .circuit import Circuit
+from .compact import CompactCircuit
+from .gate import TRANSISTOR_TEMPLATES, SUBCKT_NAMES
+from ..instrumentation import timed
+
+OUTPUTS = ("compact", "circuit")
+
+# (number of transistors, first transistor sourced by vdd) identifies every template
+SIGNATURES = {(len(template), template[0][2] == "vdd"): gate_type for gate_type, template in TRANSISTOR_TEMPLATES.items()}
+if len(SIGNATURES) != len(TRANSISTOR_TEMPLATES):
+    raise ImportError("The transistor templates cannot be told apart by the parser")
+# the transistor whose gate terminal is input i, and the fin multiplier of the first transistor
+INPUT_TRANSISTORS = {gate_type: [[transistor[1] for transistor in template].index(f"in{i}") for i in range(int(gate_type[0]))]
+                     for gate_type, template in TRANSISTOR_TEMPLATES.items()}
+FIRST_MULTIPLIERS = {gate_type: template[0][5] for gate_type, template in TRANSISTOR_TEMPLATES.items()}
+SUBCKT_TYPES = {cell: gate_type for gate_type, cell in SUBCKT_NAMES.items()}
+INVERTING_CODES = {Circuit.TYPE_CODES[gate_type] for gate_type in Circuit.INVERTING_TYPES}
+
+
+class _CircuitBuilder:
+    """
+    Collects the components of the circuit being read.
+    """
+
+    def __init__(self):
+        self.source_nodes = []
+        self.source_k = []
+        # node name to gate number, or -(j + 1) for voltage source j
+        self.nodes = {}
+        self.instances = []
+        self.types = []
+        self.k = []
+        self.inputs = []
+        self.topological = True
+
+    def add_source(self, node:str):
+        self.nodes[node] = -(len(self.source_nodes) + 1)
+        self.source_nodes.append(node)
+        self.source_k.append(None)
+
+    def add_instance(self, instance:str, gate_type:str, k:int, inputs:list):
+        if instance.endswith("driver") and instance[:-6] in self.nodes and self.nodes[instance[:-6]] < 0:
+            j = -self.nodes[instance[:-6]] - 1
+            self.source_k[j] = k
+            self.nodes[f"out_{instance}"] = -(j + 1)
+            return
+        nodes = self.nodes
+        if self.topological and not all(node in nodes for node in inputs):
+            self.topological = False
+        nodes[f"out_{instance}"] = len(self.instances)
+        self.instances.append(instance)
+        self.types.append(Circuit.TYPE_CODES[gate_type])
+        self.k.append(k)
+        self.inputs.append(inputs)
+
+    def finish(self, name:str, capacitance):
+        """
+        Builds the circuit once its end of sequence load `C{name}eos` is read.
+        """
+        if not self.instances or self.instances[-1] != f"{name}EOS":
+            raise ValueError(f"The end of sequence load of {name} does not follow its inverter {name}EOS")
+        self.instances.pop()
+        eos_type, eos_k, (eos_input,) = self.types.pop(), self.k.pop(), self.inputs.pop()
+        if eos_type != Circuit.TYPE_CODES["1NOT"]:
+            raise ValueError(f"The end of sequence of {name} is not an inverter")
+
+        gate_names = []
+        for instance in self.instances:
+            if not instance.endswith(name):
+                raise ValueError(f"Gate {instance} does not carry the name of its circuit {name}")
+            gate_names.append(instance[:-len(name)])
+        source_names = []
+        for node in self.source_nodes:
+            if not node.endswith(name):
+                raise ValueError(f"Voltage source {node} does not carry the name of its circuit {name}")
+            source_names.append(node[:-len(name)])
+
+        nodes = self.nodes
+        try:
+            fanin_idx = [nodes[node] for inputs in self.inputs for node in inputs]
+            eos_gate = nodes[eos_input]
+        except KeyError as error:
+            raise ValueError(f"Unknown node {error} in circuit {name}") from None
+        fanin_ptr = [0]
+        for inputs in self.inputs:
+            fanin_ptr.append(fanin_ptr[-1] + len(inputs))
+        ideal = [k is None for k in self.source_k]
+        source_k = [0 if k is None else k for k in self.source_k]
+
+        if not self.topological:
+            # a gate read before one of its inputs: let `from_dicts` sort the gates
+            def component(idx):
+                return gate_names[idx] if idx >= 0 else source_names[-idx - 1]
+            gate_dict = {gate_names[i]: {"type": Circuit.GATE_CHOICES[self.types[i]], "k": self.k[i],
+                                         "input_components": [component(idx) for idx in fanin_idx[fanin_ptr[i]:fanin_ptr[i + 1]]]}
+                         for i in range(len(gate_names))}
+            voltage_dict = {source: {"ideal": True} if ideal[j] else {"ideal": False, "k": source_k[j]}
+                            for j, source in enumerate(source_names)}
+            compact = CompactCircuit.from_dicts(name, gate_dict, voltage_dict,
+                                                {"k": eos_k, "input_gate": gate_names[eos_gate], "capacitance": capacitance})
+        else:
+            compact = CompactCircuit(name, self.types, self.k, fanin_ptr, fanin_idx, ideal, source_k, eos_k, eos_gate,
+                                     capacitance, False, gate_names, source_names)
+            if compact.gate_names == [f"gate{i+1}" for i in range(len(gate_names))]:
+                compact.gate_names = None
+            if compact.source_names == [f"v{j+1}" for j in range(len(source_names))]:
+                compact.source_names = None
+        compact.inverting = _path_is_inverting(compact)
+        return compact
+
+
+def _path_is_inverting(compact:CompactCircuit):
+    """
+    Returns whether an odd number of inverting gates lies on the measured path, like `Graph` sets `inverting`.
+    """
+    types, fanin_ptr, fanin_idx = compact.types.tolist(), compact.fanin_ptr.tolist(), compact.fanin_idx.tolist()
+    inverting = False
+    gate = compact.eos_gate
+    while gate >= 0:
+        inverting ^= types[gate] in INVERTING_CODES
+        gate = fanin_idx[fanin_ptr[gate]]
+    return inverting
+
+
+def _sizing(text:str, multiplier:int, params:dict, line_number:int):
+    """
+    Returns the sizing behind an `nfin` value (k * multiplier) or an `X` instance `k` (multiplier 1).
+    """
+    if text[0] == "'":
+        expression = text.strip("'")
+        param = expression.split("*")[0]
+        if param not in params:
+            raise ValueError(f"Line {line_number}: undefined parameter {param}")
+        return params[param]
+    nfin = int(float(text))
+    if nfin % multiplier:
+        raise ValueError(f"Line {line_number}: nfin = {nfin} is no multiple of {multiplier}")
+    return nfin // multiplier
+
+
+def _read_params(tokens:list, params:dict, line_number:int):
+    for token in tokens:
+        name, separator, value = token.partition("=")
+        if not separator:
+            raise ValueError(f"Line {line_number}: malformed parameter {token}")
+        params[name] = int(float(value))
+
+
+def _open(file):
+    if not isinstance(file, str):
+        return file, False
+    if file.endswith(".gz"):
+        return gzip.open(file, "rt"), True
+    return open(file, buffering=1 << 20), True
+
+
+@timed("parser.deck")
+def parse_deck(file, output:str = "compact"):
+    """
+    Reads the circuits of a deck one at a time.
+
+    Args:
+        file (str or file): Path of the deck (".gz" compressed or not) or an open text file.
+        output (str, optional): "compact" for `CompactCircuit` or "circuit" for `Circuit` objects. Defaults to "compact".
+
+    Raises:
+        ValueError: If the output is unknown, or the deck holds a component the package does not emit.
+
+    Yields:
+        CompactCircuit or Circuit: The next circuit of the deck.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Invalid output: {output}. Valid outputs are: {', '.join(OUTPUTS)}")
+    handle, owned = _open(file)
+    try:
+        yield from _parse(handle, output == "circuit")
+    finally:
+        if owned:
+            handle.close()
+
+
+def parse_netlist(netlist:str, output:str = "compact"):
+    """
+    Reads all circuits of a netlist held in a string, e.g. `Circuit.netlist` or `Simulation.netlist`.
+
+    Returns:
+        list: The circuits, see `parse_deck`.
+    """
+    return list(parse_deck(io.StringIO(netlist), output))
+
+
+def _parse(lines, to_circuit:bool):
+    builder = _CircuitBuilder()
+    params = {}
+    in_subckt = False
+    continues_params = False
+    # the gate instance whose transistors are being read
+    instance, count, first, gates = None, 0, None, []
+
+    line_number = 0
+    try:
+        for line_number, line in enumerate(lines, 1):
+            start = line[:1]
+            if start == "M":
+                if in_subckt:
+                    continue
+                tokens = line.split(None, 3)
+                name, gate = tokens[0], tokens[2]
+                split = name.rfind("m")
+                if name[1:split] != instance:
+                    if instance is not None:
+                        builder.add_instance(instance, *_transistor_instance(instance, count, first, gates, params, line_number))
+                    instance, count, first, gates = name[1:split], 0, line.split(), []
+                count += 1
+                gates.append(gate)
+                continue
+
+            if instance is not None:
+                builder.add_instance(instance, *_transistor_instance(instance, count, first, gates, params, line_number))
+                instance = None
+            if start == "+":
+                if continues_params:
+                    _read_params(line.split()[1:], params, line_number)
+                continue
+            continues_params = False
+            if in_subckt:
+                if line[:5].upper() == ".ENDS":
+                    in_subckt = False
+                continue
+
+            if start == "X":
+                tokens = line.split()
+                gate_type = SUBCKT_TYPES.get(tokens[-2])
+                if gate_type is None or not tokens[-1].startswith("k="):
+                    raise ValueError(f"Line {line_number}: unknown subcircuit instance {tokens[0]}")
+                builder.add_instance(tokens[0][1:], gate_type, _sizing(tokens[-1][2:], 1, params, line_number), tokens[1:-4])
+            elif start == "V":
+                tokens = line.split()
+                if tokens[1] != "vdd":
+                    builder.add_source(tokens[1])
+            elif start == "C":
+                tokens = line.split()
+                name = tokens[0][1:-3]
+                if not tokens[0].endswith("eos"):
+                    raise ValueError(f"Line {line_number}: unknown capacitor {tokens[0]}")
+                value = tokens[3][:-1] if tokens[3][-1:] in ("f", "F") else tokens[3]
+                capacitance = int(value) if value.isdigit() else float(value)
+                compact = builder.finish(name, capacitance)
+                builder = _CircuitBuilder()
+                yield compact.to_circuit() if to_circuit else compact
+            elif start == ".":
+                keyword = line.split(None, 1)[0].upper()
+                if keyword == ".SUBCKT":
+                    in_subckt = True
+                elif keyword == ".PARAM":
+                    _read_params(line.split()[1:], params, line_number)
+                    continues_params = True
+    except IndexError:
+        raise ValueError(f"Line {line_number}: malformed statement") from None
+
+    if instance is not None or builder.instances or builder.source_nodes:
+        raise ValueError("The deck ends inside a circuit, its end of sequence load is missing")
+
+
+def _transistor_instance(instance:str, count:int, first:list, gates:list, params:dict, line_number:int):
+    """
+    Returns the type, sizing and input nodes of a gate instance read as transistors.
+    """
+    gate_type = SIGNATURES.get((count, first[3] == "vdd"))
+    if gate_type is None or first[5] != TRANSISTOR_TEMPLATES[gate_type][0][4] or first[6:8] != ["nfin", "="]:
+        raise ValueError(f"Line {line_number}: the transistors of {instance} match no gate type")
+    k = _sizing(first[8], FIRST_MULTIPLIERS[gate_type], params, line_number)
+    return gate_type, k, [gates[i] for i in INPUT_TRANSISTORS[gate_type]]
@@ -0,0 +1,57 @@
+"""
+Topological ordering of the gates of a circuit.
+
+`Circuit` accepts its gates in any order. `topological_sort` orders them so that every gate comes after
+the gates driving it, in O(V + E) with an iterative depth first search (no recursion limit on deep
+circuits). Gates that are already in topological order keep their order, so the chains `Graph`
+generates are numbered exactly as before. Cycles and unknown inputs raise a `ValueError`.
+example:
+topological_sort({"g2": ["g1"], "g1": ["v1", "v2"]}, {"v1", "v2"})     # ["g1", "g2"]
+"""
+
+from ..instrumentation import timed
+
+UNVISITED, ON_STACK, DONE = 0, 1, 2
+
+
+@timed("circuit.topological_sort")
+def topological_sort(gate_inputs:dict, sources):
+    """
+    Orders gates so that every gate comes after its inputs.
+
+    Args:
+        gate_inputs (dict): Gate name to the list of the names of the components driving its inputs.
+        sources: Names of the components that are no gates (voltage sources), supporting `in`.
+
+    Raises:
+        ValueError: If an input is neither a gate nor a source, or if the gates form a cycle.
+
+    Returns:
+        list: The gate names in topological order, stable for already sorted input.
+    """
+    state = dict.fromkeys(gate_inputs, UNVISITED)
+    order = []
+    for root in gate_inputs:
+        if state[root] != UNVISITED:
+            continue
+        state[root] = ON_STACK
+        stack = [(root, iter(gate_inputs[root]))]
+        while stack:
+            gate, inputs = stack[-1]
+            for input_name in inputs:
+                input_state = state.get(input_name)
+                if input_state is None:
+                    if input_name not in sources:
+                        raise ValueError(f"Unknown input component {input_name} of gate {gate}")
+                elif input_state == UNVISITED:
+                    state[input_name] = ON_STACK
+                    stack.append((input_name, iter(gate_inputs[input_name])))
+                    break
+                elif input_state == ON_STACK:
+                    cycle = [name for name, _ in stack[[name for name, _ in stack].index(input_name):]]
+                    raise ValueError(f"The gates form a cycle: {' -> '.join(cycle + [input_name])}")
+            else:
+                state[gate] = DONE
+                order.append(gate)
+                stack.pop()
+    return order
@@ -0,0 +1,127 @@
+"""
+Transient analysis window of the simulation decks.
+
+Every voltage source is held at vdd, falls during `transition` seconds to reach 0 at `edge`, and the
+transient analysis runs until `stop` with timestep `step`. `DEFAULT_WINDOW` is the historic
+`pwl(0 0.7 0.9999us 0.7 1us 0 2us 0)` / `.tran 1p 2u`, 2 us of simulation at 1 ps for delays of tens of
+picoseconds. `TransientWindow.from_delay` sizes the window from an estimated delay instead: the edge
+right after a short settling time, the stop a safety margin of delays later and a step resolving the
+delay in `points_per_delay` steps, which shrinks the number of timesteps by orders of magnitude.
+example:
+window = TransientWindow.from_delay(40e-12)         # pwl(0 0.7 0.1ns 0.7 0.2ns 0 1.2ns 0), .tran 400f 1.2n
+circuit.save_circuit_to_file("c1.sp", window=window)
+"""
+
+import math
+
+# SI prefixes of the times, largest first
+TIME_UNITS = (("", 1.0), ("m", 1e-3), ("u", 1e-6), ("n", 1e-9), ("p", 1e-12), ("f", 1e-15))
+
+
+def time_unit(seconds:float):
+    """
+    Returns the (prefix, scale) of the largest SI unit not exceeding a time.
+    """
+    for unit in TIME_UNITS:
+        if seconds >= unit[1] * (1 - 1e-9):
+            return unit
+    return TIME_UNITS[-1]
+
+
+def format_time(seconds:float, unit:tuple = None):
+    """
+    Formats a time with an SI prefix, e.g. 2e-06 -> "2u" and 9.999e-07 -> "999.9n".
+
+    Args:
+        seconds (float): The time.
+        unit (tuple, optional): The (prefix, scale) to use. Defaults to `time_unit(seconds)`.
+
+    Returns:
+        str: The time, without the unit.
+    """
+    prefix, scale = time_unit(seconds) if unit is None else unit
+    return f"{seconds / scale:.6g}{prefix}"
+
+
+def round_time(seconds:float, digits:int = 2):
+    """
+    Rounds a time up to `digits` significant digits, so that the decks hold short numbers.
+    """
+    scale = 10 ** (math.floor(math.log10(seconds)) - digits + 1)
+    return math.ceil(seconds / scale * (1 - 1e-9)) * scale
+
+
+class TransientWindow:
+    """
+    The stimulus and transient analysis of a deck.
+
+    Args:
+        edge (float, optional): Time in seconds at which the voltage sources reach 0. Defaults to 1e-6.
+        stop (float, optional): End of the transient analysis in seconds. Defaults to 2e-6.
+        step (float, optional): Timestep of the transient analysis in seconds. Defaults to 1e-12.
+        transition (float, optional): Fall time of the voltage sources in seconds. Defaults to 1e-10.
+        vdd (float, optional): Voltage the sources start at. Defaults to 0.7.
+
+    Raises:
+        ValueError: If the times are not positive or not ordered 0 < edge - transition < edge < stop.
+    """
+
+    def __init__(self, edge:float = 1e-6, stop:float = 2e-6, step:float = 1e-12, transition:float = 1e-10,
+                 vdd:float = 0.7):
+        if not 0 < transition < edge < stop or step <= 0:
+            raise ValueError("The window needs 0 < transition < edge < stop and a positive step")
+        self.edge = edge
+        self.stop = stop
+        self.step = step
+        self.transition = transition
+        self.vdd = vdd
+        # the times of the stimulus share the unit of the stop time
+        unit = time_unit(stop)
+        self.pwl = (f"pwl(0 {vdd:g} {format_time(edge - transition, unit)}s {vdd:g} {format_time(edge, unit)}s 0 "
+                    f"{format_time(stop, unit)}s 0)")
+        self.analysis = f".tran {format_time(step)} {format_time(stop)}"
+
+    @classmethod
+    def from_delay(cls, delay:float, margin:float = 10.0, points_per_delay:int = 100, settle:float = 1e-10,
+                   transition:float = 1e-10, min_window:float = 1e-9):
+        """
+        Sizes a window for circuits of an estimated delay.
+
+        Args:
+            delay (float): The estimated delay in seconds, of the slowest circuit of the deck.
+            margin (float, optional): Simulated time after the edge, in estimated delays. Defaults to 10.
+            points_per_delay (int, optional): Timesteps per estimated delay. Defaults to 100.
+            settle (float, optional): Seconds the sources are held at vdd before they fall. Defaults to 1e-10.
+            transition (float, optional): Fall time of the voltage sources in seconds. Defaults to 1e-10.
+            min_window (float, optional): Shortest simulated time after the edge in seconds. Defaults to 1e-9.
+
+        Raises:
+            ValueError: If the delay is not a positive finite number.
+
+        Returns:
+            TransientWindow: The window.
+        """
+        if not 0 < delay < math.inf:
+            raise ValueError(f"The estimated delay must be positive and finite, not {delay}")
+        edge = settle + transition
+        stop = round_time(edge + max(margin * delay, min_window))
+        step = round_time(delay / points_per_delay, 1)
+        return cls(edge, stop, min(step, cls().step), transition)
+
+    def stimulus(self, name:str):
+        """
+        Renders the voltage source of the given name.
+        """
+        return f"{name.upper()} {name} 0 {self.pwl}\n"
+
+    def __eq__(self, other):
+        return isinstance(other, TransientWindow) and (self.pwl, self.analysis) == (other.pwl, other.analysis)
+
+    def __hash__(self):
+        return hash((self.pwl, self.analysis))
+
+    def __repr__(self):
+        return f"TransientWindow({self.pwl}, {self.analysis})"
+
+
+DEFAULT_WINDOW = TransientWindow()
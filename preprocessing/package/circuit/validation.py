@@ -0,0 +1,215 @@
+"""
+Bulk validation of circuit specifications.
+
+`Gate`, `VoltageSource` and `EndOfSequence` validate their own configuration and raise on the first
+problem, which is slow for large uploads and reports one error at a time. `validate_specs` checks many
+specifications (the `gate_dict`/`voltage_dict`/`eos_dict` schema documented in `circuit.py`) in one pass
+and returns every error of every circuit: missing keys and wrong types, names that are not made of
+letters, digits and underscores (they become netlist node names), sizings that are not positive
+integers within the int32 range of `CompactCircuit`, unknown gate types, the number of inputs against
+the gate type (`type[0]`), dangling `input_components`, the `input_gate` of the end of sequence and
+cycles. Circuits without errors can then be built with `Circuit(..., trusted=True)`, which skips the per
+component checks, `build_circuits` does both.
+example:
+errors = validate_specs([{"name": "c1", "gate_dict": {...}, "voltage_dict": {...}, "eos_dict": {...}}, ...])
+# [[], ["gate2: Number of input components does not match gate type. 2NAND, 1"], ...]
+circuits, errors = build_circuits(specs)        # None where a specification has errors
+"""
+
+import re
+
+from .circuit import Circuit, MAX_SIZING, _is_sizing
+from ..instrumentation import timed
+
+VALID_TYPES = frozenset(Circuit.GATE_CHOICES)
+# names end up in node and element names of the netlist, anything else could split or inject SPICE cards
+NAME_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+
+
+def _is_name(value):
+    """
+    Whether a value is a valid circuit or component name: letters, digits and underscores only.
+    """
+    return isinstance(value, str) and NAME_PATTERN.fullmatch(value) is not None
+
+
+def _find_cycles(gate_inputs:dict):
+    """
+    Returns the cycles of the gates, as lists of gate names, disjoint and in no particular order.
+    gate_inputs maps every gate to the gates driving it.
+    """
+    fanout = {gate: [] for gate in gate_inputs}
+    remaining = dict.fromkeys(gate_inputs, 0)
+    for gate, inputs in gate_inputs.items():
+        for input_name in inputs:
+            if input_name in fanout:
+                fanout[input_name].append(gate)
+                remaining[gate] += 1
+    # Kahn: whatever cannot be ordered lies on or behind a cycle
+    ready = [gate for gate, count in remaining.items() if count == 0]
+    while ready:
+        gate = ready.pop()
+        del remaining[gate]
+        for successor in fanout[gate]:
+            remaining[successor] -= 1
+            if remaining[successor] == 0:
+                ready.append(successor)
+    if not remaining:
+        return []
+
+    # every remaining gate has a remaining input, walking back along them always closes a cycle
+    cycles, visited = [], set()
+    for start in remaining:
+        walk, position = [], {}
+        gate = start
+        while gate not in visited:
+            visited.add(gate)
+            position[gate] = len(walk)
+            walk.append(gate)
+            gate = next(input_name for input_name in gate_inputs[gate] if input_name in remaining)
+        if gate in position:
+            cycle = walk[position[gate]:][::-1]
+            cycles.append(cycle + [cycle[0]])
+    return cycles
+
+
+def validate_spec(gate_dict:dict, voltage_dict:dict, eos_dict:dict, inverting = False, circuit_name:str = "circuit"):
+    """
+    Checks one circuit specification.
+
+    Args:
+        gate_dict (dict): A dictionary containing gate configurations.
+        voltage_dict (dict): A dictionary containing voltage source configurations.
+        eos_dict (dict): A dictionary containing end-of-sequence configuration.
+        inverting (bool, optional): Specifies whether the circuit is inverting or not. Defaults to False.
+        circuit_name (str, optional): The name of the circuit. Defaults to "circuit".
+
+    Returns:
+        list: Every error found, as messages prefixed by the offending component. Empty when the circuit is valid.
+    """
+    errors = []
+    if not _is_name(circuit_name):
+        errors.append(f"{circuit_name!r}: Name of the circuit must only hold letters, digits and underscores")
+    for argument, value in (("gate_dict", gate_dict), ("voltage_dict", voltage_dict), ("eos_dict", eos_dict)):
+        if not isinstance(value, dict):
+            errors.append(f"{argument} must be a dictionary, not {type(value).__name__}")
+    if not all(isinstance(value, dict) for value in (gate_dict, voltage_dict, eos_dict)):
+        return errors
+    if not isinstance(inverting, bool):
+        errors.append(f"inverting must be a boolean, not {type(inverting).__name__}")
+
+    for name, params in voltage_dict.items():
+        if not _is_name(name):
+            errors.append(f"{name!r}: Name of the voltage source must only hold letters, digits and underscores")
+        if not isinstance(params, dict):
+            errors.append(f"{name}: Voltage source configuration must be a dictionary")
+            continue
+        if 'ideal' not in params:
+            errors.append(f"{name}: Ideal property of the voltage source not provided")
+        elif not isinstance(params['ideal'], bool):
+            errors.append(f"{name}: Ideal property must be a boolean not {type(params['ideal'])}")
+        elif not params['ideal'] and 'k' not in params:
+            errors.append(f"{name}: Sizing of the driver not provided")
+        if 'k' in params and not _is_sizing(params['k']):
+            errors.append(f"{name}: Driver sizing must be a positive integer of at most {MAX_SIZING}, not {params['k']!r}")
+
+    gate_inputs = {}
+    # gates listed in topological order, the usual case, cannot form a cycle
+    ordered = True
+    for name, params in gate_dict.items():
+        if not _is_name(name):
+            errors.append(f"{name!r}: Name of the gate must only hold letters, digits and underscores")
+            if not isinstance(name, str):
+                continue
+        if name in voltage_dict:
+            errors.append(f"{name}: Name used by a gate and a voltage source")
+        if not isinstance(params, dict):
+            errors.append(f"{name}: Gate configuration must be a dictionary")
+            continue
+        if 'type' not in params or 'input_components' not in params or 'k' not in params:
+            for key, description in (('type', "Type"), ('input_components', "Input components"), ('k', "Sizing")):
+                if key not in params:
+                    errors.append(f"{name}: {description} of the gate not provided")
+        gate_type, inputs = params.get('type'), params.get('input_components')
+        # the type may be any JSON value, membership tests need a hashable one
+        if 'type' in params and (not isinstance(gate_type, str) or gate_type not in VALID_TYPES):
+            errors.append(f"{name}: Invalid gate type: {gate_type}. Valid types are: {', '.join(Circuit.GATE_CHOICES)}")
+        if 'k' in params and not _is_sizing(params['k']):
+            errors.append(f"{name}: Sizing of the gate must be a positive integer of at most {MAX_SIZING}")
+        if 'input_components' not in params:
+            continue
+        if not isinstance(inputs, list):
+            errors.append(f"{name}: Input components of the gate must be a list")
+            continue
+        if isinstance(gate_type, str) and gate_type in VALID_TYPES and int(gate_type[0]) != len(inputs):
+            errors.append(f"{name}: Number of input components does not match gate type. {gate_type}, {len(inputs)}")
+        names = []
+        for input_name in inputs:
+            if not isinstance(input_name, str):
+                errors.append(f"{name}: Input component {input_name!r} must be a name")
+            elif input_name in gate_dict:
+                names.append(input_name)
+                if input_name not in gate_inputs:
+                    ordered = False
+            elif input_name not in voltage_dict:
+                errors.append(f"{name}: Unknown input component {input_name}")
+        gate_inputs[name] = names
+
+    eos_keys = (('k', _is_sizing, "Sizing of the end of sequence", f"a positive integer of at most {MAX_SIZING}"),
+                ('capacitance', lambda value: isinstance(value, (float, int)), "Capacitance", "a float or int"))
+    for key, is_valid, description, type_names in eos_keys:
+        if key not in eos_dict:
+            errors.append(f"EOS: {description} not provided")
+        elif not is_valid(eos_dict[key]):
+            errors.append(f"EOS: {description} must be {type_names}")
+    if 'input_gate' not in eos_dict:
+        errors.append("EOS: Input gate not provided")
+    elif not isinstance(eos_dict['input_gate'], str) or eos_dict['input_gate'] not in gate_dict:
+        errors.append(f"EOS: Unknown input gate {eos_dict['input_gate']}")
+
+    for cycle in [] if ordered else _find_cycles(gate_inputs):
+        errors.append(f"{cycle[0]}: The gates form a cycle: {' -> '.join(cycle)}")
+    return errors
+
+
+@timed("validation.validate_specs")
+def validate_specs(specs:list):
+    """
+    Checks many circuit specifications in one pass.
+
+    Args:
+        specs (list): Dictionaries with "gate_dict", "voltage_dict" and "eos_dict", optionally "name" and "inverting".
+
+    Returns:
+        list: One list of error messages per specification, empty for the valid ones.
+    """
+    results = []
+    for spec in specs:
+        if not isinstance(spec, dict):
+            results.append(["A circuit specification must be a dictionary"])
+            continue
+        missing = [key for key in ("gate_dict", "voltage_dict", "eos_dict") if key not in spec]
+        if missing:
+            results.append([f"Missing keys: {', '.join(missing)}"])
+            continue
+        results.append(validate_spec(spec["gate_dict"], spec["voltage_dict"], spec["eos_dict"],
+                                     spec.get("inverting", False), spec.get("name", "circuit")))
+    return results
+
+
+def build_circuits(specs:list):
+    """
+    Validates many circuit specifications and builds the valid ones as trusted circuits.
+    The dictionaries of the valid specifications are modified like `Circuit` does.
+
+    Args:
+        specs (list): The circuit specifications, see `validate_specs`. "name" defaults to "circuit{i}".
+
+    Returns:
+        tuple: The circuits (None where a specification has errors) and the errors of every specification.
+    """
+    errors = validate_specs(specs)
+    circuits = [Circuit(spec.get("name", f"circuit{i}"), spec["gate_dict"], spec["voltage_dict"], spec["eos_dict"],
+                        spec.get("inverting", False), trusted=True) if not spec_errors else None
+                for i, (spec, spec_errors) in enumerate(zip(specs, errors))]
+    return circuits, errors
@@ -1,4 +1,24 @@
 from .gate import Gate
+from .transient import DEFAULT_WINDOW
+from ..instrumentation import timed
+
+
+def render_voltage_source_netlist(name:str, driver_netlist:str = None, window = None):
+    """
+    Renders a voltage source, followed by the netlist of its driver if it is not ideal.
+
+    Args:
+        name (str): The name of the voltage source.
+        driver_netlist (str, optional): The netlist of the driver gate. `None` for an ideal voltage source.
+        window (TransientWindow, optional): The stimulus timing. Defaults to `DEFAULT_WINDOW`.
+
+    Returns:
+        str: The netlist of the voltage source.
+    """
+    source = (DEFAULT_WINDOW if window is None else window).stimulus(name)
+    return source + ("\n" if driver_netlist is None else driver_netlist)
+
+
 class VoltageSource:
     """
     Represents a voltage source in a circuit.
@@ -20,34 +40,55 @@ class VoltageSource:
         netlist (str): The netlist representation of the voltage source.
 
     Methods:
-        __init__(self, config: dict): Initializes a new instance of the VoltageSource class.
+        __init__(self, config: dict, validate: bool = True): Initializes a new instance of the VoltageSource class.
         __generate_netlist(self): Generates the netlist representation of the voltage source.
         __repr__(self): Returns the netlist representation of the voltage source.
         _validate_config(self, config: dict): Validates the configuration parameters.
 
     """
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, validate:bool = True):
         """
         Initializes a new instance of the VoltageSource class.
 
         Args:
             config (dict): A dictionary containing the configuration parameters for the voltage source.
+            validate (bool, optional): Whether to validate the configuration. Defaults to True.
 
         Raises:
             ValueError: If any of the required configuration parameters are missing or have invalid types.
         """
         self.name = config['name']
-        if self._validate_config(config):
+        if not validate or self._validate_config(config):
             self.input_config = config
 
         self.output_node_name = config['name']
         if not config['ideal']:
             gate_config = {"name": self.name + "driver", "type": "1NOT", "k": config['k'], "input_components": [self]}
-            self.driver = Gate(gate_config)
+            self.driver = Gate(gate_config, validate)
             self.output_node_name = self.driver.output_node_name
 
-        self.netlist = self.__generate_netlist()
+    @property
+    def netlist(self):
+        """
+        The netlist of the voltage source, rendered whenever it is accessed.
+        """
+        return self.__generate_netlist()
+
+    def render(self, hierarchical:bool = False, window = None):
+        """
+        Renders the voltage source, with its driver as transistors or as one `.SUBCKT` instance.
+
+        Args:
+            hierarchical (bool, optional): Whether to render the driver as a `.SUBCKT` instance. Defaults to False.
+            window (TransientWindow, optional): The stimulus timing. Defaults to `DEFAULT_WINDOW`.
+
+        Returns:
+            str: The netlist of the voltage source.
+        """
+        if self.output_node_name == self.name:
+            return render_voltage_source_netlist(self.name, window=window)
+        return render_voltage_source_netlist(self.name, self.driver.render(hierarchical), window)
 
     def __generate_netlist(self):
         """
@@ -57,9 +98,9 @@ class VoltageSource:
             str: The netlist representation of the voltage source.
         """
         if self.output_node_name == self.name:
-            return f"{self.name.upper()} {self.name} 0 pwl(0 0.7 0.9999us 0.7 1us 0 2us 0)\n\n"
+            return render_voltage_source_netlist(self.name)
         else:
-            return f"{self.name.upper()} {self.name} 0 pwl(0 0.7 0.9999us 0.7 1us 0 2us 0)\n" + self.driver.netlist
+            return render_voltage_source_netlist(self.name, self.driver.netlist)
 
     def __repr__(self):
         """
@@ -70,6 +111,7 @@ class VoltageSource:
         """
         return self.__generate_netlist()
 
+    @timed("voltage_source.validate")
     def _validate_config(self, config: dict):
         """
         Validates the configuration parameters.
@@ -0,0 +1,200 @@
+"""
+Opt-in instrumentation of the hot paths of `package.circuit` and `package.simulation`.
+
+Instrumented functions (`@timed("stage")`) and regions (`with stage("stage"):`) record a call count and
+the cumulative wall time per stage, e.g. gate validation, netlist rendering, feature extraction, the
+random draws of `Graph` or `np.savez`. Disabled (the default) a stage costs one global flag check.
+Enable it in code, or for a whole run with the environment variable PREPROCESSING_INSTRUMENT=1;
+PREPROCESSING_INSTRUMENT_OUTPUT=summary.json (or .txt) writes the summary when the interpreter exits.
+Stages time nested work too, e.g. "circuit.init" includes "gate.validate". Stages recorded inside
+worker processes (e.g. a `GraphGenerator` process pool) stay in those processes.
+example:
+from package import instrumentation
+instrumentation.enable()
+graphs = [Graph(f"circuit{i}") for i in range(10000)]
+with instrumentation.profile("dataset", every=100):       # cProfile one region out of 100
+    writer.add_graph(graph)
+print(instrumentation.report())
+instrumentation.export("summary.json")
+"""
+
+import atexit
+import cProfile
+import contextlib
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+_enabled = os.environ.get("PREPROCESSING_INSTRUMENT", "") not in ("", "0")
+_lock = threading.Lock()
+_stages = {}
+_profiles = {}
+_profile_entries = {}
+
+
+def enable():
+    """
+    Starts recording.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    Stops recording, the recorded stages are kept.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Drops everything recorded so far.
+    """
+    with _lock:
+        _stages.clear()
+        _profiles.clear()
+        _profile_entries.clear()
+
+
+def record(name:str, seconds:float, count:int = 1):
+    """
+    Adds `count` calls taking `seconds` in total to a stage.
+    """
+    with _lock:
+        entry = _stages.get(name)
+        if entry is None:
+            _stages[name] = [count, seconds]
+        else:
+            entry[0] += count
+            entry[1] += seconds
+
+
+def timed(name:str):
+    """
+    Decorator recording every call of the function as the stage `name`.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name:str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+
+
+_DISABLED = contextlib.nullcontext()
+
+
+def stage(name:str):
+    """
+    Context manager recording the enclosed region as the stage `name`.
+    """
+    return _Stage(name) if _enabled else _DISABLED
+
+
+@contextlib.contextmanager
+def profile(name:str, every:int = 1):
+    """
+    Runs the enclosed region under cProfile, once every `every` entries, accumulating the samples per name.
+    Does nothing while recording is disabled.
+
+    Args:
+        name (str): The name the profile is reported under.
+        every (int, optional): Sampling period, e.g. 100 profiles one entry out of 100. Defaults to 1.
+    """
+    if not _enabled:
+        yield
+        return
+    with _lock:
+        entries = _profile_entries.get(name, 0)
+        _profile_entries[name] = entries + 1
+        profiler = _profiles.setdefault(name, cProfile.Profile()) if entries % every == 0 else None
+    if profiler is None:
+        yield
+        return
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+
+def summary():
+    """
+    Returns the recorded stages, slowest first.
+
+    Returns:
+        dict: Stage name to {"count", "total_seconds", "mean_microseconds"}.
+    """
+    with _lock:
+        stages = sorted(_stages.items(), key=lambda item: -item[1][1])
+    return {name: {"count": count, "total_seconds": seconds, "mean_microseconds": 1e6 * seconds / count if count else 0.0}
+            for name, (count, seconds) in stages}
+
+
+def profile_stats(name:str, sort:str = "cumulative", limit:int = 25):
+    """
+    Returns the cProfile statistics of a profiled region as text.
+    """
+    stream = io.StringIO()
+    profiler = _profiles.get(name)
+    if profiler is not None:
+        pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def report():
+    """
+    Returns the summary as a text table, followed by the statistics of the profiled regions.
+    """
+    lines = [f"{'stage':<32}{'count':>12}{'total s':>12}{'mean us':>12}"]
+    for name, entry in summary().items():
+        lines.append(f"{name:<32}{entry['count']:>12}{entry['total_seconds']:>12.4f}{entry['mean_microseconds']:>12.2f}")
+    for name in list(_profiles):
+        lines.append(f"\nprofile {name} ({_profile_entries.get(name, 0)} entries)")
+        lines.append(profile_stats(name))
+    return "\n".join(lines)
+
+
+def export(file_path:str):
+    """
+    Writes the summary to a file, as JSON when the path ends with ".json" and as the `report` text otherwise.
+    """
+    with open(file_path, "w") as file:
+        if file_path.endswith(".json"):
+            json.dump({"stages": summary(), "profiles": {name: profile_stats(name) for name in list(_profiles)}}, file, indent=2)
+        else:
+            file.write(report())
+
+
+if os.environ.get("PREPROCESSING_INSTRUMENT_OUTPUT"):
+    atexit.register(export, os.environ["PREPROCESSING_INSTRUMENT_OUTPUT"])
@@ -0,0 +1,312 @@
+"""
+Resumable end-to-end build of a labelled graph dataset.
+
+Runs, chunk after chunk of `chunk_size` circuits,
+    generate    the `Graph`s of the chunk from the master seed (`GraphGenerator`, lazy graphs)
+    emit        their simulation decks (`SimulationRunner.write_shards`, `Simulation`)
+    simulate    the simulator on the decks, in parallel
+    parse       the `tdlay{name}` measurements of the simulator output
+    join        the delays to the graphs by circuit name, saved to labels/chunk{c}.npy
+    write       the graphs and their labels appended to the packed dataset (`DatasetWriter`)
+The output directory holds dataset/, decks/, labels/ and manifest.json, which records the configuration
+(simulator settings included) and the stage reached by every chunk. Every chunk is committed to the
+dataset in one flush, and the manifest is replaced atomically afterwards, so a crashed or killed build
+started again with the same arguments resumes at the first incomplete chunk: chunks whose labels are
+saved are only regenerated (graph i is the same whatever the chunk) and written, the others start over.
+Labels are delays in seconds, NaN when the measurement failed. `--label sta` labels with the static
+timing estimate instead, without a simulator. `--cache` delays are namespaced by the simulator settings.
+example:
+python -m package.pipeline build/train --count 1000000 --chunk-size 5000 --seed 42 --adaptive
+python -m package.pipeline build/train --count 1000000 --chunk-size 5000 --seed 42 --adaptive    # resumes
+python -m package.pipeline build/sta --count 20000 --label sta --topology dag
+pipeline = DatasetPipeline("build/train", 10000, seed=0, runner=SimulationRunner(work_dir="build/train/decks"))
+pipeline.run()
+DatasetReader("build/train/dataset")
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shlex
+import sys
+import time
+
+import numpy as np
+
+from .instrumentation import stage
+from .simulation.cache import DelayCache
+from .simulation.dataset import DatasetWriter, _read_meta
+from .simulation.delay import LogicalEffort
+from .simulation.generator import GraphGenerator
+from .simulation.runner import SimulationRunner, SECONDS_PER_TAU
+from .simulation.sta import StaticTiming
+
+LABEL_SOURCES = ("simulate", "sta")
+MANIFEST_VERSION = 1
+
+
+class DatasetPipeline:
+    """
+    Builds a labelled dataset chunk by chunk, with a checkpoint manifest.
+
+    Args:
+        output (str): The output directory, created if it does not exist.
+        count (int): Number of circuits, named `circuit1` ... `circuit{count}`.
+        seed (int, optional): Master seed of the `GraphGenerator`. Defaults to 0.
+        chunk_size (int, optional): Number of circuits per chunk, the unit of checkpointing. Defaults to 1000.
+        graph_kwargs (dict, optional): Keyword arguments of every `Graph` (max_num_of_gates, topology, ...).
+            Defaults to None.
+        label (str, optional): "simulate" labels with measured delays, "sta" with static timing estimates.
+            Defaults to "simulate".
+        runner (SimulationRunner, optional): Simulates the decks. Defaults to a `SimulationRunner` writing to
+            `output`/decks.
+        workers (int, optional): Number of processes generating the graphs. `None` uses every core, 1 generates
+            in-process. Defaults to None.
+        keep_decks (bool, optional): Whether to keep the decks and simulator output of the finished chunks.
+            Defaults to False.
+
+    Raises:
+        ValueError: If count or chunk_size is smaller than 1, or the label source is unknown.
+    """
+
+    def __init__(self, output:str, count:int, seed:int = 0, chunk_size:int = 1000, graph_kwargs:dict = None,
+                 label:str = "simulate", runner:SimulationRunner = None, workers:int = None, keep_decks:bool = False):
+        if count < 1 or chunk_size < 1:
+            raise ValueError("count and chunk_size should be at least 1")
+        if label not in LABEL_SOURCES:
+            raise ValueError(f"Invalid label source: {label}. Valid sources are: {', '.join(LABEL_SOURCES)}")
+        self.output = output
+        self.count = count
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.graph_kwargs = dict(graph_kwargs or {})
+        self.label = label
+        self.runner = SimulationRunner(work_dir=os.path.join(output, "decks")) if runner is None else runner
+        self.keep_decks = keep_decks
+        self.generator = GraphGenerator(seed, workers=workers, lazy=True, **self.graph_kwargs)
+        self.dataset_path = os.path.join(output, "dataset")
+        self.manifest_path = os.path.join(output, "manifest.json")
+
+    @property
+    def num_chunks(self):
+        return -(-self.count // self.chunk_size)
+
+    def bounds(self, chunk:int):
+        """
+        Returns the index of the first circuit of a chunk and the number of circuits in it.
+        """
+        start = chunk * self.chunk_size
+        return start + 1, min(self.chunk_size, self.count - start)
+
+    def config(self):
+        """
+        Returns everything that determines the dataset, a resumed build must match it.
+        """
+        config = {"count": self.count, "seed": self.seed, "chunk_size": self.chunk_size,
+                  "graph_kwargs": self.graph_kwargs, "label": self.label}
+        if self.label == "simulate":
+            # the simulator, its decks and their windows determine the measured delays
+            runner = self.runner
+            config["runner"] = {"command": runner.command, "result_file": runner.result_file,
+                                "hierarchical": runner.hierarchical, "adaptive": runner.adaptive,
+                                "window": None if runner.window is None else repr(runner.window),
+                                "margin": runner.margin, "tau": runner.delay_model.tau,
+                                "fallback_window": (None if runner.fallback_window is None
+                                                    else repr(runner.fallback_window))}
+        return config
+
+    def cache_namespace(self):
+        """
+        Returns the `DelayCache` namespace of the simulator settings in `config`, so that builds sharing
+        a cache only reuse the delays measured the same way.
+        """
+        settings = json.dumps(self.config().get("runner"), sort_keys=True)
+        return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+    def load_manifest(self):
+        """
+        Returns the manifest of the build in `output`, a new one if there is none.
+
+        Raises:
+            ValueError: If the existing build used another configuration.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {"version": MANIFEST_VERSION, "config": self.config(), "chunks": {}}
+        with open(self.manifest_path) as file:
+            manifest = json.load(file)
+        if manifest.get("config") != json.loads(json.dumps(self.config())):
+            raise ValueError(f"{self.output} holds a build with another configuration {manifest.get('config')}, "
+                             f"start it over with restart or use another output directory")
+        return manifest
+
+    def save_manifest(self, manifest:dict):
+        """
+        Replaces the manifest atomically.
+        """
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(temporary_path, self.manifest_path)
+
+    def _labels_path(self, chunk:int):
+        return os.path.join(self.output, "labels", f"chunk{chunk:06d}.npy")
+
+    def _recover(self, manifest:dict):
+        """
+        Makes the manifest agree with the dataset after a crash, and returns the number of committed graphs.
+        """
+        chunks = manifest["chunks"]
+        written, chunk = 0, 0
+        while chunk < self.num_chunks and chunks.get(str(chunk), {}).get("stage") == "written":
+            written += self.bounds(chunk)[1]
+            chunk += 1
+        meta_path = os.path.join(self.dataset_path, "meta.json")
+        committed = _read_meta(self.dataset_path)["num_graphs"] if os.path.exists(meta_path) else 0
+        if chunk < self.num_chunks and chunks.get(str(chunk), {}).get("stage") == "labeled":
+            start, size = self.bounds(chunk)
+            if committed == written + size:
+                # crashed between committing the chunk to the dataset and recording it
+                written += size
+                chunks[str(chunk)].update(stage="written", start=start, stop=start + size, num_graphs=written)
+        if committed != written:
+            raise ValueError(f"The dataset holds {committed} graphs but the manifest records {written}, "
+                             f"start the build over with restart")
+        return written
+
+    def label_graphs(self, graphs:list, chunk:int):
+        """
+        Labels the graphs of one chunk, joined by circuit name.
+
+        Raises:
+            RuntimeError: If a simulator run failed, or no measurement of the chunk succeeded.
+
+        Returns:
+            numpy.ndarray: The (len(graphs),) delays in seconds, NaN when a measurement failed.
+        """
+        if self.label == "sta":
+            delays, _ = StaticTiming(LogicalEffort(tau=SECONDS_PER_TAU)).analyze_batch(graphs)
+            return np.asarray(delays, dtype=np.float64)
+
+        name = f"chunk{chunk:06d}_shard"
+        try:
+            delays = self.runner.run([graph.compact for graph in graphs], name)
+        finally:
+            if not self.keep_decks:
+                for path in glob.glob(os.path.join(self.runner.work_dir, f"chunk{chunk:06d}_*")):
+                    os.remove(path)
+        labels = np.array([delays.get(graph.name, np.nan) for graph in graphs], dtype=np.float64)
+        # a chunk without a single delay points at the simulator setup, not at the circuits
+        if len(labels) and np.isnan(labels).all():
+            raise RuntimeError(f"Every measurement of chunk {chunk} failed, check the simulator command and "
+                               f"its output (--keep-decks keeps them in {self.runner.work_dir})")
+        return labels
+
+    def run(self, restart:bool = False, progress = None):
+        """
+        Builds the dataset, resuming the build found in `output`.
+
+        Args:
+            restart (bool, optional): Whether to discard an existing build. Defaults to False.
+            progress (callable, optional): Called with the chunk index and its manifest entry after every chunk.
+
+        Raises:
+            ValueError: If the existing build used another configuration or its dataset does not match its manifest.
+            RuntimeError: If a chunk could not be labeled, it stays pending and a resumed build labels it again.
+
+        Returns:
+            dict: The manifest of the finished build.
+        """
+        os.makedirs(os.path.join(self.output, "labels"), exist_ok=True)
+        if restart and os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        manifest = self.load_manifest()
+        written = 0 if restart else self._recover(manifest)
+        self.save_manifest(manifest)
+
+        chunks = manifest["chunks"]
+        with DatasetWriter(self.dataset_path, append=not restart) as writer:
+            for chunk in range(self.num_chunks):
+                entry = chunks.setdefault(str(chunk), {"stage": "pending"})
+                if entry["stage"] == "written":
+                    continue
+                start, size = self.bounds(chunk)
+                began = time.perf_counter()
+                with stage("pipeline.generate"):
+                    graphs = self.generator.generate(size, start)
+
+                labels_path = self._labels_path(chunk)
+                if entry["stage"] == "labeled" and os.path.exists(labels_path):
+                    labels = np.load(labels_path)
+                else:
+                    with stage("pipeline.label"):
+                        labels = self.label_graphs(graphs, chunk)
+                    np.save(labels_path, labels)
+                    entry.update(stage="labeled", failed=int(np.isnan(labels).sum()))
+                    self.save_manifest(manifest)
+
+                with stage("pipeline.write"):
+                    for graph, label in zip(graphs, labels.tolist()):
+                        writer.add_graph(graph, label)
+                    writer.flush()
+                written += size
+                entry.update(stage="written", start=start, stop=start + size, num_graphs=written,
+                             seconds=round(time.perf_counter() - began, 3))
+                self.save_manifest(manifest)
+                if progress is not None:
+                    progress(chunk, entry)
+        return manifest
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="output directory, holding dataset/, decks/, labels/ and manifest.json")
+    parser.add_argument("--count", type=int, required=True, help="number of circuits")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="circuits per checkpointed chunk")
+    parser.add_argument("--seed", type=int, default=0, help="master seed of the graphs")
+    parser.add_argument("--min-gates", type=int, default=10, help="min_num_of_gates of the graphs")
+    parser.add_argument("--max-gates", type=int, default=20, help="max_num_of_gates of the graphs")
+    parser.add_argument("--max-sizing", type=int, default=50, help="max_sizing of the graphs")
+    parser.add_argument("--topology", choices=("chain", "dag"), default="chain", help="topology of the graphs")
+    parser.add_argument("--label", choices=LABEL_SOURCES, default="simulate",
+                        help="measured delays or static timing estimates")
+    parser.add_argument("--command", help="simulator command, '{deck}' and '{log}' are replaced (default: ngspice)")
+    parser.add_argument("--result-file", default="{log}", help="file holding the measurements, e.g. '{deck}.mt0'")
+    parser.add_argument("--workers", type=int, help="processes and simulators running at once, every core by default")
+    parser.add_argument("--shards", type=int, help="decks per chunk, --workers by default")
+    parser.add_argument("--timeout", type=float, help="seconds after which a simulator run is killed")
+    parser.add_argument("--adaptive", action="store_true", help="size the transient window from estimated delays")
+    parser.add_argument("--hierarchical", action="store_true", help="write .SUBCKT based decks")
+    parser.add_argument("--cache", help="SQLite delay cache, shared by the builds with the same simulator settings")
+    parser.add_argument("--keep-decks", action="store_true", help="keep the decks and simulator output")
+    parser.add_argument("--restart", action="store_true", help="discard an existing build in the output directory")
+    args = parser.parse_args(arguments)
+
+    graph_kwargs = {"min_num_of_gates": args.min_gates, "max_num_of_gates": args.max_gates,
+                    "max_sizing": args.max_sizing, "topology": args.topology}
+    runner = SimulationRunner(shlex.split(args.command) if args.command else None, os.path.join(args.output, "decks"),
+                              args.shards, args.workers, args.result_file, args.timeout,
+                              hierarchical=args.hierarchical, adaptive=args.adaptive)
+    pipeline = DatasetPipeline(args.output, args.count, args.seed, args.chunk_size, graph_kwargs, args.label, runner,
+                               args.workers, args.keep_decks)
+    cache = DelayCache(args.cache, namespace=pipeline.cache_namespace()) if args.cache else None
+    runner.cache = cache
+
+    def progress(chunk:int, entry:dict):
+        print(f"chunk {chunk + 1}/{pipeline.num_chunks}: {entry['num_graphs']} graphs, "
+              f"{entry.get('failed', 0)} failed measurements, {entry['seconds']:.1f} s", flush=True)
+
+    try:
+        pipeline.run(args.restart, progress)
+    except (ValueError, RuntimeError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        if cache is not None:
+            cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
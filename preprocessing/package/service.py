@@ -0,0 +1,285 @@
+"""
+Micro-batched featurization of circuit specifications, the engine behind `app.py`.
+
+Every request carries one circuit in the `gate_dict`/`voltage_dict`/`eos_dict` schema documented in
+`circuit/circuit.py` and gets back its netlist, feature matrix, adjacency list and estimated delay.
+Handling requests one at a time pays the Python and process hand-off overhead per circuit, so
+`MicroBatcher` collects the requests arriving within `max_delay` seconds (at most `max_batch_size`) into
+one call of a batch handler. `CircuitService` plugs `process_batch` into it and runs the batches on a
+process pool: circuits are built as `CompactCircuit` (no `Gate` objects), the delays of a whole batch
+come from one `StaticTiming` pass (in units of the `LogicalEffort` tau) and the responses are JSON
+encoded inside the workers, so that the serving process only moves bytes. Invalid circuits, including
+names that are not plain SPICE identifiers, get an error response, the other circuits of their batch are
+unaffected.
+example:
+with CircuitService(workers=4) as service:
+    status, body = service.submit({"name": "c1", "gate_dict": {...}, "voltage_dict": {...},
+                                   "eos_dict": {...}, "inverting": False}).result()
+    responses = service.process([spec1, spec2, spec3])          # [(status, body), ...]
+"""
+
+import functools
+import json
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .circuit.compact import CompactCircuit
+from .circuit.validation import validate_spec
+from .simulation.delay import LogicalEffort
+from .simulation.sta import StaticTiming
+
+REQUIRED_KEYS = ("gate_dict", "voltage_dict", "eos_dict")
+
+
+def parse_spec(spec:dict):
+    """
+    Builds the circuit of one specification.
+
+    Args:
+        spec (dict): "gate_dict", "voltage_dict" and "eos_dict", optionally "name" (defaults to "circuit")
+            and "inverting" (defaults to False).
+
+    Raises:
+        ValueError: If the specification is incomplete or invalid, listing every error (see `validate_spec`).
+
+    Returns:
+        CompactCircuit: The circuit.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("A circuit specification must be a JSON object")
+    missing = [key for key in REQUIRED_KEYS if key not in spec]
+    if missing:
+        raise ValueError(f"Missing keys: {', '.join(missing)}")
+    name = spec.get("name", "circuit")
+    errors = validate_spec(spec["gate_dict"], spec["voltage_dict"], spec["eos_dict"], spec.get("inverting", False),
+                           name)
+    if errors:
+        raise ValueError("; ".join(errors))
+    try:
+        compact = CompactCircuit.from_dicts(name, spec["gate_dict"], spec["voltage_dict"],
+                                            spec["eos_dict"], bool(spec.get("inverting", False)))
+    except KeyError as error:
+        raise ValueError(f"Missing key {error}") from None
+    except (TypeError, AttributeError, OverflowError) as error:
+        raise ValueError(f"Malformed circuit: {error}") from None
+    if len(compact) == 0:
+        raise ValueError("A circuit needs at least one gate")
+    return compact
+
+
+def process_batch(specs:list, BETA = 2, tau = 1.0):
+    """
+    Featurizes a batch of circuit specifications and JSON encodes the responses.
+    The delays of all valid circuits come from one `StaticTiming.analyze_batch` pass.
+
+    Module level so that it can be pickled by the process pool.
+
+    Args:
+        specs (list): The circuit specifications, see `parse_spec`.
+        BETA (float, optional): Passed to the `LogicalEffort` delay model. Defaults to 2.
+        tau (float, optional): Passed to the `LogicalEffort` delay model, the unit of the delays. Defaults to 1.
+
+    Returns:
+        list: One (HTTP status, JSON body) tuple per specification. The body of a valid circuit holds its
+            name, netlist, feature matrix, adjacency list, delay (null when it is not finite) and critical path
+            (gate names), the body of an invalid one (status 400) an "error".
+    """
+    responses = [None] * len(specs)
+    compacts, positions = [], []
+    for i, spec in enumerate(specs):
+        # whatever is wrong with a specification only fails its own request
+        try:
+            compacts.append(parse_spec(spec))
+            positions.append(i)
+        except Exception as error:
+            responses[i] = (400, json.dumps({"error": str(error)}))
+
+    delays, paths = StaticTiming(LogicalEffort(BETA, tau)).analyze_batch(compacts)
+    for i, compact, delay, path in zip(positions, compacts, delays.tolist(), paths):
+        try:
+            responses[i] = (200, json.dumps({"name": compact.name,
+                                             "netlist": compact.netlist,
+                                             "feature_matrix": compact.make_feature_matrix().tolist(),
+                                             "adjacency_list": compact.make_adjacency_list(),
+                                             "delay": delay if math.isfinite(delay) else None,
+                                             "critical_path": [compact.gate_name(gate) for gate in path]},
+                                            allow_nan=False))
+        except Exception as error:
+            responses[i] = (400, json.dumps({"error": f"Malformed circuit: {error}"}))
+    return responses
+
+
+class MicroBatcher:
+    """
+    Groups items submitted from many threads into batches for one handler call.
+
+    A collector thread waits for the first item, then keeps collecting until the batch is full or
+    `max_delay` seconds have passed, and hands the batch to `handler` (on `executor` when given, so that
+    the next batch is collected while the previous ones run). At most `max_pending` batches run at once;
+    beyond that the collector stops taking items, which pushes back on the submitters.
+
+    Args:
+        handler (callable): Takes a list of items and returns the list of their results, in order.
+        max_batch_size (int, optional): Largest number of items per batch. Defaults to 64.
+        max_delay (float, optional): Seconds the first item of a batch waits for others. Defaults to 0.002.
+        executor (Executor, optional): Runs the batches, e.g. a process pool. Defaults to None, the collector thread.
+        max_pending (int, optional): Largest number of batches running at once. Defaults to 2 per executor worker.
+
+    Raises:
+        ValueError: If max_batch_size or max_pending is smaller than 1, or max_delay is negative.
+    """
+
+    def __init__(self, handler, max_batch_size:int = 64, max_delay:float = 0.002, executor = None, max_pending:int = None):
+        if max_pending is None:
+            max_pending = 2 * getattr(executor, "_max_workers", 1)
+        if max_batch_size < 1 or max_pending < 1:
+            raise ValueError("max_batch_size and max_pending should be at least 1")
+        if max_delay < 0:
+            raise ValueError("max_delay cannot be negative")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.executor = executor
+        self._queue = queue.Queue()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._closed = False
+        self._collector = threading.Thread(target=self.__collect, name="MicroBatcher", daemon=True)
+        self._collector.start()
+
+    def submit(self, item):
+        """
+        Queues an item for the next batch.
+
+        Raises:
+            RuntimeError: If the batcher is closed.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the result of the item.
+        """
+        if self._closed:
+            raise RuntimeError("The batcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __collect(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._queue.put(None)
+                    break
+                batch.append(entry)
+            self._pending.acquire()
+            self.__dispatch(batch)
+
+    def __dispatch(self, batch:list):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        if self.executor is None:
+            result = Future()
+            try:
+                result.set_result(self.handler(items))
+            except Exception as error:
+                result.set_exception(error)
+            self.__resolve(futures, result)
+            return
+        try:
+            result = self.executor.submit(self.handler, items)
+        except Exception as error:
+            result = Future()
+            result.set_exception(error)
+        result.add_done_callback(lambda result: self.__resolve(futures, result))
+
+    def __resolve(self, futures:list, result:Future):
+        self._pending.release()
+        error = result.exception()
+        if error is not None:
+            for future in futures:
+                future.set_exception(error)
+            return
+        for future, value in zip(futures, result.result()):
+            future.set_result(value)
+
+    def close(self):
+        """
+        Processes the queued items and stops the collector thread.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._collector.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CircuitService:
+    """
+    Micro-batched `process_batch` on a process pool.
+
+    Args:
+        workers (int, optional): Number of worker processes. `None` uses every core, 1 processes the batches
+            in the collector thread. Defaults to None.
+        max_batch_size (int, optional): Largest number of circuits per batch. Defaults to 64.
+        max_delay (float, optional): Seconds a circuit waits for others to batch with. Defaults to 0.002.
+        BETA (float, optional): Passed to the `LogicalEffort` delay model. Defaults to 2.
+        tau (float, optional): Passed to the `LogicalEffort` delay model. Defaults to 1.
+    """
+
+    def __init__(self, workers:int = None, max_batch_size:int = 64, max_delay:float = 0.002, BETA = 2, tau = 1.0):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.BETA = BETA
+        self.tau = tau
+        self.executor = ProcessPoolExecutor(self.workers) if self.workers != 1 else None
+        self.batcher = MicroBatcher(functools.partial(process_batch, BETA=BETA, tau=tau), max_batch_size, max_delay,
+                                    self.executor)
+
+    def submit(self, spec:dict):
+        """
+        Queues one circuit specification.
+
+        Returns:
+            concurrent.futures.Future: Resolves to its (HTTP status, JSON body) tuple.
+        """
+        return self.batcher.submit(spec)
+
+    def process(self, specs:list, timeout:float = None):
+        """
+        Processes many circuit specifications, batched with the concurrent requests.
+
+        Returns:
+            list: One (HTTP status, JSON body) tuple per specification.
+        """
+        futures = [self.batcher.submit(spec) for spec in specs]
+        return [future.result(timeout) for future in futures]
+
+    def close(self):
+        """
+        Finishes the queued requests and shuts the worker pool down.
+        """
+        self.batcher.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
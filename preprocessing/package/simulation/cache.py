@@ -0,0 +1,126 @@
+"""
+On-disk cache of measured delays keyed by the canonical hash of a circuit.
+
+`Graph` regularly produces the same gate types and sizings again, and every idealized circuit only
+depends on its gate types, driver and end of sequence, so most simulations repeat earlier ones.
+`DelayCache` stores the delay measured for every `canonical_hash` in an SQLite database and evicts
+the least recently used entries beyond `max_entries`. `SimulationRunner(cache=...)` only simulates misses.
+example:
+cache = DelayCache("delays.sqlite", max_entries=1_000_000, namespace="ngspice 7nm_TT")
+runner = SimulationRunner(work_dir="sim", cache=cache)
+delays = runner.run([graph.circuit for graph in graphs])
+"""
+
+import sqlite3
+import time
+
+import numpy as np
+
+
+class DelayCache:
+    """
+    SQLite backed map from circuit hash to measured delay with least recently used eviction.
+
+    Args:
+        path (str): The database file, created if missing. ":memory:" keeps the cache in memory.
+        max_entries (int, optional): Number of entries kept, the least recently used ones are evicted beyond it.
+            Defaults to None (unbounded).
+        namespace (str, optional): Mixed into every key, so that results of different simulators, models or
+            settings never mix in one file. Defaults to "".
+        store_failures (bool, optional): Whether failed (NaN) measurements are cached too. Defaults to False,
+            so that failed circuits are simulated again.
+    """
+
+    def __init__(self, path:str, max_entries:int = None, namespace:str = "", store_failures:bool = False):
+        self.path = path
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.store_failures = store_failures
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS delays "
+                                 "(key TEXT PRIMARY KEY, delay REAL, last_used REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS delays_last_used ON delays (last_used)")
+        self._connection.commit()
+
+    @staticmethod
+    def key(circuit):
+        """
+        Returns the hash a circuit (`Circuit` or `CompactCircuit`) is cached under.
+        """
+        return circuit.canonical_hash()
+
+    def _keys(self, hashes):
+        return [f"{self.namespace}:{circuit_hash}" for circuit_hash in hashes]
+
+    def get_many(self, hashes:list):
+        """
+        Looks up many hashes at once and marks the hits as recently used.
+
+        Args:
+            hashes (list): Circuit hashes.
+
+        Returns:
+            dict: Hash to delay for the hashes found, NaN for cached failures.
+        """
+        hashes = list(dict.fromkeys(hashes))
+        keys = self._keys(hashes)
+        found = {}
+        # stay below SQLite's limit on the number of query parameters
+        for start in range(0, len(keys), 900):
+            chunk = keys[start:start + 900]
+            rows = self._connection.execute(
+                f"SELECT key, delay FROM delays WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            found.update(rows)
+        now = time.time()
+        self._connection.executemany("UPDATE delays SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        self._connection.commit()
+        return {circuit_hash: np.nan if found[key] is None else found[key]
+                for circuit_hash, key in zip(hashes, keys) if key in found}
+
+    def get(self, circuit_hash:str, default = None):
+        """
+        Returns the cached delay of one hash, `default` when it is missing.
+        """
+        return self.get_many([circuit_hash]).get(circuit_hash, default)
+
+    def put_many(self, delays:dict):
+        """
+        Stores measured delays and evicts the least recently used entries beyond `max_entries`.
+
+        Args:
+            delays (dict): Hash to delay in seconds.
+        """
+        now = time.time()
+        rows = [(key, None if np.isnan(delay) else float(delay), now)
+                for key, delay in zip(self._keys(delays.keys()), delays.values())
+                if self.store_failures or not np.isnan(delay)]
+        self._connection.executemany("INSERT OR REPLACE INTO delays (key, delay, last_used) VALUES (?, ?, ?)", rows)
+        if self.max_entries is not None:
+            self._connection.execute("DELETE FROM delays WHERE key IN "
+                                     "(SELECT key FROM delays ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                                     (self.max_entries,))
+        self._connection.commit()
+
+    def put(self, circuit_hash:str, delay:float):
+        """
+        Stores the measured delay of one hash.
+        """
+        self.put_many({circuit_hash: delay})
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM delays").fetchone()[0]
+
+    def __contains__(self, circuit_hash:str):
+        return self._connection.execute("SELECT 1 FROM delays WHERE key = ?", self._keys([circuit_hash])).fetchone() is not None
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
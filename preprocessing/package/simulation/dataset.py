@@ -0,0 +1,237 @@
+"""
+Packed graph dataset: many graphs in a few contiguous, memory mapped arrays instead of one `.npz` per circuit.
+
+A dataset is a directory holding
+    features.bin        float64 (total nodes, num_features) concatenated feature matrices
+    edges.bin           int64 (total edges, 2) concatenated (input gate, gate) pairs, numbered within their graph
+    node_offsets.bin    int64 (num_graphs + 1,) offsets of every graph into features.bin
+    edge_offsets.bin    int64 (num_graphs + 1,) offsets of every graph into edges.bin
+    labels.bin          float64 label of every graph (the measured delay), NaN when unknown
+    names.txt           name of every graph, one per line
+    meta.json           the committed counts; bytes past them (e.g. from a crashed append) are ignored
+example:
+with DatasetWriter("train") as writer:
+    for graph in graphs:
+        writer.add_graph(graph)
+
+dataset = DatasetReader("train")
+edge_index, feature_matrix, label = dataset[10]
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .graph import Graph
+from ..instrumentation import timed
+
+_ARRAYS = {
+    "features": np.float64,
+    "edges": np.int64,
+    "node_offsets": np.int64,
+    "edge_offsets": np.int64,
+    "labels": np.float64,
+}
+
+
+def _read_meta(path:str):
+    with open(os.path.join(path, "meta.json")) as file:
+        return json.load(file)
+
+
+class DatasetWriter:
+    """
+    Appends graphs to a packed dataset.
+
+    Args:
+        path (str): The dataset directory, created if it does not exist.
+        num_features (int, optional): Number of columns of the feature matrices. Defaults to 5.
+        append (bool, optional): Whether to keep the graphs already in the dataset. Defaults to False,
+            which empties an existing dataset.
+
+    Raises:
+        ValueError: If appending to a dataset with a different number of features.
+    """
+
+    def __init__(self, path:str, num_features:int = 5, append:bool = False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if append and os.path.exists(os.path.join(path, "meta.json")):
+            meta = _read_meta(path)
+            if meta["num_features"] != num_features:
+                raise ValueError(f"Dataset has {meta['num_features']} features, not {num_features}")
+        else:
+            meta = {"num_features": num_features, "num_graphs": 0, "num_nodes": 0, "num_edges": 0}
+        self.num_features = num_features
+        self.num_graphs = meta["num_graphs"]
+        self.num_nodes = meta["num_nodes"]
+        self.num_edges = meta["num_edges"]
+
+        # drop whatever was written after the last committed meta.json
+        lengths = {
+            "features": self.num_nodes * num_features,
+            "edges": self.num_edges * 2,
+            "node_offsets": self.num_graphs + 1,
+            "edge_offsets": self.num_graphs + 1,
+            "labels": self.num_graphs,
+        }
+        self._files = {}
+        for name, dtype in _ARRAYS.items():
+            file = open(os.path.join(path, f"{name}.bin"), "ab")
+            file.truncate(lengths[name] * np.dtype(dtype).itemsize if self.num_graphs else 0)
+            self._files[name] = file
+        if self.num_graphs == 0:
+            self._files["node_offsets"].write(np.int64(0).tobytes())
+            self._files["edge_offsets"].write(np.int64(0).tobytes())
+
+        names_size = 0
+        names_path = os.path.join(path, "names.txt")
+        if self.num_graphs and os.path.exists(names_path):
+            with open(names_path, "rb") as file:
+                for _ in range(self.num_graphs):
+                    names_size += len(file.readline())
+        self._names = open(names_path, "ab")
+        self._names.truncate(names_size)
+        self.flush()
+
+    @timed("dataset.add")
+    def add(self, edge_index, feature_matrix, label:float = np.nan, name:str = None):
+        """
+        Appends one graph.
+
+        Args:
+            edge_index (array_like): The (2, E) edge index, node numbers relative to this graph.
+            feature_matrix (array_like): The (n, num_features) feature matrix.
+            label (float, optional): The label of the graph. Defaults to NaN.
+            name (str, optional): The name of the graph. Defaults to its index in the dataset.
+
+        Raises:
+            ValueError: If the feature matrix does not have `num_features` columns.
+        """
+        feature_matrix = np.ascontiguousarray(feature_matrix, dtype=np.float64)
+        if feature_matrix.ndim != 2 or feature_matrix.shape[1] != self.num_features:
+            raise ValueError(f"Feature matrix must have shape (n, {self.num_features}), not {feature_matrix.shape}")
+        edges = np.ascontiguousarray(np.asarray(edge_index, dtype=np.int64).reshape(2, -1).T)
+
+        self.num_graphs += 1
+        self.num_nodes += len(feature_matrix)
+        self.num_edges += len(edges)
+        self._files["features"].write(feature_matrix.tobytes())
+        self._files["edges"].write(edges.tobytes())
+        self._files["node_offsets"].write(np.int64(self.num_nodes).tobytes())
+        self._files["edge_offsets"].write(np.int64(self.num_edges).tobytes())
+        self._files["labels"].write(np.float64(label).tobytes())
+        self._names.write(f"{self.num_graphs - 1 if name is None else name}\n".encode())
+
+    def add_graph(self, graph, label:float = np.nan):
+        """
+        Appends the edge index and feature matrix of a `Graph`, `Circuit` or `CompactCircuit`.
+
+        Args:
+            graph (Graph or Circuit or CompactCircuit): The graph to append, its name is stored with it.
+            label (float, optional): The label of the graph. Defaults to NaN.
+        """
+        circuit = graph.feature_source if isinstance(graph, Graph) else graph
+        self.add(circuit.make_edge_index(), circuit.make_feature_matrix(), label, graph.name)
+
+    @timed("dataset.flush")
+    def flush(self):
+        """
+        Writes the buffered graphs to disk and commits them in meta.json.
+        """
+        for file in self._files.values():
+            file.flush()
+        self._names.flush()
+        meta = {"num_features": self.num_features, "num_graphs": self.num_graphs,
+                "num_nodes": self.num_nodes, "num_edges": self.num_edges}
+        temporary_path = os.path.join(self.path, "meta.json.tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(temporary_path, os.path.join(self.path, "meta.json"))
+
+    def close(self, commit:bool = True):
+        """
+        Flushes and closes the dataset files.
+
+        Args:
+            commit (bool, optional): Whether to commit the graphs added since the last flush. Defaults to True,
+                otherwise they are dropped the next time the dataset is opened.
+        """
+        if commit:
+            self.flush()
+        for file in self._files.values():
+            file.close()
+        self._names.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # an exception may interrupt a batch of graphs, only what was flushed before it is committed
+        self.close(commit=exc_type is None)
+
+
+class DatasetReader:
+    """
+    Memory maps a packed dataset. Opening it costs the same whatever its size, and every
+    graph is returned as views into the mapped arrays, without copying.
+
+    Args:
+        path (str): The dataset directory.
+
+    Attributes:
+        features (numpy.ndarray): (total nodes, num_features) concatenated feature matrices.
+        edges (numpy.ndarray): (total edges, 2) concatenated edges, numbered within their graph.
+        node_offsets (numpy.ndarray): (num_graphs + 1,) offsets of every graph into `features`.
+        edge_offsets (numpy.ndarray): (num_graphs + 1,) offsets of every graph into `edges`.
+        labels (numpy.ndarray): (num_graphs,) label of every graph.
+    """
+
+    def __init__(self, path:str):
+        self.path = path
+        meta = _read_meta(path)
+        self.num_features = meta["num_features"]
+        self.num_graphs = meta["num_graphs"]
+        self.num_nodes = meta["num_nodes"]
+        self.num_edges = meta["num_edges"]
+        self.features = self.__map("features", (self.num_nodes, self.num_features))
+        self.edges = self.__map("edges", (self.num_edges, 2))
+        self.node_offsets = self.__map("node_offsets", (self.num_graphs + 1,))
+        self.edge_offsets = self.__map("edge_offsets", (self.num_graphs + 1,))
+        self.labels = self.__map("labels", (self.num_graphs,))
+        self._names = None
+
+    def __map(self, name:str, shape:tuple):
+        """
+        Memory maps the committed part of one array file.
+        """
+        dtype = _ARRAYS[name]
+        if np.prod(shape) == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r", shape=shape)
+
+    @property
+    def names(self):
+        """
+        The names of the graphs, read on first access.
+        """
+        if self._names is None:
+            with open(os.path.join(self.path, "names.txt")) as file:
+                self._names = file.read().splitlines()[:self.num_graphs]
+        return self._names
+
+    def __len__(self):
+        return self.num_graphs
+
+    def __getitem__(self, i:int):
+        """
+        Returns the (2, E) edge index, the feature matrix and the label of graph `i`, as views.
+        """
+        if i < 0:
+            i += self.num_graphs
+        if not 0 <= i < self.num_graphs:
+            raise IndexError(f"Graph index {i} out of range for a dataset of {self.num_graphs} graphs")
+        edge_index = self.edges[self.edge_offsets[i]:self.edge_offsets[i+1]].T
+        feature_matrix = self.features[self.node_offsets[i]:self.node_offsets[i+1]]
+        return edge_index, feature_matrix, self.labels[i]
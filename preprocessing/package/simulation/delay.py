@@ -0,0 +1,154 @@
+"""
+Vectorized logical effort delay model, a SPICE free estimate of circuit delays.
+
+Every gate is one stage with delay d = tau * (g * h + p), g being the logical effort of its type,
+p its parasitic delay and h = C_out / C_in its electrical effort. A gate of sizing k presents
+g * k unit inverter capacitances on each of its inputs, so the effort delay g * h reduces to the
+load it drives divided by its own sizing, C_out / k.
+The load of a gate is the sum over the inputs it drives of g * k of the gate owning that input,
+plus the end of sequence inverter (g = 1) for the gate driving it.
+example:
+model = LogicalEffort(BETA=2)
+stage_delays, offsets, total_delays = model.estimate([graph.circuit for graph in graphs])
+types = model.type_codes(graph.gate_list)
+model.chain_delays(types, candidate_sizings, graph.circuit._eos.k)       # (B, n) sizings -> (B,) delays
+"""
+
+import numpy as np
+
+from ..circuit.circuit import Circuit
+from ..circuit.compact import CompactCircuit
+from ..instrumentation import timed
+
+
+class LogicalEffort:
+    """
+    Logical effort delay model of the gates in `Circuit.GATE_CHOICES`.
+
+    Args:
+        BETA (float, optional): Ratio of the pull up to the pull down strength. Defaults to 2.
+        tau (float, optional): Delay of a unit inverter driving an identical one without parasitics, scales every
+            delay (e.g. seconds per unit). Defaults to 1, which returns delays in units of tau.
+    """
+    GATE_CHOICES = Circuit.GATE_CHOICES
+    ARITY = CompactCircuit.ARITY
+
+    def __init__(self, BETA = 2, tau = 1.0):
+        self.BETA = BETA
+        self.tau = tau
+        self.g_coefficients = {
+            "2NAND": (self.BETA + 2)/(self.BETA + 1),
+            "1NOT": (self.BETA + 1)/(self.BETA + 1),
+            "2NOR": (2*self.BETA + 1)/(self.BETA + 1),
+            "2AND": (self.BETA + 2)/(self.BETA + 1),
+            "2OR": (2*self.BETA + 1)/(self.BETA + 1)
+        }
+        self.parasitic_delay_coefficients = {
+            "2NAND": (2*self.BETA + 2)/(self.BETA + 1),
+            "1NOT": (self.BETA + 1)/(self.BETA + 1),
+            "2NOR": (4*self.BETA + 1)/(self.BETA + 1),
+            "2AND": (self.BETA + 1)/(self.BETA + 1),
+            "2OR": (self.BETA + 1)/(self.BETA + 1)
+        }
+        self.g = np.array([self.g_coefficients[gate_type] for gate_type in self.GATE_CHOICES])
+        self.p = np.array([self.parasitic_delay_coefficients[gate_type] for gate_type in self.GATE_CHOICES])
+
+    def type_codes(self, gate_list:list):
+        """
+        Converts gate type names to the type codes the other methods take.
+
+        Args:
+            gate_list (list): Gate types, e.g. `graph.gate_list`.
+
+        Returns:
+            numpy.ndarray: The indices of the types in `GATE_CHOICES`.
+        """
+        return np.array([Circuit.TYPE_CODES[str(gate_type)] for gate_type in gate_list], dtype=np.intp)
+
+    def input_capacitance(self, types, k):
+        """
+        Returns the capacitance of one input of gates of the given types and sizings, in unit inverter inputs.
+        """
+        return self.g[types] * k
+
+    def chain_stage_delays(self, types, k, output_k):
+        """
+        Returns the delay of every stage of chains in which every gate drives all inputs of the next one
+        (the chains `Graph` generates) and the last gate drives the end of sequence.
+
+        Args:
+            types (array_like): (..., n) gate type codes.
+            k (array_like): (..., n) sizings, broadcast against `types`, e.g. (B, n) candidate sizings of one chain.
+            output_k (int or array_like): Sizing of the end of sequence, broadcast against the leading dimensions.
+
+        Returns:
+            numpy.ndarray: (..., n) stage delays.
+        """
+        types = np.asarray(types, dtype=np.intp)
+        k = np.asarray(k, dtype=np.float64)
+        types, k = np.broadcast_arrays(types, k)
+        load = np.empty(k.shape)
+        load[..., :-1] = self.ARITY[types[..., 1:]] * self.input_capacitance(types[..., 1:], k[..., 1:])
+        load[..., -1] = output_k
+        return self.tau * (load / k + self.p[types])
+
+    def chain_delays(self, types, k, output_k):
+        """
+        Returns the total delay of chains, see `chain_stage_delays`.
+
+        Returns:
+            numpy.ndarray: The (...,) summed stage delays.
+        """
+        return self.chain_stage_delays(types, k, output_k).sum(axis=-1)
+
+    @staticmethod
+    def _as_compact(item):
+        """
+        Returns the `CompactCircuit` of a `Graph`, `Circuit` or `CompactCircuit`.
+        """
+        if isinstance(item, CompactCircuit):
+            return item
+        return CompactCircuit.from_circuit(item) if isinstance(item, Circuit) else item.compact
+
+    @timed("delay.estimate")
+    def estimate(self, circuits:list):
+        """
+        Estimates the delay of many circuits at once.
+
+        The stage delays account for every fanout of every gate. The total is the sum of the stage delays,
+        which is the delay from the drivers to the end of sequence for chains.
+
+        Args:
+            circuits (list): `Graph`, `Circuit` or `CompactCircuit` objects.
+
+        Returns:
+            tuple: The flat stage delays of all gates, the (len(circuits) + 1,) offsets of every circuit into them
+                   and the (len(circuits),) total delays.
+        """
+        compacts = [self._as_compact(item) for item in circuits]
+        counts = np.array([len(compact) for compact in compacts], dtype=np.int64)
+        offsets = np.zeros(len(compacts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if offsets[-1] == 0:
+            return np.zeros(0), offsets, np.zeros(len(compacts))
+
+        types = np.concatenate([compact.types for compact in compacts]).astype(np.intp)
+        k = np.concatenate([compact.k for compact in compacts]).astype(np.float64)
+        pins = np.concatenate([np.diff(compact.fanin_ptr) for compact in compacts])
+        fanin = np.concatenate([compact.fanin_idx for compact in compacts]).astype(np.int64)
+        # gate numbers become global, voltage sources stay negative
+        fanin_offsets = np.repeat(np.repeat(offsets[:-1], counts), pins)
+        destination = np.repeat(np.arange(offsets[-1]), pins)
+        driven_by_gate = fanin >= 0
+
+        load = np.zeros(offsets[-1])
+        np.add.at(load, fanin[driven_by_gate] + fanin_offsets[driven_by_gate],
+                  self.input_capacitance(types, k)[destination[driven_by_gate]])
+        eos_gates = offsets[:-1] + np.array([compact.eos_gate for compact in compacts])
+        np.add.at(load, eos_gates, [compact.eos_k for compact in compacts])
+
+        stage_delays = self.tau * (load / k + self.p[types])
+        total_delays = np.zeros(len(compacts))
+        non_empty = counts > 0
+        total_delays[non_empty] = np.add.reduceat(stage_delays, offsets[:-1][non_empty])
+        return stage_delays, offsets, total_delays
@@ -0,0 +1,67 @@
+"""
+Batched feature extraction over many circuits.
+
+`stack_feature_matrices` turns a list of `Graph`, `Circuit` or `CompactCircuit` objects into one
+stacked feature array in a single pass, the rows of circuit i being features[offsets[i]:offsets[i+1]].
+example:
+graphs = [Graph(f"circuit{i}", 30, 50) for i in range(1, 1001)]
+features, offsets = stack_feature_matrices(graphs)
+features[offsets[9]:offsets[10]]          # == graphs[9].circuit.make_feature_matrix()
+"""
+
+import numpy as np
+
+from .graph import Graph
+from ..instrumentation import timed
+
+
+def _as_circuit(item):
+    """
+    Returns the circuit to featurize for a `Graph`, `Circuit` or `CompactCircuit`.
+    """
+    return item.feature_source if isinstance(item, Graph) else item
+
+
+@timed("features.stack")
+def stack_feature_matrices(items:list):
+    """
+    Builds the feature matrices of many circuits at once.
+
+    Every row is [gate_number, type_of_gate, overall_input_cap, overall_output_cap, sizing_of_gate],
+    exactly as `Circuit.make_feature_matrix` returns it for that circuit.
+
+    Args:
+        items (list): `Graph`, `Circuit` or `CompactCircuit` objects.
+
+    Returns:
+        tuple: The stacked (total number of gates, 5) feature array and the (len(items) + 1,) offsets array.
+    """
+    numbers, types, sizes, eos_sizes = [], [], [], []
+    for item in items:
+        gate_numbers, type_codes, gate_sizes, eos_k = _as_circuit(item).feature_columns()
+        numbers.append(gate_numbers)
+        types.append(type_codes)
+        sizes.append(gate_sizes)
+        eos_sizes.append(eos_k)
+
+    counts = np.array([len(gate_numbers) for gate_numbers in numbers], dtype=np.int64)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    features = np.zeros((offsets[-1], 5))
+    if offsets[-1] == 0:
+        return features, offsets
+
+    numbers = np.concatenate(numbers).astype(np.int64)
+    sizes = np.concatenate(sizes)
+    non_empty = counts > 0
+    first_sizes = sizes[offsets[:-1][non_empty]]
+    start = np.repeat(offsets[:-1], counts)
+    # gate numbers are relative to their circuit
+    rows = start + numbers
+
+    features[rows, 0] = numbers
+    features[rows, 1] = np.concatenate(types)
+    features[rows, 2] = np.repeat(first_sizes, counts[non_empty])
+    features[rows, 3] = np.repeat(np.asarray(eos_sizes)[non_empty], counts[non_empty])
+    features[rows, 4] = sizes
+    return features, offsets
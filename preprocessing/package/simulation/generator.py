@@ -0,0 +1,150 @@
+"""
+Bulk, seed-reproducible generation of `Graph` objects.
+
+Every graph gets its own random stream derived from a master seed and the graph's index,
+so graph `i` is identical no matter how many workers build the dataset or in which order
+the chunks finish.
+example:
+generator = GraphGenerator(seed=42, workers=8, max_num_of_gates=30, max_sizing=50)
+graphs = generator.generate(1000)                      # circuit1 ... circuit1000
+for chunk in generator.iter_chunks(1_000_000, transform=Graph.make_adjacency_list_and_feature_matrix):
+    ...
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .graph import Graph
+
+
+def _build_chunk(generator, start:int, stop:int, transform):
+    """
+    Builds the graphs `start` ... `stop - 1` inside a worker process.
+
+    Module level so that it can be pickled by the process pool.
+    """
+    return [generator.make_graph(index, transform) for index in range(start, stop)]
+
+
+class GraphGenerator:
+    """
+    Generates many `Graph` objects from a single master seed, optionally across a process pool.
+
+    Args:
+        seed (int): The master seed. Graph `i` draws from the stream `SeedSequence(seed, spawn_key=(i,))`.
+        name_format (str, optional): Format string for the graph names, filled with the graph index. Defaults to "circuit{}".
+        workers (int, optional): Number of worker processes. `None` uses every core, 1 builds in-process. Defaults to None.
+        chunk_size (int, optional): Number of graphs built per task handed to a worker. Defaults to 256.
+        params (callable, optional): Called with the graph index, returns extra keyword arguments for that `Graph`
+            (e.g. a chain length depending on the index). Must be picklable when `workers != 1`.
+        **graph_kwargs: Keyword arguments passed to every `Graph` (max_num_of_gates, max_sizing, BETA, min_num_of_gates).
+    """
+
+    def __init__(self, seed:int, name_format:str = "circuit{}", workers:int = None, chunk_size:int = 256, params = None, **graph_kwargs):
+        if chunk_size < 1:
+            raise ValueError("chunk_size should be at least 1")
+        self.seed = seed
+        self.name_format = name_format
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.params = params
+        self.graph_kwargs = graph_kwargs
+
+    def rng(self, index:int):
+        """
+        Returns the independent random stream of the graph with the given index.
+
+        Args:
+            index (int): The index of the graph.
+
+        Returns:
+            numpy.random.RandomState: The random state used to build that graph.
+        """
+        seed_sequence = np.random.SeedSequence(self.seed, spawn_key=(index,))
+        return np.random.RandomState(np.random.MT19937(seed_sequence))
+
+    def make_graph(self, index:int, transform = None):
+        """
+        Builds the graph with the given index.
+
+        Args:
+            index (int): The index of the graph, also used to fill `name_format`.
+            transform (callable, optional): Applied to the graph before it is returned.
+
+        Returns:
+            Graph: The generated graph, or `transform(graph)` when a transform is given.
+        """
+        kwargs = dict(self.graph_kwargs)
+        if self.params is not None:
+            kwargs.update(self.params(index))
+        graph = Graph(self.name_format.format(index), rng=self.rng(index), **kwargs)
+        return graph if transform is None else transform(graph)
+
+    def iter_chunks(self, count:int, start:int = 1, transform = None):
+        """
+        Yields the graphs `start` ... `start + count - 1` in order, one list per chunk.
+
+        At most two chunks per worker are in flight, so memory stays bounded however large `count` is.
+
+        Args:
+            count (int): Number of graphs to build.
+            start (int, optional): Index of the first graph. Defaults to 1.
+            transform (callable, optional): Applied to every graph inside the worker, e.g. to return only the
+                feature matrices instead of whole graphs. Must be picklable when `workers != 1`.
+
+        Yields:
+            list: The graphs (or transformed graphs) of one chunk.
+        """
+        bounds = [(lo, min(lo + self.chunk_size, start + count)) for lo in range(start, start + count, self.chunk_size)]
+        if self.workers == 1 or len(bounds) <= 1:
+            for lo, hi in bounds:
+                yield _build_chunk(self, lo, hi, transform)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            bounds = iter(bounds)
+
+            def submit_next():
+                bound = next(bounds, None)
+                if bound is not None:
+                    pending.append(executor.submit(_build_chunk, self, *bound, transform))
+
+            for _ in range(2 * self.workers):
+                submit_next()
+            while pending:
+                chunk = pending.popleft().result()
+                submit_next()
+                yield chunk
+
+    def iter_graphs(self, count:int, start:int = 1, transform = None):
+        """
+        Yields the graphs `start` ... `start + count - 1` one at a time, in order.
+
+        Args:
+            count (int): Number of graphs to build.
+            start (int, optional): Index of the first graph. Defaults to 1.
+            transform (callable, optional): Applied to every graph inside the worker.
+
+        Yields:
+            Graph: The generated graphs (or transformed graphs).
+        """
+        for chunk in self.iter_chunks(count, start, transform):
+            yield from chunk
+
+    def generate(self, count:int, start:int = 1, transform = None):
+        """
+        Builds the graphs `start` ... `start + count - 1`.
+
+        Args:
+            count (int): Number of graphs to build.
+            start (int, optional): Index of the first graph. Defaults to 1.
+            transform (callable, optional): Applied to every graph inside the worker.
+
+        Returns:
+            list: The generated graphs (or transformed graphs), in index order.
+        """
+        return list(self.iter_graphs(count, start, transform))
@@ -1,21 +1,114 @@
 
 import numpy as np
 from ..circuit.circuit import Circuit
+from ..circuit.compact import CompactCircuit
 from ..circuit.gate import Gate
+from .delay import LogicalEffort
+from ..instrumentation import timed, stage
 
 class Graph:
     GATE_CHOICES = ["2NAND", "1NOT", "2NOR", "2AND", "2OR"]
     INVERTING_GATES = ["1NOT", "2NAND", "2NOR"]
     NON_INVERTING_GATES = ["2AND", "2OR"]
-    def __init__(self, name, max_num_of_gates = 20, max_sizing = 50, BETA = 2, min_num_of_gates = 10):
+    TOPOLOGIES = ["chain", "dag"]
+    @timed("graph.init")
+    def __init__(self, name, max_num_of_gates = 20, max_sizing = 50, BETA = 2, min_num_of_gates = 10, rng = None,
+                 topology = "chain", depth = None, max_fanout = 3, lazy = False):
+        """
+        rng : `numpy.random.RandomState` source of the random draws. Defaults to the global
+              `np.random` state, pass a dedicated stream to make the graph reproducible
+              independently of anything else drawing random numbers (see `GraphGenerator`).
+        topology : `str` "chain" (every gate drives all inputs of the next one) or "dag" (gates
+              in `depth` levels, input 0 of every gate driven from the previous level, the other
+              inputs from any earlier level, giving multi-fanout and reconvergent paths).
+        depth : `int` number of levels of a "dag", at most the number of gates. Defaults to a third of the gates.
+        max_fanout : `int` preferred maximum number of inputs a gate of a "dag" drives. Inputs other than input 0
+              are redrawn a few times while they exceed it.
+        lazy : `bool` keep only the sampled parameters (gate_list, gate_sizes, driver_sizes, eos_k and the
+              connections) and build `circuit`, `idealized_circuit` and `ideal_weights` on first access.
+              The matrices of a lazy graph come from `compact`, without any `Gate` object or netlist,
+              which suits feature only workloads. The random draws, and so the graph, are the same either way.
+        The delay is measured from v1 through input 0 of every gate to the last gate, which drives
+        the end of sequence; `inverting` and the idealized weights refer to that path.
+        """
         self.name = name
         self.BETA = BETA
+        rng = np.random if rng is None else rng
         if max_num_of_gates < min_num_of_gates:
             raise ValueError("max_num_of_gates should be greater than min_num_of_gates")
-        self.max_num_of_gates = np.random.randint(min_num_of_gates, max_num_of_gates)
+        if topology not in self.TOPOLOGIES:
+            raise ValueError(f"Invalid topology: {topology}. Valid topologies are: {', '.join(self.TOPOLOGIES)}")
+        self.topology = topology
+        self.depth = depth
+        self.max_fanout = max_fanout
+        self.max_num_of_gates = rng.randint(min_num_of_gates, max_num_of_gates)
         self.max_sizing = max_sizing
-        self.circuit = self.__make_circuit()
+        self._circuit = None
+        self._idealized_circuit = None
+        self._ideal_weights = None
+        self._compact = None
+        self.__sample(rng)
+        if not lazy:
+            self._circuit = self.__build_circuit(self.gate_sizes)
+            self._idealized_circuit = self.__build_circuit(self.ideal_weights)
+
+    @property
+    def circuit(self):
+        """The `Circuit` of the sampled sizings, built on first access."""
+        if self._circuit is None:
+            self._circuit = self.__build_circuit(self.gate_sizes)
+        return self._circuit
+
+    @property
+    def idealized_circuit(self):
+        """The `Circuit` sized with `ideal_weights`, built on first access."""
+        if self._idealized_circuit is None:
+            self._idealized_circuit = self.__build_circuit(self.ideal_weights)
+        return self._idealized_circuit
+
+    @property
+    def ideal_weights(self):
+        """The idealized sizings: `idealized_weights` along the measured path, the sampled sizings elsewhere."""
+        if self._ideal_weights is None:
+            path_gates = [self.gate_list[i] for i in self.critical_path]
+            path_weights = self.idealized_weights(path_gates, self.driver_sizes[0], self.eos_k)
+            if self.topology == "dag":
+                self._ideal_weights = np.array(self.gate_sizes, dtype=float)
+                self._ideal_weights[self.critical_path] = path_weights
+            else:
+                self._ideal_weights = path_weights
+        return self._ideal_weights
+
+    @property
+    def compact(self):
+        """The `CompactCircuit` of the graph. Derived from `circuit` once it is built, so that in-place edits
+        show, otherwise built straight from the sampled parameters and cached.
+        """
+        if self._circuit is not None:
+            return CompactCircuit.from_circuit(self._circuit)
+        if self._compact is None:
+            n = len(self.gate_list)
+            types = np.array([Circuit.TYPE_CODES[gate] for gate in self.gate_list], dtype=np.intp)
+            pins = CompactCircuit.ARITY[types]
+            fanin_ptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(pins, out=fanin_ptr[1:])
+            if self._inputs is None:
+                # a chain: gate 0 is driven by the voltage sources, every other gate by the gate before it
+                fanin_idx = np.repeat(np.arange(-1, n - 1), pins)
+                fanin_idx[:pins[0]] = -np.arange(1, pins[0] + 1)
+            else:
+                fanin_idx = [idx for inputs in self._inputs for idx in inputs]
+            self._compact = CompactCircuit(self.name, types, self.gate_sizes, fanin_ptr, fanin_idx,
+                                           np.zeros(len(self.drivers), dtype=bool), self.driver_sizes[:len(self.drivers)],
+                                           self.eos_k, n - 1, 10, self.inverting)
+        return self._compact
+
+    @property
+    def feature_source(self):
+        """What the matrices are computed from: `circuit` once it is built, `compact` before."""
+        return self._circuit if self._circuit is not None else self.compact
 
+    @timed("graph.idealized_weights")
     def idealized_weights(self, gate_list:list, input_cap:int, output_cap:int):
         """This function implements Linear delay model to calculate 
         the weights of gates for minimum propagation delay.
@@ -28,22 +121,7 @@ class Graph:
         input_cap : `int` input capacitance of the circuit's driver
         output_cap : `int` output capacitance of the circuit's load
         """
-        g_coeffecients = {
-            "2NAND": (self.BETA + 2)/(self.BETA + 1),
-            "1NOT": (self.BETA + 1)/(self.BETA + 1),
-            "2NOR": (2*self.BETA + 1)/(self.BETA + 1),
-            "2AND": (self.BETA + 2)/(self.BETA + 1),
-            "2OR": (2*self.BETA + 1)/(self.BETA + 1)
-
-        }
-        # Not used in this particular implementation but maybe used in future. idk
-        # parasitic_delay_coeffecients = {
-        #     "2NAND": (2*self.BETA + 2)/(self.BETA + 1),
-        #     "1NOT": (self.BETA + 1)/(self.BETA + 1),
-        #     "2NOR": (4*self.BETA + 1)/(self.BETA + 1),
-        #     "2AND": (self.BETA + 1)/(self.BETA + 1),
-        #     "2OR": (self.BETA + 1)/(self.BETA + 1)
-        # }
+        g_coeffecients = LogicalEffort(self.BETA).g_coefficients
         H, G= \
             output_cap/input_cap, \
             np.prod([g_coeffecients[gate_idx] for gate_idx in gate_list]) 
@@ -64,60 +142,133 @@ class Graph:
 
 
     def make_adjacency_list_and_feature_matrix(self):
-        return np.array(self.circuit.make_adjacency_list()).T, self.circuit.make_feature_matrix()
+        source = self.feature_source
+        return np.array(source.make_adjacency_list()).T, source.make_feature_matrix()
 
     def make_graph_matrices(self):
-        return self.circuit.make_adjacency_matrix(), self.circuit.make_feature_matrix()
+        source = self.feature_source
+        return source.make_adjacency_matrix(), source.make_feature_matrix()
     
+    @timed("graph.save")
     def save_adjacency_list_and_feature_matrix(self, file_path):
         adj_list, feature_matrix = self.make_adjacency_list_and_feature_matrix()
-        np.savez(file_path, adj_list=adj_list, feature_matrix=feature_matrix)
+        with stage("graph.savez"):
+            np.savez(file_path, adj_list=adj_list, feature_matrix=feature_matrix)
 
+    @timed("graph.save")
     def save_graph_matrices(self, file_path):
         adj_matrix, feature_matrix = self.make_graph_matrices()
-        np.savez(file_path, adj_matrix=adj_matrix, feature_matrix=feature_matrix)
+        with stage("graph.savez"):
+            np.savez(file_path, adj_matrix=adj_matrix, feature_matrix=feature_matrix)
 
-    def __make_circuit(self):
-        self.gate_list = list(np.random.choice(self.GATE_CHOICES, self.max_num_of_gates))
-        self.gate_sizes = np.random.randint(1, self.max_sizing, self.max_num_of_gates)
-        self.drivers = [f"v{i+1}" for i in range(int(self.gate_list[0][0]))]
-        self.driver_sizes = np.random.randint(1, self.max_sizing, len(self.drivers))
-
-        gate_dict, driver_dict, eos_dict = {}, {}, {}
-        ideal_gate_dict, ideal_driver_dict, ideal_eos_dict = {}, {}, {}
+    def make_edge_index_and_feature_matrix(self):
+        """Returns the (2, E) COO edge index and the feature matrix of the circuit.
+        Unlike `make_adjacency_list_and_feature_matrix` the edge index keeps its (2, 0) shape for a circuit without edges.
+        """
+        source = self.feature_source
+        return source.make_edge_index(), source.make_feature_matrix()
 
-        eos_dict["k"] = np.random.randint(1, self.max_sizing)
-        eos_dict["input_gate"] = f"gate{len(self.gate_list)}"
-        eos_dict["capacitance"] = 10
+    def make_sparse_graph_matrices(self):
+        """Sparse equivalent of `make_graph_matrices`: the signed adjacency as a
+        (indptr, indices, data) CSR tuple and the feature matrix of the circuit.
+        """
+        source = self.feature_source
+        return source.make_signed_adjacency_csr(), source.make_feature_matrix()
 
-        ideal_eos_dict["k"] = eos_dict["k"]
-        ideal_eos_dict["input_gate"] = f"gate{len(self.gate_list)}"
-        ideal_eos_dict["capacitance"] = 10
-        self.ideal_weights = self.idealized_weights(self.gate_list, self.driver_sizes[0], eos_dict["k"])
+    @timed("graph.save")
+    def save_edge_index_and_feature_matrix(self, file_path):
+        edge_index, feature_matrix = self.make_edge_index_and_feature_matrix()
+        with stage("graph.savez"):
+            np.savez(file_path, edge_index=edge_index, feature_matrix=feature_matrix)
 
+    @timed("graph.save")
+    def save_sparse_graph_matrices(self, file_path):
+        """Saves the signed CSR adjacency as adj_indptr, adj_indices, adj_data and adj_shape next to the
+        feature matrix, `load_sparse_graph_matrices` reads them back.
+        """
+        (indptr, indices, data), feature_matrix = self.make_sparse_graph_matrices()
+        with stage("graph.savez"):
+            np.savez(file_path, adj_indptr=indptr, adj_indices=indices, adj_data=data,
+                     adj_shape=np.array([len(feature_matrix), len(feature_matrix)]), feature_matrix=feature_matrix)
 
+    @staticmethod
+    def load_sparse_graph_matrices(file_path):
+        """Loads a file written by `save_sparse_graph_matrices`.
+        Returns the (indptr, indices, data) CSR tuple, the adjacency shape and the feature matrix.
+        """
+        with np.load(file_path) as data:
+            return (data["adj_indptr"], data["adj_indices"], data["adj_data"]), tuple(data["adj_shape"].tolist()), data["feature_matrix"]
 
-        for i in range(len(self.gate_list)):
-            gate_dict[f"gate{i+1}"] = {"type":self.gate_list[i], "k":int(self.gate_sizes[i]), "input_components" : [f"gate{i}" for _ in range(int(self.gate_list[i][0]))] if i > 0 else self.drivers} 
-            ideal_gate_dict[f"gate{i+1}"] = {"type":self.gate_list[i], "k":int(self.ideal_weights[i]), "input_components" : [f"gate{i}" for _ in range(int(self.gate_list[i][0]))] if i > 0 else self.drivers}
+    def __sample(self, rng):
+        with stage("graph.draws"):
+            self.gate_list = list(rng.choice(self.GATE_CHOICES, self.max_num_of_gates))
+            self.gate_sizes = rng.randint(1, self.max_sizing, self.max_num_of_gates)
+            self.drivers = [f"v{i+1}" for i in range(int(self.gate_list[0][0]))]
+            self.driver_sizes = rng.randint(1, self.max_sizing, len(self.drivers))
+        self.eos_k = rng.randint(1, self.max_sizing)
 
-        for i in range(len(self.drivers)):
-            driver_dict[f"v{i+1}"] = {"ideal":False, "k":int(self.driver_sizes[i])}
-            ideal_driver_dict[f"v{i+1}"] = {"ideal":False, "k":int(self.driver_sizes[i])}
-        
-        # count number of invering gates in gate list
+        # inputs of every gate as gate numbers, -(j+1) for voltage source j; None for a chain
+        self._inputs = None
+        if self.topology == "dag":
+            self.__sample_dag(rng)
+        else:
+            self.critical_path = list(range(len(self.gate_list)))
 
+        path_gates = [self.gate_list[i] for i in self.critical_path]
+        self.num_inverting_gates = len([gate for gate in path_gates if gate in self.INVERTING_GATES])
+        self.inverting = True if self.num_inverting_gates % 2 else False
 
+    def __sample_dag(self, rng):
+        n = len(self.gate_list)
+        depth = min(max(self.depth if self.depth is not None else n // 3, 1), n)
+        # every level gets at least one gate, the last level only the output gate
+        if depth > 1:
+            cuts = np.sort(rng.choice(np.arange(1, n - 1), depth - 2, replace=False)) if depth > 2 else np.array([], dtype=int)
+            bounds = np.concatenate([[0], cuts, [n - 1, n]]).astype(int)
+        else:
+            bounds = np.array([0, n])
+        self.drivers = ["v1", "v2"]
+        self.driver_sizes = np.concatenate([self.driver_sizes, rng.randint(1, self.max_sizing, 2 - len(self.driver_sizes))])
 
-        self.num_inverting_gates = len([gate for gate in self.gate_list if gate in self.INVERTING_GATES])
-        self.inverting = True if self.num_inverting_gates % 2  else False
+        inputs, fanout = [], np.zeros(n, dtype=int)
+        for level in range(len(bounds) - 1):
+            for i in range(bounds[level], bounds[level + 1]):
+                arity = int(self.gate_list[i][0])
+                if level == 0:
+                    inputs.append([-(j + 1) for j in range(arity)])
+                    continue
+                gate_inputs = [int(rng.randint(bounds[level - 1], bounds[level]))]
+                for _ in range(arity - 1):
+                    # a few draws among the earlier gates, preferring the ones below max_fanout
+                    for _ in range(8):
+                        candidate = int(rng.randint(0, bounds[level]))
+                        if fanout[candidate] < self.max_fanout:
+                            break
+                    gate_inputs.append(candidate)
+                np.add.at(fanout, gate_inputs, 1)
+                inputs.append(gate_inputs)
+        self._inputs = inputs
 
+        # the measured path: back from the output gate through input 0 of every gate
+        path, gate = [], n - 1
+        while gate >= 0:
+            path.append(gate)
+            gate = inputs[gate][0]
+        self.critical_path = path[::-1]
 
-        self.circuit = Circuit(self.name, gate_dict, driver_dict, eos_dict, self.inverting)
-        self.idealized_circuit = Circuit(self.name, ideal_gate_dict, ideal_driver_dict, ideal_eos_dict, self.inverting)
+    def __input_components(self, i:int):
+        if self._inputs is None:
+            return [f"gate{i}" for _ in range(int(self.gate_list[i][0]))] if i > 0 else list(self.drivers)
+        return [f"gate{j+1}" if j >= 0 else self.drivers[-j - 1] for j in self._inputs[i]]
 
-        return self.circuit
-    
+    def __build_circuit(self, sizes):
+        """Builds the `Circuit` of the sampled topology with the given gate sizings."""
+        gate_dict = {f"gate{i+1}": {"type": self.gate_list[i], "k": int(sizes[i]), "input_components": self.__input_components(i)}
+                     for i in range(len(self.gate_list))}
+        driver_dict = {self.drivers[i]: {"ideal": False, "k": int(self.driver_sizes[i])} for i in range(len(self.drivers))}
+        eos_dict = {"k": self.eos_k, "input_gate": f"gate{len(self.gate_list)}", "capacitance": 10}
+        # valid by construction
+        return Circuit(self.name, gate_dict, driver_dict, eos_dict, self.inverting, trusted=True)
 
     def __repr__(self):
         return f"{self.name}: {self.circuit}"
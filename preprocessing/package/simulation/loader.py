@@ -0,0 +1,243 @@
+"""
+Framework agnostic mini-batches of circuit graphs.
+
+`GraphLoader` turns many graphs into `Batch` objects ready for a GNN: the graphs of a batch are one
+block-diagonal graph, its edge index shifted by the node offset of every graph (optionally with one self
+loop per node, appended after the edges like `dgl.add_self_loop` does), the feature matrices stacked and
+a membership vector giving the graph of every node, all built with a few vectorized NumPy operations per
+batch. The graphs come from
+    a `DatasetReader`                                   rows gathered straight from the memory mapped arrays
+    a list of `Graph`, `Circuit` or `CompactCircuit`    featurized when their batch is built
+Background threads build the next `prefetch` batches while the current one is being used, so the training
+loop does not wait on featurization. Node labels can be one-hot encoded from a feature column
+(e.g. the sizing, classes 1 ... num_classes).
+example:
+loader = GraphLoader(DatasetReader("train"), batch_size=64, shuffle=True, self_loops=True, seed=0)
+for batch in loader:
+    graph = dgl.graph((batch.edge_index[0], batch.edge_index[1]), num_nodes=batch.num_nodes)
+    graph.ndata["x"] = torch.from_numpy(batch.features)
+    readout = torch_scatter.scatter_mean(h, torch.from_numpy(batch.graph_index), dim=0)
+loader = GraphLoader(graphs, labels=delays, batch_size=32, one_hot_column=4, num_classes=50)
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .dataset import DatasetReader
+from .features import stack_feature_matrices, _as_circuit
+from .sta import _gather_ranges
+from ..instrumentation import timed
+
+
+def one_hot(values, num_classes:int, first:int = 1):
+    """
+    One-hot encodes integer values `first` ... `first + num_classes - 1`.
+
+    Raises:
+        ValueError: If a value is out of range.
+
+    Returns:
+        numpy.ndarray: The (len(values), num_classes) float32 encoding.
+    """
+    classes = np.asarray(values).astype(np.int64) - first
+    if classes.size and (classes.min() < 0 or classes.max() >= num_classes):
+        raise ValueError(f"Values must lie between {first} and {first + num_classes - 1}")
+    encoded = np.zeros((len(classes), num_classes), dtype=np.float32)
+    encoded[np.arange(len(classes)), classes] = 1
+    return encoded
+
+
+class Batch:
+    """
+    Several graphs collated into one block-diagonal graph.
+
+    Attributes:
+        edge_index (numpy.ndarray): (2, E) int64 edges between the batch's node numbers, self loops last.
+        features (numpy.ndarray): (num_nodes, num_features) stacked feature matrices.
+        graph_index (numpy.ndarray): (num_nodes,) int64 position in the batch of the graph of every node.
+        node_offsets (numpy.ndarray): (num_graphs + 1,) first node of every graph.
+        labels (numpy.ndarray): (num_graphs,) label of every graph, NaN when unknown.
+        indices (numpy.ndarray): (num_graphs,) index of every graph in the loader's source.
+        node_labels (numpy.ndarray): (num_nodes, num_classes) one-hot node labels, or None.
+    """
+
+    def __init__(self, edge_index, features, graph_index, node_offsets, labels, indices, node_labels = None):
+        self.edge_index = edge_index
+        self.features = features
+        self.graph_index = graph_index
+        self.node_offsets = node_offsets
+        self.labels = labels
+        self.indices = indices
+        self.node_labels = node_labels
+
+    @property
+    def num_graphs(self):
+        return len(self.node_offsets) - 1
+
+    @property
+    def num_nodes(self):
+        return len(self.features)
+
+    def as_dict(self):
+        """
+        Returns the arrays of the batch by name, e.g. to convert them all with `torch.from_numpy`.
+        """
+        arrays = {"edge_index": self.edge_index, "features": self.features, "graph_index": self.graph_index,
+                  "node_offsets": self.node_offsets, "labels": self.labels, "indices": self.indices}
+        if self.node_labels is not None:
+            arrays["node_labels"] = self.node_labels
+        return arrays
+
+    def __repr__(self):
+        return f"Batch(num_graphs={self.num_graphs}, num_nodes={self.num_nodes}, num_edges={self.edge_index.shape[1]})"
+
+
+class GraphLoader:
+    """
+    Iterates over mini-batches of graphs, built ahead of time by background threads.
+
+    Args:
+        source (DatasetReader or list): A packed dataset, or `Graph`, `Circuit` or `CompactCircuit` objects.
+        labels (array_like, optional): (len(source),) graph labels of a list source. Defaults to NaN, a
+            `DatasetReader` has its own.
+        batch_size (int, optional): Number of graphs per batch. Defaults to 32.
+        shuffle (bool, optional): Whether to visit the graphs in a new random order every epoch. Defaults to False.
+        seed (int, optional): Seed of the shuffling, epoch e uses `SeedSequence(seed, spawn_key=(e,))`. Defaults to None.
+        drop_last (bool, optional): Whether to drop the last batch when it is smaller than batch_size. Defaults to False.
+        self_loops (bool, optional): Whether to add one self loop per node. Defaults to False.
+        dtype (numpy.dtype, optional): Type of the features. Defaults to float32.
+        one_hot_column (int, optional): Feature column one-hot encoded into `node_labels`. Defaults to None.
+        num_classes (int, optional): Number of classes of `node_labels`, values 1 ... num_classes. Defaults to 50.
+        prefetch (int, optional): Number of batches built ahead, 0 builds them on demand. Defaults to 2.
+        workers (int, optional): Number of threads building batches. Defaults to 1.
+
+    Raises:
+        ValueError: If batch_size is smaller than 1 or the labels do not match the graphs.
+    """
+
+    def __init__(self, source, labels = None, batch_size:int = 32, shuffle:bool = False, seed:int = None,
+                 drop_last:bool = False, self_loops:bool = False, dtype = np.float32, one_hot_column:int = None,
+                 num_classes:int = 50, prefetch:int = 2, workers:int = 1):
+        if batch_size < 1:
+            raise ValueError("batch_size should be at least 1")
+        self.source = source
+        if isinstance(source, DatasetReader):
+            if labels is not None:
+                raise ValueError("A DatasetReader has its own labels")
+            self.labels = source.labels
+        else:
+            self.labels = np.full(len(source), np.nan) if labels is None else np.asarray(labels, dtype=np.float64)
+            if len(self.labels) != len(source):
+                raise ValueError(f"{len(source)} graphs but {len(self.labels)} labels")
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.self_loops = self_loops
+        self.dtype = dtype
+        self.one_hot_column = one_hot_column
+        self.num_classes = num_classes
+        self.prefetch = prefetch
+        self.workers = workers
+        self.epoch = 0
+
+    def __len__(self):
+        if self.drop_last:
+            return len(self.source) // self.batch_size
+        return -(-len(self.source) // self.batch_size)
+
+    def order(self, epoch:int):
+        """
+        Returns the order the graphs are visited in during an epoch.
+        """
+        if not self.shuffle:
+            return np.arange(len(self.source))
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(epoch,)))
+        return rng.permutation(len(self.source))
+
+    def _gather(self, indices):
+        """
+        Returns the features, node counts, edges (numbered within their graph) and edge counts of some graphs.
+        """
+        if isinstance(self.source, DatasetReader):
+            dataset = self.source
+            node_counts = dataset.node_offsets[indices + 1] - dataset.node_offsets[indices]
+            edge_counts = dataset.edge_offsets[indices + 1] - dataset.edge_offsets[indices]
+            features = dataset.features[_gather_ranges(dataset.node_offsets, indices)]
+            edges = dataset.edges[_gather_ranges(dataset.edge_offsets, indices)].T
+            return features, node_counts, edges, edge_counts
+
+        items = [self.source[i] for i in indices.tolist()]
+        features, node_offsets = stack_feature_matrices(items)
+        edge_indices = [_as_circuit(item).make_edge_index() for item in items]
+        edge_counts = np.array([edge_index.shape[1] for edge_index in edge_indices], dtype=np.int64)
+        edges = np.concatenate(edge_indices, axis=1) if edge_indices else np.zeros((2, 0), dtype=np.int64)
+        return features, np.diff(node_offsets), edges, edge_counts
+
+    @timed("loader.collate")
+    def collate(self, indices):
+        """
+        Builds the batch of the given graphs.
+
+        Args:
+            indices (array_like): Indices of the graphs in the source.
+
+        Returns:
+            Batch: The collated graphs.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        features, node_counts, edges, edge_counts = self._gather(indices)
+        node_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(node_counts, out=node_offsets[1:])
+        edge_index = edges.astype(np.int64) + np.repeat(node_offsets[:-1], edge_counts)
+        if self.self_loops:
+            nodes = np.arange(node_offsets[-1], dtype=np.int64)
+            edge_index = np.concatenate([edge_index, np.stack([nodes, nodes])], axis=1)
+        features = np.asarray(features, dtype=self.dtype)
+        node_labels = None
+        if self.one_hot_column is not None:
+            node_labels = one_hot(features[:, self.one_hot_column], self.num_classes)
+        graph_index = np.repeat(np.arange(len(indices), dtype=np.int64), node_counts)
+        return Batch(edge_index, features, graph_index, node_offsets, np.asarray(self.labels[indices], dtype=np.float64),
+                     indices, node_labels)
+
+    def batches(self, epoch:int = None):
+        """
+        Yields the batches of one epoch.
+
+        Args:
+            epoch (int, optional): The epoch, which sets the shuffling. Defaults to the number of epochs iterated so far.
+
+        Yields:
+            Batch: The next batch.
+        """
+        if epoch is None:
+            epoch = self.epoch
+            self.epoch += 1
+        order = self.order(epoch)
+        stop = len(self) * self.batch_size if self.drop_last else len(order)
+        chunks = (order[start:min(start + self.batch_size, stop)] for start in range(0, stop, self.batch_size))
+        if self.prefetch < 1:
+            for chunk in chunks:
+                yield self.collate(chunk)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            def submit_next():
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(executor.submit(self.collate, chunk))
+
+            for _ in range(self.prefetch + 1):
+                submit_next()
+            while pending:
+                batch = pending.popleft().result()
+                submit_next()
+                yield batch
+
+    def __iter__(self):
+        return self.batches()
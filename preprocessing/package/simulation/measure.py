@@ -0,0 +1,151 @@
+"""
+Streaming parser for simulator measurement output.
+
+Reads the `.MEASURE TRAN tdlay{name}` results that `Circuit.measure_statement` asks for, from
+    ngspice logs            tdlaycircuit1 = 1.234567e-11 targ= 1.0e-06 trig= 1.0e-06
+    HSPICE listings (.lis)  tdlaycircuit1= 12.3456p  targ= 1.0000u  trig= 1.0000u
+    HSPICE tables (.mt0)    $DATA1 / .TITLE header, a block of column names, then rows of values
+Files are read line by line, so multi gigabyte outputs of large sweeps never have to fit in memory.
+Values keep SPICE's SI suffixes (f, p, n, u, m, k, meg, g, t) and failed measurements become NaN.
+example:
+delays = read_delays(["shard0.log", "shard1.log"], [graph.name for graph in graphs])
+"""
+
+import re
+
+import numpy as np
+from ..instrumentation import timed
+
+SI_SUFFIXES = {"a": 1e-18, "f": 1e-15, "p": 1e-12, "n": 1e-9, "u": 1e-6, "m": 1e-3,
+               "k": 1e3, "meg": 1e6, "x": 1e6, "g": 1e9, "t": 1e12}
+
+_NUMBER = re.compile(r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(meg|mil|[afpnumkxgt])?", re.IGNORECASE)
+
+
+def parse_value(text:str):
+    """
+    Parses a SPICE number.
+
+    Args:
+        text (str): A number such as `1.2e-11`, `12.3p` or `4.5meg`, possibly followed by a unit (`12.3ps`).
+
+    Returns:
+        float: The value, NaN when the text is not a number (e.g. `failed`).
+    """
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    match = _NUMBER.match(text)
+    if match is None:
+        return np.nan
+    suffix = (match.group(2) or "").lower()
+    if suffix == "mil":
+        return float(match.group(1)) * 25.4e-6
+    return float(match.group(1)) * SI_SUFFIXES.get(suffix, 1.0)
+
+
+def _is_value(token:str):
+    """
+    Returns whether a token of an `.mt#` table is a value (a number or `failed`) rather than a column name.
+    """
+    return token.lower() == "failed" or _NUMBER.fullmatch(token) is not None
+
+
+def _iter_table(lines):
+    """
+    Yields (name, value) pairs of an HSPICE `.mt#` table, read after its `$DATA1` line.
+    Every row of a sweep yields every name again.
+    """
+    names = []
+    values = []
+    for line in lines:
+        if line.startswith(".TITLE") or line.startswith("$") or not line.strip():
+            continue
+        tokens = line.split()
+        if values or (names and _is_value(tokens[0])):
+            values.extend(parse_value(token) for token in tokens)
+            while len(values) >= len(names):
+                yield from zip(names, values[:len(names)])
+                values = values[len(names):]
+        else:
+            names.extend(token.lower() for token in tokens)
+
+
+def iter_measurements(file, prefix:str = "tdlay"):
+    """
+    Streams the measurements out of a simulator output file.
+
+    Args:
+        file (str or file): The path of the output file, or an open text file.
+        prefix (str, optional): Only measurements whose name starts with the prefix are returned. Defaults to "tdlay".
+
+    Yields:
+        tuple: The lower case measurement name and its value in seconds (NaN when it failed).
+    """
+    if isinstance(file, str):
+        with open(file, errors="replace") as handle:
+            yield from iter_measurements(handle, prefix)
+        return
+
+    prefix = prefix.lower()
+    assignment = re.compile(rf"\s*({re.escape(prefix)}\w*)\s*=\s*(\S+)", re.IGNORECASE)
+    for line in file:
+        match = assignment.match(line)
+        if match:
+            yield match.group(1).lower(), parse_value(match.group(2))
+        elif line.startswith("$DATA"):
+            for name, value in _iter_table(file):
+                if name.startswith(prefix):
+                    yield name, value
+            return
+
+
+@timed("measure.read")
+def read_measurements(files, prefix:str = "tdlay"):
+    """
+    Reads the measurements of one or many output files.
+
+    Args:
+        files (str or list): Path(s) of the output files.
+        prefix (str, optional): Only measurements whose name starts with the prefix are returned. Defaults to "tdlay".
+
+    Returns:
+        dict: Lower case measurement name to value, the last value wins when a name repeats.
+    """
+    files = [files] if isinstance(files, str) else files
+    measurements = {}
+    for file in files:
+        measurements.update(iter_measurements(file, prefix))
+    return measurements
+
+
+def read_delays(files, names:list):
+    """
+    Reads the `tdlay{name}` delays of the given circuits.
+
+    Args:
+        files (str or list): Path(s) of the output files.
+        names (list): The circuit names, e.g. `[graph.name for graph in graphs]`.
+
+    Returns:
+        numpy.ndarray: The delays in seconds aligned with `names`, NaN for failed or missing measurements.
+    """
+    measurements = read_measurements(files)
+    return np.array([measurements.get(f"tdlay{name}".lower(), np.nan) for name in names])
+
+
+def read_sweep(files, name:str):
+    """
+    Reads every value of one measurement, in order, e.g. one per row of a `.DATA` sweep.
+
+    Args:
+        files (str or list): Path(s) of the output files, in sweep order (e.g. `.mt0`, `.mt1`, ... of `.ALTER` runs).
+        name (str): The circuit name, the measurement read is `tdlay{name}`.
+
+    Returns:
+        numpy.ndarray: The delays in seconds, NaN for failed runs.
+    """
+    files = [files] if isinstance(files, str) else files
+    measurement = f"tdlay{name}".lower()
+    return np.array([value for file in files for key, value in iter_measurements(file) if key == measurement])
@@ -0,0 +1,272 @@
+"""
+Runs simulation decks locally and collects the measured delays.
+
+The circuits are split into shard decks (one `Simulation` each), a configurable simulator command
+is run on every shard in parallel and the `tdlay{name}` measurements are read back from its output.
+example:
+runner = SimulationRunner(work_dir="sim", shards=8)      # ngspice -b -o sim/shard3.log sim/shard3.sp
+delays = runner.run([graph.circuit for graph in graphs])
+delays["circuit12"]
+With a `DelayCache` only circuits whose canonical hash is not cached yet are simulated, each distinct one once.
+Decks simulate 2 us at 1 ps (`DEFAULT_WINDOW`) unless `window` is given. With `adaptive=True` every shard
+gets a `TransientWindow` sized from the static timing estimate of its slowest circuit, and the circuits
+whose `.MEASURE` failed (e.g. because the estimate was too short) are simulated again with `fallback_window`:
+runner = SimulationRunner(work_dir="sim", adaptive=True)     # .tran 400f 1.2n instead of .tran 1p 2u
+"""
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .delay import LogicalEffort
+from .simulation import Simulation
+from .sta import StaticTiming
+from .sweep import SweepDeck
+from .measure import read_measurements
+from ..circuit.transient import TransientWindow, DEFAULT_WINDOW
+from ..instrumentation import timed
+
+# rough delay of a unit inverter of the 7nm library, the margin and the fallback absorb its error
+SECONDS_PER_TAU = 2e-12
+
+@timed("runner.simulate")
+def _simulate(command:list, deck_path:str, log_path:str, result_path:str, timeout):
+    """
+    Runs the simulator on one deck and checks that it succeeded and wrote its result file.
+    """
+    arguments = [argument.format(deck=deck_path, log=log_path) for argument in command]
+    if any("{log}" in argument for argument in command):
+        completed = subprocess.run(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    else:
+        with open(log_path, "w") as log:
+            completed = subprocess.run(arguments, stdout=log, stderr=subprocess.PIPE, timeout=timeout)
+    stderr = completed.stderr.decode(errors='replace')[-2000:]
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} exited with {completed.returncode}: {stderr}")
+    if not os.path.exists(result_path):
+        raise RuntimeError(f"{' '.join(arguments)} exited with 0 without writing {result_path}: {stderr}")
+
+
+def _run_shard(command:list, deck_path:str, log_path:str, result_path:str, timeout):
+    """
+    Runs the simulator on one deck and returns the measurements of its result file.
+    """
+    _simulate(command, deck_path, log_path, result_path, timeout)
+    return read_measurements(result_path)
+
+
+class SimulationRunner:
+    """
+    Splits circuits into shard decks, simulates them in parallel and collects the delays.
+
+    Args:
+        command (list, optional): The simulator command. "{deck}" is replaced by the deck path and "{log}" by
+            the log path; when "{log}" is not used the standard output is written to the log.
+            Defaults to ["ngspice", "-b", "-o", "{log}", "{deck}"].
+        work_dir (str, optional): Directory the decks and logs are written to. Defaults to "simulations".
+        shards (int, optional): Number of decks the circuits are split into. Defaults to `workers`.
+        workers (int, optional): Number of simulators running at the same time. Defaults to the number of cores.
+        result_file (str, optional): The file holding the measurements. "{log}" is replaced by the log path and
+            "{deck}" by the deck path without its extension, so e.g. "{deck}.mt0" reads HSPICE measurement files.
+            Defaults to "{log}".
+        timeout (float, optional): Seconds after which a simulator run is killed. Defaults to None.
+        cache (DelayCache, optional): Cache of measured delays consulted by `run` before simulating. Defaults to None.
+        hierarchical (bool, optional): Whether `run` writes `.SUBCKT` based decks, see `Simulation`. Defaults to False.
+        window (TransientWindow, optional): Stimulus and transient analysis of the decks. Defaults to None,
+            `DEFAULT_WINDOW`.
+        adaptive (bool, optional): Whether to size the window of every shard from its estimated delays instead,
+            see `window_for`. Defaults to False.
+        delay_model (LogicalEffort, optional): The model estimating the delays, tau in seconds.
+            Defaults to `LogicalEffort(tau=SECONDS_PER_TAU)`.
+        margin (float, optional): Simulated time after the edge, in estimated delays of the slowest circuit. Defaults to 10.
+        fallback_window (TransientWindow, optional): Window of the second run of the circuits whose measurement
+            failed with an adaptive or custom window, None to not run them again. Defaults to `DEFAULT_WINDOW`.
+    """
+    DEFAULT_COMMAND = ["ngspice", "-b", "-o", "{log}", "{deck}"]
+
+    def __init__(self, command:list = None, work_dir:str = "simulations", shards:int = None, workers:int = None,
+                 result_file:str = "{log}", timeout:float = None, cache = None,
+                 hierarchical:bool = False, window:TransientWindow = None, adaptive:bool = False,
+                 delay_model:LogicalEffort = None, margin:float = 10.0,
+                 fallback_window:TransientWindow = DEFAULT_WINDOW):
+        self.command = list(self.DEFAULT_COMMAND if command is None else command)
+        self.work_dir = work_dir
+        self.workers = os.cpu_count() if workers is None else workers
+        self.shards = self.workers if shards is None else shards
+        self.result_file = result_file
+        self.timeout = timeout
+        self.cache = cache
+        self.hierarchical = hierarchical
+        self.window = window
+        self.adaptive = adaptive
+        self.delay_model = LogicalEffort(tau=SECONDS_PER_TAU) if delay_model is None else delay_model
+        self.margin = margin
+        self.fallback_window = fallback_window
+
+    def window_for(self, circuits:list):
+        """
+        Returns the window of a deck of circuits: `window`, or with `adaptive` the window of
+        `TransientWindow.from_delay` for the largest static timing estimate of the circuits.
+
+        Args:
+            circuits (list): The circuits (`Circuit` or `CompactCircuit`) of the deck.
+
+        Returns:
+            TransientWindow: The window, None for the default.
+        """
+        if not self.adaptive or not circuits:
+            return self.window
+        delays, _ = StaticTiming(self.delay_model).analyze_batch(circuits)
+        return TransientWindow.from_delay(float(np.max(delays)), self.margin)
+
+    def write_shards(self, circuits:list, name:str = "shard", window:TransientWindow = None):
+        """
+        Splits the circuits into shard decks and writes them to `work_dir`.
+
+        Args:
+            circuits (list): The circuits (`Circuit` or `CompactCircuit`) to simulate.
+            name (str, optional): Prefix of the deck names. Defaults to "shard".
+            window (TransientWindow, optional): Window of every deck. Defaults to `window_for` each shard.
+
+        Returns:
+            list: The deck paths, one per non empty shard.
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        deck_paths = []
+        bounds = np.linspace(0, len(circuits), min(self.shards, len(circuits)) + 1).astype(int)
+        for i in range(len(bounds) - 1):
+            shard = circuits[bounds[i]:bounds[i+1]]
+            simulation = Simulation(f"{name}{i}", shard, self.hierarchical, self.window_for(shard) if window is None else window)
+            deck_path = os.path.join(self.work_dir, f"{simulation.name}.sp")
+            simulation.save(deck_path)
+            deck_paths.append(deck_path)
+        return deck_paths
+
+    def _job(self, deck_path:str):
+        """
+        Returns the arguments of `_simulate` for one deck.
+        """
+        log_path = os.path.splitext(deck_path)[0] + ".log"
+        result_path = self.result_file.format(deck=os.path.splitext(deck_path)[0], log=log_path)
+        return self.command, deck_path, log_path, result_path, self.timeout
+
+    def run_decks(self, deck_paths:list):
+        """
+        Runs the simulator on already written decks.
+
+        Args:
+            deck_paths (list): Paths of the decks.
+
+        Raises:
+            RuntimeError: If a simulator run failed or did not produce its result file.
+
+        Returns:
+            dict: Lower case measurement name to value over all decks.
+        """
+        jobs = [self._job(deck_path) for deck_path in deck_paths]
+
+        # every simulator is its own OS process, the pool threads only wait on them
+        measurements = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for shard_measurements in executor.map(lambda job: _run_shard(*job), jobs):
+                measurements.update(shard_measurements)
+        return measurements
+
+    def _measure(self, circuits:list, name:str):
+        """
+        Simulates the circuits and returns their delays by name, running the failed measurements
+        again with `fallback_window` when the decks used another window.
+        """
+        measurements = self.run_decks(self.write_shards(circuits, name))
+        delays = {circuit.name: measurements.get(f"tdlay{circuit.name}".lower(), np.nan) for circuit in circuits}
+        if self.fallback_window is None or (not self.adaptive and self.window in (None, self.fallback_window)):
+            return delays
+        failed = [circuit for circuit in circuits if np.isnan(delays[circuit.name])]
+        if failed:
+            measurements = self.run_decks(self.write_shards(failed, f"{name}_fallback", self.fallback_window))
+            delays.update({circuit.name: measurements.get(f"tdlay{circuit.name}".lower(), np.nan) for circuit in failed})
+        return delays
+
+    def run(self, circuits:list, name:str = "shard"):
+        """
+        Simulates the circuits and collects their delays. With a cache, only the cache misses are simulated,
+        one representative per distinct hash, and their delays are added to the cache. With an adaptive or custom
+        window the failed measurements are run again with `fallback_window`.
+
+        Args:
+            circuits (list): The circuits (`Circuit` or `CompactCircuit`) to simulate.
+            name (str, optional): Prefix of the deck names. Defaults to "shard".
+
+        Raises:
+            RuntimeError: If a simulator run failed or did not produce its result file.
+
+        Returns:
+            dict: Circuit name to measured delay in seconds, NaN when the measurement failed or is missing.
+        """
+        if self.cache is None:
+            return self._measure(circuits, name)
+
+        hashes = [self.cache.key(circuit) for circuit in circuits]
+        delays_by_hash = self.cache.get_many(hashes)
+        misses = {}
+        for circuit_hash, circuit in zip(hashes, circuits):
+            if circuit_hash not in delays_by_hash:
+                misses.setdefault(circuit_hash, circuit)
+        if misses:
+            delays = self._measure(list(misses.values()), name)
+            measured = {circuit_hash: delays[circuit.name] for circuit_hash, circuit in misses.items()}
+            self.cache.put_many(measured)
+            delays_by_hash.update(measured)
+        return {circuit.name: delays_by_hash[circuit_hash] for circuit_hash, circuit in zip(hashes, circuits)}
+
+    def delays(self, circuits:list, name:str = "shard"):
+        """
+        Simulates the circuits and returns their delays in the order of `circuits`.
+
+        Raises:
+            RuntimeError: If a simulator run failed or did not produce its result file.
+
+        Returns:
+            numpy.ndarray: The measured delays in seconds, NaN when the measurement failed or is missing.
+        """
+        delays = self.run(circuits, name)
+        return np.array([delays[circuit.name] for circuit in circuits])
+
+    def sweep(self, topologies:list, sizings:list, mode:str = "data", name:str = "sweep"):
+        """
+        Simulates many sizings of a few topologies with parametric `SweepDeck`s, the topologies split over the shards.
+        The simulator must support the deck syntax (HSPICE) and `result_file` must name its first measurement
+        file, e.g. "{deck}.mt0"; in "alter" mode the following `.mt#` files are read too.
+
+        Args:
+            topologies (list): The `Graph`, `Circuit` or `CompactCircuit` topologies.
+            sizings (list): One (B_t, n_t) array of sizings per topology.
+            mode (str, optional): "data" or "alter", see `SweepDeck`. Defaults to "data".
+            name (str, optional): Prefix of the deck names. Defaults to "sweep".
+
+        Raises:
+            RuntimeError: If a simulator run failed or did not produce its result file.
+
+        Returns:
+            list: One (B_t,) array of measured delays in seconds per topology, NaN when a measurement failed.
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        decks, jobs = [], []
+        bounds = np.linspace(0, len(topologies), min(self.shards, len(topologies)) + 1).astype(int)
+        for i in range(len(bounds) - 1):
+            deck = SweepDeck(f"{name}{i}", topologies[bounds[i]:bounds[i+1]], sizings[bounds[i]:bounds[i+1]], mode)
+            deck_path = os.path.join(self.work_dir, f"{deck.name}.sp")
+            deck.save(deck_path)
+            decks.append(deck)
+            jobs.append(self._job(deck_path))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(lambda job: _simulate(*job), jobs))
+        delays = []
+        for deck, job in zip(decks, jobs):
+            result_path = job[3]
+            delays.extend(deck.read(deck.result_files(os.path.splitext(result_path)[0])) if result_path.endswith(".mt0")
+                          else deck.read(result_path))
+        return delays
@@ -1,3 +1,8 @@
+from ..circuit.circuit import NETLIST_HEADER, render_simulation_settings
+from ..circuit.gate import render_subckt_library
+from ..instrumentation import timed
+
+
 class Simulation:
     """
     A class representing a simulation.
@@ -5,52 +10,63 @@ class Simulation:
     Attributes:
     - name (str): The name of the simulation.
     - circuits (list): A list of circuits to be simulated.
-    - netlist (str): The generated netlist for the simulation.
+    - hierarchical (bool): Whether the gate types are defined once as `.SUBCKT`s and instantiated per gate.
+    - window (TransientWindow): The stimulus and transient analysis shared by the circuits, None for the default.
+    - netlist (str): The generated netlist for the simulation, rendered on first access.
 
     Methods:
-    - __init__(name:str, circuits:list): Initializes a Simulation object.
-    - __generate_netlist(circuits): Generates the netlist for the simulation.
+    - __init__(name:str, circuits:list, hierarchical:bool = False, window = None): Initializes a Simulation object.
+    - iter_netlist(): Yields the netlist for the simulation chunk by chunk.
     - __repr__(): Returns a string representation of the simulation.
+    - write(file): Writes the netlist incrementally to an open file.
     - save(file_path:str): Saves the netlist to a file.
     """
 
-    def __init__(self, name:str, circuits:list):
+    def __init__(self, name:str, circuits:list, hierarchical:bool = False, window = None):
         """
         Initializes a Simulation object.
 
         Parameters:
         - name (str): The name of the simulation.
-        - circuits (list): A list of circuits to be simulated.
+        - circuits (list): A list of circuits (`Circuit` or `CompactCircuit`) to be simulated.
+        - hierarchical (bool, optional): Whether to emit one `.SUBCKT` per gate type and one `X` instance line
+          per gate, driver and end of sequence instead of their transistors. Defaults to False.
+        - window (TransientWindow, optional): The stimulus and transient analysis, e.g. sized to the circuits by
+          `TransientWindow.from_delay`. Defaults to None, the 2 us `DEFAULT_WINDOW`.
         """
         self.name = name
-        self.netlist = self.__generate_netlist(circuits)
-    
-    
+        self.circuits = list(circuits)
+        self.hierarchical = hierarchical
+        self.window = window
+        self._netlist = None
 
-    
-    def __generate_netlist(self, circuits):
+    def iter_netlist(self):
         """
-        Generates the netlist for the simulation.
+        Yields the netlist for the simulation chunk by chunk, so that a deck of many circuits
+        never has to be held in memory. Every component is rendered exactly once.
 
-        Parameters:
-        - circuits (list): A list of circuits to be simulated.
+        Yields:
+        - chunk (str): The next chunk of the netlist.
+        """
+        yield NETLIST_HEADER
+        if self.hierarchical:
+            yield render_subckt_library()
+        for circuit in self.circuits:
+            yield from circuit.iter_components(hierarchical=self.hierarchical, window=self.window)
+        yield render_simulation_settings(self.window)
+        for circuit in self.circuits:
+            yield circuit.measure_statement()
+        yield ".end\n"
 
-        Returns:
-        - netlist (str): The generated netlist for the simulation.
+    @property
+    def netlist(self):
+        """
+        The generated netlist for the simulation, rendered on first access and cached.
         """
-        self.netlist = f"/////////////////////3 STAGE NAND/////////////////////////////\n"+\
-                ".inc \"/home/lalithsai20/EMDproject/7nm_TT_160803.pm\"\n\n"
-        for circuit in circuits:
-            self.netlist += circuit.return_netlist()[0]
-        self.netlist += "\nVdd vdd 0 0.7\n"
-        self.netlist += f"\n.option post\n"+\
-                        ".tran 1p 2u\n"
-        for circuit in circuits:
-            self.netlist += circuit.return_netlist()[1]
-        self.netlist += ".end\n"
+        if self._netlist is None:
+            self._netlist = "".join(self.iter_netlist())
+        return self._netlist
 
-        return self.netlist
-    
     def __repr__(self):
         """
         Returns a string representation of the simulation.
@@ -59,13 +75,23 @@ class Simulation:
         - netlist (str): The generated netlist for the simulation.
         """
         return self.netlist
-    
+
+    @timed("simulation.write")
+    def write(self, file):
+        """
+        Writes the netlist incrementally to an open text file.
+
+        Parameters:
+        - file: The file handle to write to.
+        """
+        file.writelines(self.iter_netlist())
+
     def save(self, file_path:str):
         """
-        Saves the netlist to a file.
+        Saves the netlist to a file, streaming it instead of building it in memory first.
 
         Parameters:
         - file_path (str): The path of the file to save the netlist to.
         """
         with open(file_path, "w") as file:
-            file.write(self.netlist)
\ No newline at end of file
+            self.write(file)
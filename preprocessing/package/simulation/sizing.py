@@ -0,0 +1,230 @@
+"""
+Batched gate sizing search on top of the logical effort model.
+
+`Graph.idealized_weights` gives one closed form sizing per chain. `SizingOptimizer` searches integer
+sizings under constraints and returns the Pareto front of estimated delay against area, scoring
+candidates in NumPy batches with `LogicalEffort`, optionally running independent searches on a process pool.
+The area of a gate is its total number of fins, k times the multipliers of `TRANSISTOR_TEMPLATES`.
+example:
+optimizer = SizingOptimizer(LogicalEffort(BETA=2), max_sizing=50, max_area=5000)
+front = optimizer.optimize(graph.circuit)
+front.sizings[np.argmin(front.delays)]
+"""
+
+import copy
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..circuit.circuit import Circuit
+from ..circuit.compact import CompactCircuit
+from ..circuit.gate import TRANSISTOR_TEMPLATES
+from .delay import LogicalEffort
+
+FINS = np.array([sum(transistor[-1] for transistor in TRANSISTOR_TEMPLATES[gate_type]) for gate_type in Circuit.GATE_CHOICES])
+
+
+class ParetoFront:
+    """
+    The non dominated sizings found by a search, sorted by increasing area (and so decreasing delay).
+
+    Attributes:
+        sizings (numpy.ndarray): (m, n) integer sizings of the gates.
+        delays (numpy.ndarray): (m,) estimated delays.
+        areas (numpy.ndarray): (m,) areas in fins.
+    """
+
+    def __init__(self, sizings, delays, areas):
+        order = np.lexsort((delays, areas))
+        sizings, delays, areas = sizings[order], delays[order], areas[order]
+        best_before = np.concatenate([[np.inf], np.minimum.accumulate(delays)[:-1]])
+        keep = delays < best_before
+        self.sizings = sizings[keep]
+        self.delays = delays[keep]
+        self.areas = areas[keep]
+
+    def merge(self, other):
+        """
+        Returns the front of the union of two fronts.
+        """
+        return ParetoFront(np.concatenate([self.sizings, other.sizings]), np.concatenate([self.delays, other.delays]),
+                           np.concatenate([self.areas, other.areas]))
+
+    def __len__(self):
+        return len(self.delays)
+
+    def __repr__(self):
+        return f"ParetoFront({len(self)} sizings, delay {self.delays.min():.4g} .. {self.delays.max():.4g}, " \
+               f"area {self.areas.min():.4g} .. {self.areas.max():.4g})" if len(self) else "ParetoFront(empty)"
+
+
+class _Problem:
+    """
+    The fixed topology being sized: turns (B, n) sizings into delays and areas.
+    """
+
+    def __init__(self, compact:CompactCircuit, model:LogicalEffort):
+        n = len(compact)
+        self.model = model
+        self.types = compact.types.astype(np.intp)
+        self.eos_gate = compact.eos_gate
+        self.eos_k = compact.eos_k
+        # one entry per input driven by a gate: the gate driving it and the gate owning it
+        destination = np.repeat(np.arange(n), np.diff(compact.fanin_ptr))
+        driven_by_gate = compact.fanin_idx >= 0
+        self.loaded_gate = compact.fanin_idx[driven_by_gate].astype(np.intp)
+        self.loading_gate = destination[driven_by_gate]
+        # the measured path: from the end of sequence back through the first input of every gate
+        self.path = np.zeros(n, dtype=bool)
+        gate = compact.eos_gate
+        while gate >= 0 and not self.path[gate]:
+            self.path[gate] = True
+            gate = compact.fanin_idx[compact.fanin_ptr[gate]]
+        self.fins = FINS[self.types]
+
+    def loads(self, sizings):
+        batch, n = sizings.shape
+        capacitance = self.model.input_capacitance(self.types[self.loading_gate], sizings[:, self.loading_gate])
+        rows = (np.arange(batch)[:, None] * n + self.loaded_gate).ravel()
+        # without any pin between gates bincount returns integers
+        load = np.bincount(rows, weights=capacitance.ravel(), minlength=batch * n).astype(np.float64, copy=False)
+        load = load.reshape(batch, n)
+        load[:, self.eos_gate] += self.eos_k
+        return load
+
+    def evaluate(self, sizings):
+        sizings = np.asarray(sizings, dtype=np.float64)
+        stage_delays = self.model.tau * (self.loads(sizings) / sizings + self.model.p[self.types])
+        return stage_delays[:, self.path].sum(axis=1), sizings @ self.fins
+
+    def equal_effort(self, stage_effort:float, max_sizing:int):
+        """
+        Sizes the gates backwards from the load so that every gate sees about the same effort delay.
+        """
+        n = len(self.types)
+        sizing = np.ones(n)
+        for gate in range(n - 1, -1, -1):
+            load = self.loads(sizing[None, :])[0, gate]
+            sizing[gate] = np.clip(np.round(load / stage_effort), 1, max_sizing)
+        return sizing
+
+
+def _search(problem:_Problem, max_sizing:int, max_area, batch_size:int, iterations:int, initial, seed):
+    """
+    One independent evolutionary search, module level so that it can run on a process pool.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(problem.types)
+    seeds = [problem.equal_effort(effort, max_sizing) for effort in np.geomspace(1.5, 12, 16)]
+    seeds += [np.clip(np.round(sizing), 1, max_sizing) for sizing in np.reshape(initial, (-1, n))]
+    candidates = np.vstack(seeds + [np.ones(n), rng.integers(1, max_sizing + 1, (batch_size, n))])
+    front = None
+    for _ in range(iterations + 1):
+        delays, areas = problem.evaluate(candidates)
+        feasible = areas <= max_area if max_area is not None else np.ones(len(areas), dtype=bool)
+        batch_front = ParetoFront(candidates[feasible].astype(np.int64), delays[feasible], areas[feasible])
+        front = batch_front if front is None else front.merge(batch_front)
+        if len(front) == 0:
+            candidates = rng.integers(1, max_sizing + 1, (batch_size, n))
+            continue
+        # mutate random members of the front: rescale a random subset of the gates
+        parents = front.sizings[rng.integers(0, len(front), batch_size)].astype(np.float64)
+        mutate = rng.random((batch_size, n)) < rng.uniform(min(1 / n, 0.5), 0.5, (batch_size, 1))
+        factors = np.exp(rng.normal(0, 0.35, (batch_size, n)))
+        candidates = np.clip(np.round(np.where(mutate, parents * factors, parents)), 1, max_sizing)
+    return front
+
+
+class SizingOptimizer:
+    """
+    Searches integer sizings of a circuit for the Pareto front of estimated delay against area.
+
+    Args:
+        model (LogicalEffort, optional): The delay model scoring the candidates. Defaults to `LogicalEffort()`.
+        max_sizing (int, optional): Largest sizing of a gate, the smallest is 1. Defaults to 50.
+        max_area (float, optional): Largest total area in fins. Defaults to None (unconstrained).
+        batch_size (int, optional): Number of candidates scored per batch. Defaults to 4096.
+        iterations (int, optional): Number of batches per search. Defaults to 50.
+        workers (int, optional): Number of independent searches run on a process pool, their fronts are merged.
+            Defaults to 1 (a single search in-process).
+    """
+
+    def __init__(self, model:LogicalEffort = None, max_sizing:int = 50, max_area:float = None, batch_size:int = 4096,
+                 iterations:int = 50, workers:int = 1):
+        self.model = LogicalEffort() if model is None else model
+        self.max_sizing = max_sizing
+        self.max_area = max_area
+        self.batch_size = batch_size
+        self.iterations = iterations
+        self.workers = workers
+
+    def problem(self, circuit, output_k:int = None):
+        """
+        Returns the sizing problem of a `Graph`, `Circuit`, `CompactCircuit` or chain of gate types.
+
+        Args:
+            circuit: The circuit, or a list of gate types forming a chain like the ones `Graph` builds.
+            output_k (int, optional): Sizing of the end of sequence, required for a list of gate types.
+
+        Raises:
+            ValueError: If a list of gate types is given without `output_k`.
+        """
+        if isinstance(circuit, (list, tuple, np.ndarray)):
+            if output_k is None:
+                raise ValueError("output_k must be given when sizing a list of gate types")
+            types = [str(gate_type) for gate_type in circuit]
+            gate_dict = {f"gate{i+1}": {"type": gate_type, "k": 1,
+                                        "input_components": [f"gate{i}" if i else f"v{j+1}" for j in range(int(gate_type[0]))]}
+                         for i, gate_type in enumerate(types)}
+            voltage_dict = {f"v{j+1}": {"ideal": True} for j in range(int(types[0][0]))}
+            eos_dict = {"k": output_k, "input_gate": f"gate{len(types)}", "capacitance": 10}
+            compact = CompactCircuit.from_dicts("", gate_dict, voltage_dict, eos_dict)
+        else:
+            compact = LogicalEffort._as_compact(circuit)
+            if output_k is not None:
+                # the compact may be the caller's own, or the one cached by a `Graph`
+                compact = copy.copy(compact)
+                compact.eos_k = output_k
+        return _Problem(compact, self.model)
+
+    def evaluate(self, circuit, sizings, output_k:int = None):
+        """
+        Scores candidate sizings.
+
+        Args:
+            circuit: The circuit, see `problem`.
+            sizings (array_like): (B, n) sizings.
+            output_k (int, optional): Sizing of the end of sequence, required for a list of gate types.
+
+        Returns:
+            tuple: The (B,) estimated delays and (B,) areas.
+        """
+        return self.problem(circuit, output_k).evaluate(np.atleast_2d(sizings))
+
+    def optimize(self, circuit, output_k:int = None, initial = None, seed:int = 0):
+        """
+        Searches the sizings of a circuit.
+
+        Args:
+            circuit: The circuit, see `problem`.
+            output_k (int, optional): Sizing of the end of sequence, required for a list of gate types.
+            initial (array_like, optional): (m, n) sizings the search starts from besides its own, e.g.
+                `graph.ideal_weights`. Defaults to the idealized weights when `circuit` is a `Graph`.
+            seed (int, optional): Seed of the search. Defaults to 0.
+
+        Returns:
+            ParetoFront: The non dominated sizings found.
+        """
+        problem = self.problem(circuit, output_k)
+        if initial is None:
+            initial = getattr(circuit, "ideal_weights", np.zeros((0, len(problem.types))))
+        arguments = (problem, self.max_sizing, self.max_area, self.batch_size, self.iterations, initial)
+        seeds = np.random.SeedSequence(seed).spawn(self.workers)
+        if self.workers == 1:
+            return _search(*arguments, seeds[0])
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            fronts = list(executor.map(_search, *zip(*[arguments] * self.workers), seeds))
+        front = fronts[0]
+        for other in fronts[1:]:
+            front = front.merge(other)
+        return front
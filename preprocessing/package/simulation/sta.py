@@ -0,0 +1,349 @@
+"""
+Static timing analysis over circuit graphs.
+
+A single `.MEASURE` from the first driver to the end of sequence gives one number per circuit. `StaticTiming`
+propagates arrival times through every gate with the `LogicalEffort` stage delays (so the load of a gate
+accounts for the sizing of every gate it drives), then required times back from the gate driving the end
+of sequence, and reports the per gate arrival, required time and slack, the circuit delay and its critical path.
+Arrival times start at 0 on the voltage source outputs, the node the `.MEASURE` triggers on.
+The topology is analysed once (`TimingGraph`), after which every pass is a few NumPy operations per level:
+    circuits in which every gate has one distinct gate predecessor (the chains `Graph` builds, trees)
+        use pointer doubling, O(log depth) vectorized steps;
+    general DAGs are swept level by level, O(depth) vectorized steps.
+example:
+sta = StaticTiming(LogicalEffort(BETA=2))
+report = sta.analyze(graph.circuit)
+report.delay, report.critical_path, report.slack
+timing = sta.prepare(graph.circuit)                   # re-analyse other sizings of the same topology
+sta.analyze(timing, k=candidate_sizing)
+node_features = report.features()
+delays, paths = sta.analyze_batch([graph.circuit for graph in graphs])      # one pass over all circuits
+"""
+
+import numpy as np
+
+from ..circuit.compact import CompactCircuit
+from .delay import LogicalEffort
+from ..instrumentation import timed
+
+
+def _gather_ranges(ptr, rows):
+    """
+    Returns the indices ptr[r]:ptr[r+1] of all `rows`, concatenated.
+    """
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+class TimingGraph:
+    """
+    The topology of a circuit prepared for repeated timing passes.
+
+    Args:
+        compact (CompactCircuit): The circuit, its gates in topological order.
+
+    Raises:
+        ValueError: If a gate is driven by a gate that does not come before it.
+    """
+
+    def __init__(self, compact):
+        self.compact = compact
+        n = len(compact)
+        self.num_gates = n
+        self.types = compact.types.astype(np.intp)
+        self.eos_gate = compact.eos_gate
+        self.eos_k = compact.eos_k
+        fanin_ptr = compact.fanin_ptr.astype(np.int64)
+        fanin_idx = compact.fanin_idx.astype(np.int64)
+        destination = np.repeat(np.arange(n), np.diff(fanin_ptr))
+        if np.any(fanin_idx >= destination):
+            raise ValueError("The gates of the circuit are not in topological order")
+        self.fanin_ptr = fanin_ptr
+        self.destination = destination
+        # voltage sources are appended after the gates in the arrival vector
+        self.pin_source = np.where(fanin_idx >= 0, fanin_idx, n - fanin_idx - 1)
+        self.driven_by_gate = fanin_idx >= 0
+
+        gate_pins = self.driven_by_gate
+        self.loaded_gate = fanin_idx[gate_pins]
+        self.loading_gate = destination[gate_pins]
+
+        # one distinct gate predecessor at most: pointer doubling
+        parent = np.full(n, -1, dtype=np.int64)
+        parent[destination[gate_pins]] = fanin_idx[gate_pins]
+        distinct = np.zeros(n, dtype=np.int64)
+        if gate_pins.any():
+            pairs = np.unique(np.stack([destination[gate_pins], fanin_idx[gate_pins]]), axis=1)
+            distinct = np.bincount(pairs[0], minlength=n)
+        self.is_forest = bool(np.all(distinct <= 1))
+        self.parent = parent
+        # the critical path is walked in Python, over lists
+        self._parent_list = parent.tolist()
+        self._pin_source_list = self.pin_source.tolist()
+        self._fanin_ptr_list = fanin_ptr.tolist()
+        if not self.is_forest:
+            self.__make_levels(n)
+
+    @classmethod
+    def batch(cls, compacts:list):
+        """
+        Prepares many circuits as one disconnected topology, so that a single pass times all of them.
+        `eos_gate` and `eos_k` hold one entry per circuit and `offsets` the first gate of every circuit.
+
+        Args:
+            compacts (list): `CompactCircuit` objects, their gates in topological order.
+
+        Returns:
+            TimingGraph: The prepared topology of the batch.
+        """
+        counts = np.array([len(compact) for compact in compacts], dtype=np.int64)
+        sources = np.array([len(compact.source_ideal) for compact in compacts], dtype=np.int64)
+        offsets = np.zeros(len(compacts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        source_offsets = np.concatenate([[0], np.cumsum(sources)[:-1]])
+        pins = [len(compact.fanin_idx) for compact in compacts]
+        fanin_idx = np.concatenate([compact.fanin_idx for compact in compacts] + [[]]).astype(np.int64)
+        # gates shift by the gates, voltage sources (negative) by the voltage sources of the circuits before
+        fanin_idx += np.where(fanin_idx >= 0, np.repeat(offsets[:-1], pins), -np.repeat(source_offsets, pins))
+        fanin_ptr = np.zeros(offsets[-1] + 1, dtype=np.int64)
+        np.cumsum(np.concatenate([np.diff(compact.fanin_ptr) for compact in compacts] + [[]]), out=fanin_ptr[1:])
+        merged = CompactCircuit("batch", np.concatenate([compact.types for compact in compacts] + [[]]),
+                                np.concatenate([compact.k for compact in compacts] + [[]]), fanin_ptr, fanin_idx,
+                                np.zeros(sources.sum(), dtype=bool), np.zeros(sources.sum()), 0, 0)
+        timing = cls(merged)
+        timing.offsets = offsets
+        timing.eos_gate = offsets[:-1] + np.array([compact.eos_gate for compact in compacts], dtype=np.int64)
+        timing.eos_k = np.array([compact.eos_k for compact in compacts], dtype=np.float64)
+        return timing
+
+    def __make_levels(self, n:int):
+        """
+        Groups the gates by their depth from the sources, with a vectorized Kahn sweep.
+        """
+        pins = self.driven_by_gate
+        order = np.argsort(self.loaded_gate, kind="stable")
+        fanout_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.loaded_gate, minlength=n), out=fanout_ptr[1:])
+        fanout_idx = self.loading_gate[order]
+        indegree = np.bincount(self.destination[pins], minlength=n)
+        level = np.zeros(n, dtype=np.int64)
+        frontier = np.flatnonzero(indegree == 0)
+        depth = 0
+        while len(frontier):
+            level[frontier] = depth
+            consumers = fanout_idx[_gather_ranges(fanout_ptr, frontier)]
+            indegree -= np.bincount(consumers, minlength=n)
+            candidates = np.unique(consumers)
+            frontier = candidates[indegree[candidates] == 0]
+            depth += 1
+
+        # per level: the gates, the sources of their pins and where every gate's pins start
+        self.levels = []
+        gates_by_level = np.argsort(level, kind="stable")
+        bounds = np.searchsorted(level[gates_by_level], np.arange(depth + 1))
+        for d in range(depth):
+            gates = gates_by_level[bounds[d]:bounds[d + 1]]
+            pin_rows = _gather_ranges(self.fanin_ptr, gates)
+            counts = self.fanin_ptr[gates + 1] - self.fanin_ptr[gates]
+            segments = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            self.levels.append((gates, self.pin_source[pin_rows], segments, np.repeat(gates, counts)))
+
+    def stage_delays(self, model:LogicalEffort, k):
+        """
+        Returns the delay of every gate for the given sizings.
+        """
+        k = np.asarray(k, dtype=np.float64)
+        # without any pin between gates bincount returns integers
+        load = np.bincount(self.loaded_gate, weights=model.input_capacitance(self.types[self.loading_gate], k[self.loading_gate]),
+                           minlength=self.num_gates).astype(np.float64, copy=False)
+        load[self.eos_gate] += self.eos_k
+        return model.tau * (load / k + model.p[self.types])
+
+    def arrival_times(self, stage_delays):
+        """
+        Returns the arrival time at the output of every gate, sources arriving at 0.
+        """
+        if self.is_forest:
+            arrival = stage_delays.copy()
+            ancestor = self.parent.copy()
+            active = np.flatnonzero(ancestor >= 0)
+            while len(active):
+                arrival[active] += arrival[ancestor[active]]
+                ancestor[active] = ancestor[ancestor[active]]
+                active = active[ancestor[active] >= 0]
+            return arrival
+
+        extended = np.zeros(self.num_gates + len(self.compact.source_ideal))
+        for gates, sources, segments, _ in self.levels:
+            extended[gates] = np.maximum.reduceat(extended[sources], segments) + stage_delays[gates]
+        return extended[:self.num_gates]
+
+    def required_times(self, stage_delays, arrival, required_time:float):
+        """
+        Returns the latest arrival time at every gate output meeting `required_time` at the end of sequence
+        (inf for gates not driving it, directly or not).
+        """
+        required = np.full(self.num_gates, np.inf)
+        if self.is_forest:
+            path = self.critical_path(arrival)
+            required[path] = arrival[path] + (required_time - arrival[self.eos_gate])
+            return required
+
+        extended = np.full(self.num_gates + len(self.compact.source_ideal), np.inf)
+        extended[self.eos_gate] = required_time
+        for gates, sources, _, pin_gates in reversed(self.levels):
+            driving = sources < self.num_gates
+            np.minimum.at(extended, sources[driving], (extended[pin_gates] - stage_delays[pin_gates])[driving])
+        return extended[:self.num_gates]
+
+    def critical_path(self, arrival):
+        """
+        Returns the gates of the latest path to the end of sequence, from the first gate to the one driving it.
+        """
+        return self.__walk(self.eos_gate, None if self.is_forest else self.__arrival_list(arrival))
+
+    def critical_paths(self, arrival):
+        """
+        Returns the critical path of every circuit of a `batch`, numbered within its circuit.
+        """
+        arrival = None if self.is_forest else self.__arrival_list(arrival)
+        return [[gate - start for gate in self.__walk(end, arrival)]
+                for start, end in zip(self.offsets[:-1].tolist(), self.eos_gate.tolist())]
+
+    def __arrival_list(self, arrival):
+        return arrival.tolist() + [-np.inf] * len(self.compact.source_ideal)
+
+    def __walk(self, gate:int, arrival:list):
+        """
+        Walks back from `gate` along the latest input, or the only gate predecessor in forests.
+        """
+        path = []
+        if self.is_forest:
+            parent = self._parent_list
+            while gate >= 0:
+                path.append(gate)
+                gate = parent[gate]
+            return path[::-1]
+
+        n = self.num_gates
+        pin_source, fanin_ptr = self._pin_source_list, self._fanin_ptr_list
+        while gate < n:
+            path.append(gate)
+            gate = max(pin_source[fanin_ptr[gate]:fanin_ptr[gate + 1]], key=arrival.__getitem__)
+        return path[::-1]
+
+
+class TimingReport:
+    """
+    The result of a timing pass.
+
+    Attributes:
+        stage_delays (numpy.ndarray): (n,) delay of every gate.
+        arrival (numpy.ndarray): (n,) arrival time at every gate output.
+        required (numpy.ndarray): (n,) required time at every gate output, inf when the gate does not drive the end of sequence.
+        slack (numpy.ndarray): (n,) required minus arrival time.
+        delay (float): Arrival time at the gate driving the end of sequence, what the `.MEASURE` measures.
+        critical_path (list): Gate numbers of the critical path, from the first gate to the one driving the end of sequence.
+    """
+
+    def __init__(self, stage_delays, arrival, required, critical_path:list, delay:float):
+        self.stage_delays = stage_delays
+        self.arrival = arrival
+        self.required = required
+        self.slack = required - arrival
+        self.critical_path = critical_path
+        self.delay = delay
+
+    def features(self):
+        """
+        Returns timing node features: [arrival, slack, stage delay, on critical path] per gate.
+        Slacks of gates not driving the end of sequence are capped to the circuit delay.
+
+        Returns:
+            numpy.ndarray: The (n, 4) feature matrix, rows in gate number order.
+        """
+        on_path = np.zeros(len(self.arrival))
+        on_path[self.critical_path] = 1
+        slack = np.minimum(self.slack, self.delay)
+        return np.column_stack([self.arrival, slack, self.stage_delays, on_path])
+
+    def __repr__(self):
+        return f"TimingReport(delay={self.delay:.4g}, critical path of {len(self.critical_path)} gates, " \
+               f"worst slack={self.slack.min() if len(self.slack) else np.nan:.4g})"
+
+
+class StaticTiming:
+    """
+    Static timing analysis with the logical effort delay model.
+
+    Args:
+        model (LogicalEffort, optional): The delay model. Defaults to `LogicalEffort()`.
+    """
+
+    def __init__(self, model:LogicalEffort = None):
+        self.model = LogicalEffort() if model is None else model
+
+    def prepare(self, circuit):
+        """
+        Prepares the topology of a `Graph`, `Circuit` or `CompactCircuit` for repeated passes.
+
+        Returns:
+            TimingGraph: The prepared topology.
+        """
+        return circuit if isinstance(circuit, TimingGraph) else TimingGraph(LogicalEffort._as_compact(circuit))
+
+    @timed("sta.analyze")
+    def analyze(self, circuit, k = None, required_time:float = None):
+        """
+        Runs a full timing pass.
+
+        Args:
+            circuit: A `Graph`, `Circuit`, `CompactCircuit` or a `TimingGraph` from `prepare`.
+            k (array_like, optional): (n,) sizings replacing the ones of the circuit. Defaults to None.
+            required_time (float, optional): Required time at the gate driving the end of sequence.
+                Defaults to the circuit delay, so that the critical path has zero slack.
+
+        Returns:
+            TimingReport: The arrival and required times, slacks, delay and critical path.
+        """
+        timing = self.prepare(circuit)
+        stage_delays = timing.stage_delays(self.model, timing.compact.k if k is None else k)
+        arrival = timing.arrival_times(stage_delays)
+        delay = float(arrival[timing.eos_gate])
+        required = timing.required_times(stage_delays, arrival, delay if required_time is None else required_time)
+        return TimingReport(stage_delays, arrival, required, timing.critical_path(arrival), delay)
+
+    @timed("sta.analyze_batch")
+    def analyze_batch(self, circuits:list):
+        """
+        Times many circuits in one pass over their side by side topologies.
+
+        Args:
+            circuits (list): `Graph`, `Circuit` or `CompactCircuit` objects.
+
+        Returns:
+            tuple: The (len(circuits),) delays and the critical path of every circuit.
+        """
+        if not circuits:
+            return np.zeros(0), []
+        timing = TimingGraph.batch([LogicalEffort._as_compact(circuit) for circuit in circuits])
+        arrival = timing.arrival_times(timing.stage_delays(self.model, timing.compact.k))
+        return arrival[timing.eos_gate], timing.critical_paths(arrival)
+
+    def delays(self, circuits:list):
+        """
+        Returns the delay of many circuits, a fast label source.
+
+        Args:
+            circuits (list): `Graph`, `Circuit`, `CompactCircuit` or `TimingGraph` objects.
+
+        Returns:
+            numpy.ndarray: The (len(circuits),) delays.
+        """
+        delays = np.empty(len(circuits))
+        for i, circuit in enumerate(circuits):
+            timing = self.prepare(circuit)
+            delays[i] = timing.arrival_times(timing.stage_delays(self.model, timing.compact.k))[timing.eos_gate]
+        return delays
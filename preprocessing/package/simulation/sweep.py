@@ -0,0 +1,170 @@
+"""
+Parametric sweep decks: every topology is written once and its sizings are swept by the simulator.
+
+A `Simulation` holds one full copy of the transistors per circuit, so 1000 sizings of one topology
+are 1000 copies. `SweepDeck` writes each topology once with `nfin = 'k{gate}*multiplier'` expressions
+and passes the sizings as data (HSPICE syntax):
+    mode="data"   a `.DATA` table with one column per gate and one row per sizing, swept by
+                  `.tran 1p 2u SWEEP DATA=sizings`; the measurements land in one multi row `.mt0` table.
+    mode="alter"  `.PARAM` defaults from the first sizing and one `.ALTER` block re-assigning the
+                  parameters per further sizing; every block writes its own `.mt#` file.
+Deck size and parse time grow with the number of topologies, plus one number per gate and sizing.
+Topologies with fewer sizings than the others repeat their last one in the table, `read` drops those rows.
+example:
+deck = SweepDeck("sweep", [graph.circuit], [candidate_sizings])      # candidate_sizings: (B, n)
+deck.save("sweep.sp")                                                 # hspice sweep.sp -o sweep
+delays, = deck.read("sweep.mt0")                                      # (B,) delays
+"""
+
+import numpy as np
+
+from ..circuit.circuit import NETLIST_HEADER, SUPPLY_AND_OPTIONS, TRANSIENT_ANALYSIS
+from .delay import LogicalEffort
+from .measure import read_sweep
+
+# tokens per continuation line of the .DATA table and of the .PARAM statements
+TOKENS_PER_LINE = 16
+
+
+def _continued(tokens:list, first:str):
+    """
+    Renders tokens as a statement starting with `first`, wrapped over `+` continuation lines.
+    """
+    lines = [first]
+    for start in range(0, len(tokens), TOKENS_PER_LINE):
+        lines.append("+ " + " ".join(tokens[start:start + TOKENS_PER_LINE]))
+    return "\n".join(lines) + "\n"
+
+
+class SweepDeck:
+    """
+    A deck simulating many sizings of a few topologies through parameters.
+
+    Args:
+        name (str): The name of the deck, also the name of the `.DATA` table.
+        topologies (list): The `Graph`, `Circuit` or `CompactCircuit` topologies, their own sizings are ignored.
+        sizings (list): One (B_t, n_t) array of integer sizings per topology.
+        mode (str, optional): "data" or "alter", see the module docstring. Defaults to "data".
+
+    Raises:
+        ValueError: If the mode is unknown, the number of sizings does not match the number of topologies
+            or a sizing array does not have one column per gate.
+    """
+    MODES = ("data", "alter")
+
+    def __init__(self, name:str, topologies:list, sizings:list, mode:str = "data"):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid sweep mode: {mode}. Valid modes are: {', '.join(self.MODES)}")
+        if len(topologies) != len(sizings):
+            raise ValueError("One array of sizings is needed per topology")
+        self.name = name
+        self.mode = mode
+        self.topologies = [LogicalEffort._as_compact(topology) for topology in topologies]
+        self.sizings = [np.atleast_2d(np.asarray(sizing, dtype=np.int64)) for sizing in sizings]
+        for topology, sizing in zip(self.topologies, self.sizings):
+            if sizing.shape[1] != len(topology):
+                raise ValueError(f"{topology.name} has {len(topology)} gates but its sizings have {sizing.shape[1]} columns")
+        self.num_rows = max((len(sizing) for sizing in self.sizings), default=0)
+
+    def param_names(self, t:int):
+        """
+        Returns the names of the parameters holding the gate sizings of topology `t`.
+        """
+        topology = self.topologies[t]
+        return [f"k{topology.gate_name(i)}{topology.name}" for i in range(len(topology))]
+
+    def _table(self):
+        """
+        Returns the parameter names and the (num_rows, total gates) table of all sizings, shorter sweeps padded
+        with their last row.
+        """
+        names = [name for t in range(len(self.topologies)) for name in self.param_names(t)]
+        columns = [np.concatenate([sizing, np.repeat(sizing[-1:], self.num_rows - len(sizing), axis=0)])
+                   for sizing in self.sizings]
+        return names, np.hstack(columns) if columns else np.zeros((0, 0), dtype=np.int64)
+
+    def iter_netlist(self):
+        """
+        Yields the deck chunk by chunk.
+
+        Yields:
+            str: The next chunk of the netlist.
+        """
+        names, table = self._table()
+        yield NETLIST_HEADER
+        if self.num_rows:
+            yield _continued([f"{name}={k}" for name, k in zip(names, table[0].tolist())], ".PARAM")
+        for t, topology in enumerate(self.topologies):
+            yield from topology.iter_components(self.param_names(t))
+        yield SUPPLY_AND_OPTIONS
+        if self.mode == "data":
+            yield _continued(names, f".DATA {self.name}")
+            for row in table.tolist():
+                yield _continued([str(k) for k in row], "")[1:]
+            yield ".ENDDATA\n"
+            yield f"{TRANSIENT_ANALYSIS} SWEEP DATA={self.name}\n"
+        else:
+            yield TRANSIENT_ANALYSIS + "\n"
+        for topology in self.topologies:
+            yield topology.measure_statement()
+        if self.mode == "alter":
+            for r, row in enumerate(table[1:].tolist()):
+                yield f"\n.ALTER {self.name}{r + 1}\n"
+                yield _continued([f"{name}={k}" for name, k in zip(names, row)], ".PARAM")
+        yield ".end\n"
+
+    @property
+    def netlist(self):
+        """
+        The deck, rendered whenever it is accessed.
+        """
+        return "".join(self.iter_netlist())
+
+    def __repr__(self):
+        return self.netlist
+
+    def write(self, file):
+        """
+        Writes the deck incrementally to an open text file.
+
+        Args:
+            file: The file handle to write to.
+        """
+        file.writelines(self.iter_netlist())
+
+    def save(self, file_path:str):
+        """
+        Saves the deck to a file.
+
+        Args:
+            file_path (str): The path of the file to save the deck to.
+        """
+        with open(file_path, "w") as file:
+            self.write(file)
+
+    def result_files(self, output_prefix:str):
+        """
+        Returns the measurement files the simulator writes for this deck, in sweep order.
+
+        Args:
+            output_prefix (str): The output path of the simulator without extension (e.g. `hspice -o` argument).
+        """
+        if self.mode == "data":
+            return [f"{output_prefix}.mt0"]
+        return [f"{output_prefix}.mt{r}" for r in range(self.num_rows)]
+
+    def read(self, files):
+        """
+        Reads the swept delays back.
+
+        Args:
+            files (str or list): The measurement file(s) in sweep order, e.g. `result_files(prefix)`.
+
+        Returns:
+            list: One (B_t,) array of delays in seconds per topology, NaN for failed or missing measurements.
+        """
+        delays = []
+        for topology, sizing in zip(self.topologies, self.sizings):
+            values = read_sweep(files, topology.name)[:len(sizing)]
+            delays.append(np.concatenate([values, np.full(len(sizing) - len(values), np.nan)]))
+        return delays